@@ -0,0 +1,72 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+"""
+Micro-benchmark for the evaluators: evaluates the expressions from
+test_evals.py (plus a few node types from further down the dispatch)
+many times and reports the average cost per AST node.
+
+With --engine compile each expression is compiled once up front and
+only running the compiled code is timed.
+
+usage: python bench_eval.py [-n ITERATIONS] [--engine interp|compile]
+"""
+
+EXPRS = {
+    "string"   : Literal("hello world!", TString()),
+    "boolean"  : Literal(True, TBoolean()),
+    "list lit" : Literal([4, -1, 9], TList(TInt())),
+    "rational" : Literal(3/4, TRational()),
+    "or"       : Or(Literal(True, TBoolean()), Literal(False, TBoolean())),
+    "not and"  : Not(And(Literal(True, TBoolean()), Literal(False, TBoolean()))),
+    "plus"     : Plus(Literal(4, TInt()), Literal(3, TNum())),
+    "divide"   : Divide(Literal(0, TNat()), Literal(4/3, TRational())),
+    "let"      : Let(Variable("x", TBoolean()), Literal(False, TBoolean()),
+                     Or(Variable("x", TBoolean()), Literal(True, TBoolean()))),
+    "closure"  : Application(Lambda([Variable("x", TRational())], Plus(Literal(3, TInt()), Variable("x", TRational()))),
+                             Let(Variable("y", TInt()), Literal(-1, TInt()), Plus(Variable("y", TInt()), Literal(4, TNat())))),
+    "contains" : Contains(Literal("lo", TString()), Literal("hello", TString())),
+    "list"     : List([Literal(1, TNat()), Literal(2, TNat()), Literal(3, TNat())], TList(TNat())),
+}
+
+
+def count_nodes(e) -> int:
+    return 1 + sum([count_nodes(c) for c in Resolver().children(e)])
+
+
+def bench(i : Interpreter, e : Expr, n : int) -> float:
+    Resolver().resolve_root(e, e)
+    env = Frame(e.root_frame_size)
+    if isinstance(i, Compiler):
+        run = i.compile(e)
+    else:
+        run = lambda env: i._eval(e, env)
+    t = perf_counter()
+    for _ in range(n):
+        run(env)
+    return perf_counter() - t
+
+
+if __name__ == "__main__":
+    p = ArgumentParser()
+    p.add_argument('-n', type=int, default=20000)
+    p.add_argument('--engine', choices=['interp', 'compile'], default='interp')
+    args = p.parse_args()
+    logger.remove()
+    i = Compiler() if args.engine == "compile" else Interpreter()
+    total_t = 0
+    total_nodes = 0
+    print(f"{'expression':<10} {'nodes':>5} {'ns/node':>8}")
+    for name, e in EXPRS.items():
+        nodes = count_nodes(e)
+        t = bench(i, e, args.n)
+        total_t += t
+        total_nodes += nodes * args.n
+        print(f"{name:<10} {nodes:>5} {t / (nodes * args.n) * 1e9:>8.0f}")
+    print(f"{'all':<10} {'':>5} {total_t / total_nodes * 1e9:>8.0f}")
@@ -0,0 +1,49 @@
+from argparse import ArgumentParser
+import tracemalloc
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+"""
+Memory benchmark for the AST: builds a tree of about N nodes (a list of
+sums of literals and variables, the shape of a large data file) and
+reports how many bytes it holds per node, along with a list of that many
+numbers as VNumbers and as the evaluators pack it.
+
+usage: python bench_memory.py [-n NODES]
+"""
+
+## each element is three nodes: a Plus, a Literal and a Variable, all
+## typed with the shared Nat, as the parser makes them
+def build_tree(n : int) -> Expr:
+    return List([Plus(Literal(i, NAT_TYPE), Variable("x", NAT_TYPE)) for i in range(n // 3)], TList(NAT_TYPE))
+
+def build_values(n : int) -> VList:
+    return VList([VNumber(i, NAT_TYPE) for i in range(n)], TList(NAT_TYPE))
+
+## the same list as the evaluators keep it (see evaluating/vector.py)
+def build_packed(n : int) -> VList:
+    return pack_list(build_values(n).values, TList(NAT_TYPE))
+
+
+def measure(build, n : int) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    x = build(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del x
+    return after - before
+
+
+if __name__ == "__main__":
+    p = ArgumentParser()
+    p.add_argument('-n', type=int, default=1000000)
+    args = p.parse_args()
+    print(f"{'tree':<10} {'nodes':>8} {'MB':>8} {'bytes/node':>10}")
+    for name, build, nodes in [("expr", build_tree, args.n // 3 * 3 + 2), ("values", build_values, args.n + 2),
+                              ("packed", build_packed, args.n + 2)]:
+        size = measure(build, args.n)
+        print(f"{name:<10} {nodes:>8} {size / 2**20:>8.1f} {size / nodes:>10.0f}")
@@ -1,3 +1,6 @@
+from array import array as _array
+from operator import eq
+
 ###############################
 ## Errors
 ###############################
@@ -18,7 +21,42 @@ class AbsurdError(Exception):
 ##############################################
 
 
+## Nodes keep their fields in __slots__ rather than a __dict__. The
+## typed, normalized and interned marks share one int of flag bits.
+
+TYPED      = 1
+NORMALIZED = 2
+## set on the canonical copy of a normal form (see evaluating/hashcons.py)
+INTERNED   = 4
+CHECKED    = TYPED | NORMALIZED
+
+def _flag(bit : int) -> property:
+    def get(self) -> bool:
+        return self.flags & bit != 0
+    def set(self, on : bool):
+        self.flags = self.flags | bit if on else self.flags & ~bit
+    return property(get, set)
+
+## class -> the slots of it and its bases, in declaration order
+_SLOT_NAMES : dict[type, tuple[str]] = {}
+_MISSING = object()
+
+def slot_names(cls : type) -> tuple[str]:
+    names = _SLOT_NAMES.get(cls)
+    if names is None:
+        names = tuple([n for c in reversed(cls.__mro__) for n in c.__dict__.get('__slots__', ())
+                       if n != '__weakref__'])
+        _SLOT_NAMES[cls] = names
+    return names
+
+## (name, value) for each field set on a node, the slotted vars()
+def node_fields(x) -> list[tuple]:
+    return [(k, v) for k in slot_names(x.__class__) if (v := getattr(x, k, _MISSING)) is not _MISSING]
+
+
 class Value():
+    __slots__ = ('value', 'type')
+
     def __init__(self, v, ty):
         self.value = v
         self.type : Type = ty
@@ -26,35 +64,59 @@ class Value():
         return str(self.value)
 
 class Expr():
+    ## span: source location, filled in by the parser (see evaluating/lexer.py)
+    ## alpha_key: alpha hash kept on interned terms (see evaluating/equiv.py)
+    ## root_frame_size: set on top-level roots by the Resolver
+    __slots__ = ('type', 'flags', 'span', 'alpha_key', 'root_frame_size', '__weakref__')
+
     def __init__(self, type):
         self.type : Type = type
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return "Expr"
 
+    typed = _flag(TYPED)
+    normalized = _flag(NORMALIZED)
+    interned = _flag(INTERNED)
+
+    ## interning and alpha hashes only hold in the process that made them
+    def __getstate__(self):
+        state = {k : v for k, v in node_fields(self) if k != 'alpha_key'}
+        if 'flags' in state:
+            state['flags'] &= ~INTERNED
+        return None, state
+
 class Type(Expr):
+    __slots__ = ()
+
     def __init__(self):
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return "Type"
 
+## stands in for a type not known yet; shared, so never mutate it
+PLACEHOLDER : Type = Type()
+
 class Variable(Expr):
-    def __init__(self, v : str, t : Type=Type()):
+    ## (depth, index) address filled in by the Resolver; depth -1 is unbound
+    __slots__ = ('name', 'depth', 'index')
+
+    def __init__(self, v : str, t : Type=PLACEHOLDER):
         self.name = v
         self.type = t
-        self.typed = True
-        self.normalized = True
+        self.flags = CHECKED
+        self.depth = -1
+        self.index = -1
     def __str__(self):
         return f"(Var {self.name} : {self.type})"
 
 class Literal(Expr):
+    __slots__ = ('val',)
+
     def __init__(self, v, ty):
         self.val = v
         self.type : Type = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"(Literal {self.val})"
     
@@ -83,32 +145,241 @@ class Environment():
         e.vars = self.vars.copy()
         return e
     
+## Interpreter environments: one Frame per function call (plus one for
+## the globals and one per top-level expression). Variables are resolved
+## ahead of time to a (depth, index) address, so a lookup walks `depth`
+## parent links and indexes a slot, and capturing a closure is just
+## keeping a reference to the current Frame.
+class Frame():
+    __slots__ = ('slots', 'parent')
+
+    def __init__(self, size : int, parent=None):
+        self.slots : list[Value] = [None] * size
+        self.parent : Frame = parent
+
+    def __str__(self):
+        return ",".join([f"{v}\n" for v in self.slots if v is not None])
+
+    def lookup(self, x : Variable) -> Value:
+        depth = x.depth
+        if depth < 0:
+            raise UnboundVariable(x.name)
+        f = self
+        while depth > 0:
+            f = f.parent
+            depth -= 1
+        v = f.slots[x.index]
+        if v is None:
+            raise UnboundVariable(x.name)
+        return v
+
+    def bind(self, index : int, v : Value):
+        self.slots[index] = v
+
+############################
+## Persistent Maps
+############################
+
+## Hash array mapped trie: an immutable map where set() returns a new
+## map sharing all but O(log32 n) nodes with the old one.
+
+_HASH_MASK = (1 << 64) - 1
+
+class _Leaf():
+    __slots__ = ('hash', 'key', 'value')
+    def __init__(self, h : int, key, value):
+        self.hash = h
+        self.key = key
+        self.value = value
+
+## several keys whose full hashes are equal
+class _Collision():
+    __slots__ = ('hash', 'leaves')
+    def __init__(self, h : int, leaves : tuple):
+        self.hash = h
+        self.leaves = leaves
+
+class _Node():
+    __slots__ = ('bitmap', 'children')
+    def __init__(self, bitmap : int, children : tuple):
+        self.bitmap = bitmap
+        self.children = children
+
+def _merge(shift : int, a, b):
+    ia = (a.hash >> shift) & 31
+    ib = (b.hash >> shift) & 31
+    if ia == ib:
+        return _Node(1 << ia, (_merge(shift + 5, a, b),))
+    if ia < ib:
+        return _Node((1 << ia) | (1 << ib), (a, b))
+    return _Node((1 << ia) | (1 << ib), (b, a))
+
+## returns the new node, and whether the key was not already present
+def _set(node, shift : int, leaf : _Leaf):
+    if type(node) is _Node:
+        bit = 1 << ((leaf.hash >> shift) & 31)
+        i = (node.bitmap & (bit - 1)).bit_count()
+        cs = node.children
+        if not (node.bitmap & bit):
+            return _Node(node.bitmap | bit, cs[:i] + (leaf,) + cs[i:]), True
+        child, added = _set(cs[i], shift + 5, leaf)
+        return _Node(node.bitmap, cs[:i] + (child,) + cs[i+1:]), added
+    if node.hash != leaf.hash:
+        return _merge(shift, node, leaf), True
+    if type(node) is _Leaf:
+        if node.key == leaf.key:
+            return leaf, False
+        return _Collision(leaf.hash, (leaf, node)), True
+    rest = tuple(l for l in node.leaves if l.key != leaf.key)
+    return _Collision(leaf.hash, (leaf,) + rest), len(rest) == len(node.leaves)
+
+def _leaves(node):
+    if isinstance(node, _Node):
+        for c in node.children:
+            yield from _leaves(c)
+    elif isinstance(node, _Collision):
+        yield from node.leaves
+    else:
+        yield node
+
+class PMap():
+    def __init__(self, root=None, size : int=0):
+        self.root = root if root is not None else _Node(0, ())
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def get(self, key, default=None):
+        h = hash(key) & _HASH_MASK
+        node = self.root
+        shift = 0
+        while type(node) is _Node:
+            bit = 1 << ((h >> shift) & 31)
+            if not (node.bitmap & bit):
+                return default
+            node = node.children[(node.bitmap & (bit - 1)).bit_count()]
+            shift += 5
+        if node.hash != h:
+            return default
+        if type(node) is _Leaf:
+            return node.value if node.key == key else default
+        for l in node.leaves:
+            if l.key == key:
+                return l.value
+        return default
+
+    def set(self, key, value):
+        root, added = _set(self.root, 0, _Leaf(hash(key) & _HASH_MASK, key, value))
+        return PMap(root, self.size + 1 if added else self.size)
+
+    def items(self):
+        for l in _leaves(self.root):
+            yield l.key, l.value
+
+############################
+## Persistent Lists
+############################
+
+## An immutable sequence viewing buf[start:end]. Slicing gives another
+## view of the same buffer, so dropping the head of a list is O(1).
+## Appending copies, except onto a view that ends where its buffer
+## ends: no other view can see past its own end, so that buffer is
+## extended in place and appending one element is O(1) amortized.
+## Only buffers a PList made itself (owned) are ever extended; a list
+## wrapped from elsewhere, like a literal's, is copied first.
+class PList():
+    __slots__ = ('buf', 'start', 'end', 'owned')
+
+    def __init__(self, buf, start : int=0, end : int=None, owned : bool=False):
+        self.buf = buf
+        self.start = start
+        self.end = len(buf) if end is None else end
+        self.owned = owned
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        return map(self.buf.__getitem__, range(self.start, self.end))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return list(self)[i]
+            return PList(self.buf, self.start + start, self.start + max(start, stop), self.owned)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("PList index out of range")
+        return self.buf[self.start + i]
+
+    def __contains__(self, x):
+        try:
+            self.buf.index(x, self.start, self.end)
+            return True
+        except ValueError:
+            return False
+
+    ## other's items in a form buf can be extended with, or None
+    def tail(self, other):
+        if isinstance(self.buf, list):
+            return other
+        try:
+            return _array(self.buf.typecode, other)
+        except (OverflowError, TypeError):
+            return None
+
+    def __add__(self, other) -> 'PList':
+        tail = self.tail(other)
+        if tail is None:
+            return PList(list(self) + list(other), owned=True)
+        if self.owned and self.end == len(self.buf):
+            self.buf.extend(tail)
+            return PList(self.buf, self.start, len(self.buf), True)
+        buf = self.buf[self.start:self.end]
+        buf.extend(tail)
+        return PList(buf, owned=True)
+
+    def __eq__(self, other):
+        if isinstance(other, (PList, list, tuple)):
+            return len(self) == len(other) and all(map(eq, self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PList({list(self)})"
+
+## xs as a PList, without copying
+def plist(xs) -> PList:
+    return xs if isinstance(xs, PList) else PList(xs)
+
 ############################
 ## Contexts
 ############################
 
 
 ## associates variables
-## to normalized and typechecked expressions
+## to normalized and typechecked expressions.
+## Contexts are persistent: extend returns a new Context that shares
+## structure with this one, so binders never copy the context.
 class Context():
-    def __init__(self):
-        self.vars : list[(Variable, Expr)]= []
+    def __init__(self, vars : PMap=None):
+        self.vars : PMap = vars if vars is not None else PMap()
 
     def __str__(self):
-        return ",".join([f"{e[0]} : {e[1]}\n" for e in self.vars])
+        return ",".join([f"{e[0]} : {e[1]}\n" for _, e in self.vars.items()])
     
     def lookup(self, x : str) -> (Type, Expr):
-        for y, e in self.vars:
-            if y.name == x:
-                assert e.normalized and e.typed
-                return e
-        raise UnboundVariable(x)
+        entry = self.vars.get(x)
+        if entry is None:
+            raise UnboundVariable(x)
+        e = entry[1]
+        assert e.normalized and e.typed
+        return e
     
     def extend(self, var : Variable, e : Expr):
         assert e.normalized and e.typed
-        self.vars = [(var, e)] + self.vars
-    
-    def copy(self):
-        e = Context()
-        e.vars = self.vars.copy()
-        return e
\ No newline at end of file
+        return Context(self.vars.set(var.name, (var, e)))
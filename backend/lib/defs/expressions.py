@@ -16,29 +16,38 @@ except:
 
 
 class ENothing():
-    def __init__(self, type : Type=Type()):
+    __slots__ = ('type', 'flags', 'span', 'alpha_key', 'root_frame_size', '__weakref__')
+
+    def __init__(self, type : Type=PLACEHOLDER):
         self.type : Type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return "nothing"
 
+    typed = Expr.typed
+    normalized = Expr.normalized
+    interned = Expr.interned
+    __getstate__ = Expr.__getstate__
+
 class QED(Expr):
+    __slots__ = ()
+
     def __init__(self):
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return "QED"
     
 class Let(Expr):
+    ## slot: the Frame slot the Resolver gives the bound variable
+    __slots__ = ('var', 'bind', 'body', 'slot')
+
     def __init__(self, var : Variable, bind : Expr, b : Expr):
         self.var = var
         self.bind = bind
         self.body = b
         self.type = b.type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
 
     def __str__(self):
@@ -46,6 +55,9 @@ class Let(Expr):
 
 
 class Lambda(Expr):
+    ## frame_size: slots its Frame needs, set by the Resolver
+    __slots__ = ('var', 'body', 'frame_size')
+
     def __init__(self, vars : [Variable], body : Expr):
         self.var : Variable = vars[0]
         if len(vars) > 1:
@@ -53,27 +65,28 @@ class Lambda(Expr):
         else:
             self.body : Expr = body
         self.type = TForAll(vars[0], self.body.type)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
         # print(f"Constructed a lambda {self} with {self.type}")
     def __str__(self):
         return f"(lambda {self.var} : {self.body})"
 
 class Application(Expr):
+    __slots__ = ('operator', 'operand')
+
     def __init__(self, rator : Expr, rand : Expr):
         self.operator : Expr = rator
         self.operand : Expr = rand
         self.type : Type = rator.type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     
     def __str__(self):
         return f"({self.operator} {self.operand})"
 
 class PrintThen(Expr):
+    __slots__ = ('message', 'body')
+
     def __init__(self, message : str, e : Expr):
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
         self.message : str = message
         self.body : Expr = e
         self.type = e.type
@@ -86,57 +99,68 @@ class PrintThen(Expr):
 ##############################
 
 class Plus(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
         self.type = merge_numeric_types(e1.type, e2.type)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"({self.e1} + {self.e2})"
     
 class Max(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
         self.type = merge_numeric_types(e1.type, e2.type)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"(max {self.e1}, {self.e2})"
 
 class Min(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
         self.type = merge_numeric_types(e1.type, e2.type)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"(min {self.e1}, {self.e2})"
 
 class Times(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
         self.type : Type = merge_numeric_types(e1.type, e2.type)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"({self.e1} * {self.e2})"
 
 class Divide(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
+        self.type : Type = RATIONAL_TYPE
+        self.flags = 0
     def __str__(self):
         return f"({self.e1} / {self.e2})"
 
 class Mod(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type : Expr = TNat()
+        self.type : Expr = NAT_TYPE
+        self.flags = 0
     def __str__(self):
         return f"({self.e1} % {self.e2})"
 
@@ -146,55 +170,60 @@ class Mod(Expr):
 ##############################
 
 class If(Expr):
-    def __init__(self, condition : Expr, consequent : Expr, else_expr : Expr, ty : Type=Type()):
+    __slots__ = ('test', 'consequent', 'else_expr')
+
+    def __init__(self, condition : Expr, consequent : Expr, else_expr : Expr, ty : Type=PLACEHOLDER):
         self.test : Expr = condition
         self.consequent : Expr = consequent
         self.else_expr : Expr = else_expr
         self.type : Type = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     
     def __str__(self):
         return f"(if {self.test} then {self.consequent} else {self.else_expr})"
 
 class Or(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type : Type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = BOOLEAN_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"({self.e1} or {self.e2})"
 
 class And(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type : Type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = BOOLEAN_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"({self.e1} and {self.e2})"
 
 class Not(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = BOOLEAN_TYPE
+        self.flags = 0
     def __str__(self):
         return f"(not {self.e1})"
 
 class Equal(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type : Type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = BOOLEAN_TYPE
+        self.flags = 0
     
     def __str__(self):
         return f"({self.e1} == {self.e2})"
@@ -204,23 +233,25 @@ class Equal(Expr):
 ##############################
 
 class Concat(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type = TString()
-        self.normalized = False
-        self.typed = False
+        self.type = STRING_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"({self.e1} ++ {self.e2})"
 
 class Contains(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
-        self.type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type = BOOLEAN_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"({self.e1} in {self.e2})"
@@ -231,22 +262,24 @@ class Contains(Expr):
 ##############################
 
 class Append(Expr):
+    __slots__ = ('e1', 'e2')
+
     def __init__(self, e1 : Expr, e2 : Expr, ty : Type):
         self.e1 : Expr = e1
         self.e2 : Expr = e2
         self.type : Type = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"({self.e1} + {self.e2})"
 
 class Empty(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = BOOLEAN_TYPE
+        self.flags = 0
     
     def __str__(self):
         return f"(empty {self.e1})"
@@ -254,32 +287,37 @@ class Empty(Expr):
 
 
 class Length(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type = TNat()
+        self.type = NAT_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"(length {self.e1})"
 
 class Member(Expr):
+    __slots__ = ('value', 'list')
+
     def __init__(self, e1 :Expr, e2 : Expr):
 
         self.value = e1
         self.list = e2
-        self.type = TBoolean()
-        self.normalized = False
-        self.typed = False
+        self.type = BOOLEAN_TYPE
+        self.flags = 0
 
     def __str__(self):
         return f"({self.value} in {self.list})"
     
 class List(Expr):
-    def __init__(self, es  : list[Expr], type : Type=TList(Type())):
+    __slots__ = ('values',)
+
+    def __init__(self, es  : list[Expr], type : Type=TList(PLACEHOLDER)):
 
         self.values : list[Expr] = es
         self.type : Type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     
     def __str__(self):
         return "(List: [" + ",".join([str(v) for v in self.values]) + "])"
@@ -289,11 +327,12 @@ class List(Expr):
 #####################
 
 class Just(Expr):
-    def __init__(self, e1 : Expr, ty : Type=Type()):
+    __slots__ = ('e1',)
+
+    def __init__(self, e1 : Expr, ty : Type=PLACEHOLDER):
         self.e1 : Expr = e1
         self.type = TMaybe(ty)
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"(just {self.e1})"
@@ -303,106 +342,116 @@ class Just(Expr):
 #####################
 
 class Induct(Expr):
-    def __init__(self, arg : Expr, out_type : Expr, base : Expr, inds : [Expr], type : Type=Type()):
+    __slots__ = ('arg', 'out_type', 'base', 'inds')
+
+    def __init__(self, arg : Expr, out_type : Expr, base : Expr, inds : [Expr], type : Type=PLACEHOLDER):
         self.arg : Expr = arg
         self.out_type : Type = out_type
         self.base : Expr = base
         self.inds : [Expr] = inds
         self.type : Type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"(induct {self.arg} : {self.type} -> {self.out_type})"
 
 class Refl(Expr):
+    __slots__ = ('val',)
+
     def __init__(self, val : Expr, ty : Type):
         self.val : Expr = val
         self.type : Type = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"(same {self.val})"
 
 class Symm(Expr):
+    __slots__ = ('body', 'ty')
+
     def __init__(self, e : Expr, ty : TEqual):
         self.body = e
         self.ty : TEqual = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"(symm {self.body})"
     
 class Trans(Expr):
+    __slots__ = ('e1', 'e2', 'ty')
+
     def __init__(self, e1 : Expr, e2 : Expr, ty : TEqual):
         self.e1 = e1
         self.e2 = e2
         self.ty = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"(trans {self.e1} = {self.e2})"
     
 class Cong(Expr):
+    __slots__ = ('fn', 'e1', 'ty')
+
     def __init__(self, f : Expr, e : Expr, ty : TEqual):
         self.fn = f
         self.e1 = e
         self.ty = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
 
     def __str__(self):
         return f"(cong {self.fn} {self.e1})"
 
 class Look(Expr):
+    __slots__ = ('element', 'proof')
+
     def __init__(self, e : Expr, proof : Expr, type : Type):
         self.element : Expr = e
         self.proof : Expr = proof
         self.type : Type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     
     def __str__(self):
         return f"(look {self.element} : {self.proof})"
 
 class Car(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = Type()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = PLACEHOLDER
+        self.flags = 0
     
     def __str__(self):
         return f"(car {self.e1})"
     
 class Cdr(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = Type()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = PLACEHOLDER
+        self.flags = 0
     
     def __str__(self):
         return f"(cdr {self.e1})"
     
 class Left(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = Type()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = PLACEHOLDER
+        self.flags = 0
     
     def __str__(self):
         return f"(left {self.e1})"
 
 class Right(Expr):
+    __slots__ = ('e1',)
+
     def __init__(self, e1 : Expr):
         self.e1 : Expr = e1
-        self.type : Type = Type()
-        self.normalized = False
-        self.typed = False
+        self.type : Type = PLACEHOLDER
+        self.flags = 0
     
     def __str__(self):
         return f"(right {self.e1})"
@@ -412,27 +461,37 @@ class Right(Expr):
 ####################
 
 class Def(Expr):
-    pass
+    ## slot: the global Frame slot the Resolver gives the definition
+    __slots__ = ('slot',)
 
 class Defunc(Def):
+    __slots__ = ('var', 'body')
+
     def __init__(self, var : Variable, body : Expr):
         self.var : Variable = var
         self.body : Expr = body
+        self.flags = 0
 
     def __str__(self):
         return f"(defunc {self.var} : {self.body})"
 
 class Defconst(Def):
+    __slots__ = ('var', 'body')
+
     def __init__(self, var : Variable, e : Expr):
         self.var : str = var
         self.body : Expr = e
+        self.flags = 0
 
     def __str__(self):
         return f"(defconst {self.var} : {self.body})"
     
 class Defrel(Def):
+    __slots__ = ('var', 'body')
+
     def __init__(self, var : Variable, e : Expr):
         self.var : Variable = var
         self.body : Expr = e
+        self.flags = 0
     def __str__(self):
         return f"(defrel {self.var} {self.body})"
\ No newline at end of file
@@ -7,7 +7,7 @@ PREFIX = ['induct', 'not', 'let', 'if', 'lambda', 'print', 'return', 'just', 'ca
 
 ## Types
 TYPES = ['Absurd', 'Rational', 'Int', 'Nat', 'String', 'Boolean', 'Bool',
-         'Maybe', 'List',
+         'Maybe', 'List', 'Plate',
          'Universe', 'Equal', 'Exists', 'Forall']
 
 ## definition keywords
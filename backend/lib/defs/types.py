@@ -7,80 +7,117 @@ except:
 ##########################
 
 class TBoolean(Type):
-    def __init__(self, type=Type()):
+    __slots__ = ()
+
+    def __init__(self, type=PLACEHOLDER):
         self.type = type
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return "Boolean"
 
 class TNum(Type):
-    def __init__(self, type=Type()):
+    __slots__ = ()
+
+    def __init__(self, type=PLACEHOLDER):
         self.type = type
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return "Num"
 
 class TRational(TNum):
+    __slots__ = ()
+
     def __str__(self):
         return "Rational"
 
 class TInt(TRational):
+    __slots__ = ()
+
     def __str__(self):
         return "Int"
 
 class TNat(TInt):
+    __slots__ = ()
+
     def __str__(self):
         return "Nat"
     
 class TString(Type):
-    def __init__(self, type=Type()):
+    __slots__ = ()
+
+    def __init__(self, type=PLACEHOLDER):
         self.type = type
-        self.typed = True
-        self.normalized = True
+        self.flags = CHECKED
     def __str__(self):
         return "String"
+
+## Shared instances of the base types, used instead of building new
+## ones. Like hash-consed terms (see evaluating/hashcons.py) they are
+## marked interned and must never be mutated: make a new node instead.
+def _shared(t : Type) -> Type:
+    t.flags |= INTERNED
+    return t
+
+BOOLEAN_TYPE  : TBoolean  = _shared(TBoolean())
+RATIONAL_TYPE : TRational = _shared(TRational())
+INT_TYPE      : TInt      = _shared(TInt())
+NAT_TYPE      : TNat      = _shared(TNat())
+STRING_TYPE   : TString   = _shared(TString())
     
 
     
 def merge_numeric_types(t1, t2):
     if isinstance(t1, TNat) and isinstance(t2, TNat):
-        return TNat()
-    elif (not isinstance(t1, TRational)) and (not isinstance(t2, TRational)):
-        return TInt()
+        return NAT_TYPE
+    elif isinstance(t1, TInt) and isinstance(t2, TInt):
+        return INT_TYPE
     else:
-        return TRational()
+        return RATIONAL_TYPE
         
 ##########################
 ## Polymorphic Types
 ##########################
 
 class TList(Type):
-    def __init__(self, con_ty, ty=Type()):
+    __slots__ = ('contents',)
+
+    def __init__(self, con_ty, ty=PLACEHOLDER):
         self.contents : Type = con_ty
         self.type : Type = ty
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f"List[{self.contents}]"
 
+## a Plate: an n-dimensional array of numbers shared by reference
+## between processes (see evaluating/plates.py)
+class TPlate(Type):
+    __slots__ = ('contents',)
+
+    def __init__(self, con_ty, ty=PLACEHOLDER):
+        self.contents : Type = con_ty
+        self.type : Type = ty
+        self.flags = 0
+    def __str__(self):
+        return f"Plate[{self.contents}]"
+
 class TMaybe(Type):
-    def __init__(self, subtype, ty=Type()):
+    __slots__ = ('subtype',)
+
+    def __init__(self, subtype, ty=PLACEHOLDER):
         self.subtype : Type = subtype
         self.type  : Type = ty
-        self.typed = False
-        self.normalized = False
+        self.flags = 0
     def __str__(self):
         return f"Maybe[{self.type}]"
 
 class TFunction(Type):
-    def __init__(self, tin : Variable, out : Type=Type(), type=Type()):
+    __slots__ = ('input', 'output')
+
+    def __init__(self, tin : Variable, out : Type=PLACEHOLDER, type=PLACEHOLDER):
         self.input : Variable = tin
         self.output : Type = out
         self.type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     
     def __str__(self):
         return f"({self.input} -> {self.output})"
@@ -105,50 +142,69 @@ def Multi_Arg_Function(ins : list[Variable], out : Type) -> TFunction:
 ##########################
 
 class TEither(Type):
-    def __init__(self, left, right, type=Type()):
+    __slots__ = ('left', 'right')
+
+    def __init__(self, left, right, type=PLACEHOLDER):
         self.left = left
         self.right = right
         self.type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return "Either"
     
 class TUniverse(Type):
-    def __init__(self, n : Expr, type=Type()):
+    __slots__ = ('level',)
+
+    def __init__(self, n : Expr, type=PLACEHOLDER):
         self.level : Expr = n
         self.type = type
-        self.normalized = False
-        self.typed = False
+        self.flags = 0
     def __str__(self):
         return f'(Universe {self.level})'
 
+## the type of the base types, already in normal form
+UNIVERSE0 : TUniverse = TUniverse(Literal(0, NAT_TYPE))
+UNIVERSE0.level.flags = CHECKED | INTERNED
+UNIVERSE0.flags = CHECKED | INTERNED
+
 class TEqual(Type):
+    __slots__ = ('lhs', 'rhs')
+
     def __init__(self, ty : Type, e1 : Expr, e2 : Expr):
         self.type = ty
         self.lhs = e1
         self.rhs = e2
+        self.flags = 0
     def __str__(self):
         return f'(Equal {self.lhs} {self.rhs})'
 
 class TExists(Type):
+    __slots__ = ('var', 'var_type', 'prop')
+
     def __init__(self, x : str, x_ty : Type, p : Type):
         self.var = x
         self.var_type = x_ty
         self.prop = p
+        self.flags = 0
     def __str__(self):
         return f'(Exists {self.var} {self.prop})'
 
 class TForAll(Type):
-    def __init__(self, var : Variable, p : Type, ty=TUniverse(Literal(0, TNat()))):
+    __slots__ = ('input', 'output')
+
+    def __init__(self, var : Variable, p : Type, ty=UNIVERSE0):
         self.input : Variable = var
         self.output : Type = p
         self.type : Type = ty
+        self.flags = 0
     def __str__(self):
-        return f"ForAll {self.var} : {self.prop}"
+        return f"ForAll {self.input} : {self.output}"
 
 class TAbsurd(Type):
-    def __init__(self, type=Type()):
+    __slots__ = ()
+
+    def __init__(self, type=PLACEHOLDER):
         self.type = type
+        self.flags = 0
     def __str__(self):
         return f'Absurd'
\ No newline at end of file
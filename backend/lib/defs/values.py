@@ -12,10 +12,14 @@ except:
 ################################
 
 class VNothing(Value):
-    def __init__(self, type : Type = TMaybe(Type())):
+    __slots__ = ()
+
+    def __init__(self, type : Type = TMaybe(PLACEHOLDER)):
         self.type : Type = type
 
 class VNumber(Value):
+    __slots__ = ()
+
     def __init__(self, v, ty : Type):
         self.value = v
         self.type : Type = ty
@@ -23,14 +27,18 @@ class VNumber(Value):
         return str(self.value)
 
 class VBoolean(Value):
-    def __init__(self, v, type : Type=TBoolean()):
+    __slots__ = ()
+
+    def __init__(self, v, type : Type=BOOLEAN_TYPE):
         self.value : bool = v
         self.type : Type = type
 
 class VString(Value):
+    __slots__ = ()
+
     def __init__(self, v, ):
         self.value : str = v
-        self.type : Type = TString()
+        self.type : Type = STRING_TYPE
 
 
 ################################
@@ -38,38 +46,96 @@ class VString(Value):
 ################################
 
 class VList(Value):
+    __slots__ = ('values',)
+
     def __init__(self, v, ty : Type):
         self.values : list[Value] = v
         self.type : Type = ty
     def __str__(self):
         return f"{[str(e) for e in self.values]}"
+    def length(self) -> int:
+        return len(self.values)
+
+## A list of numbers kept in one buffer rather than as a VNumber each
+## (see evaluating/vector.py): data is an array of machine ints when
+## every element fits in one, and a list of ints and Fractions
+## otherwise. values builds the VNumbers, for code that wants them.
+class VNumList(VList):
+    __slots__ = ('data', 'elem')
+
+    def __init__(self, data, ty : Type, elem : Type):
+        self.data = data
+        self.type : Type = ty
+        self.elem : Type = elem
+
+    @property
+    def values(self) -> list[Value]:
+        return [VNumber(x, self.elem) for x in self.data]
+
+    ## values is computed, so it isn't part of the pickled state
+    def __getstate__(self):
+        return None, {'data' : self.data, 'type' : self.type, 'elem' : self.elem}
+
+    def __str__(self):
+        return f"{[str(x) for x in self.data]}"
+    def length(self) -> int:
+        return len(self.data)
+
+## value is the SharedPlate (evaluating/plates.py); copying or pickling
+## a VPlate shares the Plate rather than its elements
+class VPlate(Value):
+    __slots__ = ()
+
+    def __init__(self, plate, ty : Type):
+        self.value = plate
+        self.type : Type = ty
+    def __str__(self):
+        return f"Plate{list(self.value.shape)}"
 
 class VJust(Value):
+    __slots__ = ('ty',)
+
     def __init__(self, v, ty : Type):
         self.value = v
         self.ty : Type = TMaybe(ty)
 
 
-## Used for both Lambdas and ForAlls
+## Used for both Lambdas and ForAlls.
+## code is the compiled body when the closure was made by the Compiler
 class Closure(Value):
-    def __init__(self, x : Variable, env : Environment, body : Expr):
+    __slots__ = ('var', 'env', 'body', 'frame_size', 'code')
+
+    def __init__(self, x : Variable, env : Frame, body : Expr, frame_size : int=1, code=None):
         self.var : Variable = x
-        self.env : Environment = env
+        self.env : Frame = env
         self.body : Expr = body
+        self.frame_size : int = frame_size
+        self.code = code
+
+    ## compiled code can't be pickled, e.g. to send a closure between
+    ## processes; the Interpreter can still apply one without it
+    def __getstate__(self):
+        return None, dict(node_fields(self), code=None)
 
     def __str__(self):
         return f"(Closure {self.var} : {self.body})"
 
 class U(Value):
+    __slots__ = ()
+
     def __init__(self, level):
         self.value = level
         self.type : Type = TUniverse(level+1)
 
 class Proof(Value):
+    __slots__ = ('val',)
+
     def __init__(self, v1 : Value):
         self.val : Value = v1
 
 class Absurd(Value):
+    __slots__ = ()
+
     def __init__(self):
         raise AbsurdError
 
@@ -86,3 +152,8 @@ CONSTANTS = [
     true, false
     ]
 
+## the shared boolean value for b; the Interpreter never builds another
+def to_boolean(b : bool) -> VBoolean:
+    return true if b else false
+
+
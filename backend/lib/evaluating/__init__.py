@@ -1,8 +1,38 @@
 try:
+    from .lexer import *
+    from .tracing import *
+    from .resolve import *
+    from .vector import *
+    from .rational import *
     from .interp import *
+    from .compile import *
+    from .machine import *
     from .parse import *
+    from .equiv import *
+    from .hashcons import *
     from .nbe import *
+    from .codegen import *
+    from .incremental import *
+    from .codec import *
+    from .cache import *
+    from .profiler import *
+    from .plates import *
 except:
+    from lexer import *
+    from tracing import *
+    from resolve import *
+    from vector import *
+    from rational import *
     from interp import *
+    from compile import *
+    from machine import *
     from parse import *
-    from nbe import *
\ No newline at end of file
+    from equiv import *
+    from hashcons import *
+    from nbe import *
+    from codegen import *
+    from incremental import *
+    from codec import *
+    from cache import *
+    from profiler import *
+    from plates import *
\ No newline at end of file
@@ -0,0 +1,115 @@
+import gc
+import os
+import sys
+import mmap
+from glob import glob as _glob
+from tempfile import NamedTemporaryFile
+
+try:
+    from ..defs import *
+    from .parse import Parser
+    from .incremental import IncrementalChecker, content_hash
+    from .codec import Encoder, Decoder
+except:
+    from defs import *
+    from parse import Parser
+    from incremental import IncrementalChecker, content_hash
+    from codec import Encoder, Decoder
+
+"""
+On-disk cache of parsed and normalized modules.
+
+A module is saved once per source text: the items parse_file gives for
+it and, when asked for, their normal forms. The file is named by a hash
+of the source and of the implementation that produced it (the source
+of lib/ and the Python version), so editing either the program or the
+interpreter makes a fresh entry instead of reusing a stale one.
+Entries are in the format of codec.py and are decoded straight out of
+a memory map of the file. A missing or unreadable entry is rebuilt and
+written again, so deleting the directory is always safe.
+"""
+
+## bumped when the layout of an entry changes
+FORMAT_VERSION = 3
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "plate")
+
+_LIB = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPLEMENTATION = None
+
+
+## hash of everything that decides what a cache entry contains
+def implementation_hash() -> str:
+    global _IMPLEMENTATION
+    if _IMPLEMENTATION is None:
+        parts = [str(FORMAT_VERSION), sys.version]
+        for f in sorted(_glob(os.path.join(_LIB, "**", "*.py"), recursive=True)):
+            with open(f, "r") as src:
+                parts.append(src.read())
+        _IMPLEMENTATION = content_hash(*parts)
+    return _IMPLEMENTATION
+
+
+class ModuleCache():
+    def __init__(self, path : str=DEFAULT_DIR):
+        self.path : str = path
+
+    def entry(self, source : str) -> str:
+        return os.path.join(self.path, content_hash(source, implementation_hash()) + ".plc")
+
+    ## the top-level items of source, as Parser.parse_file gives them
+    def parse(self, source : str) -> list[Expr]:
+        return self.module(source, False)["items"]
+
+    ## their normal forms, as IncrementalChecker.check gives them
+    def normalize(self, source : str) -> list[Expr]:
+        return self.module(source, True)["normal"]
+
+    def module(self, source : str, normal : bool) -> dict:
+        mod = self.load(source)
+        if mod is not None and (mod["normal"] is not None or not normal):
+            return mod
+        if mod is None:
+            mod = {"items" : Parser(source).parse_file(), "normal" : None}
+        if normal:
+            ## parse apart from the cached items: the checker keeps its own
+            mod["normal"] = IncrementalChecker().check(source)
+        self.store(source, mod)
+        return mod
+
+    def load(self, source : str) -> dict:
+        ## a module is many small objects and none of them cycles: the
+        ## collector only slows building them (by about 5x)
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.entry(source), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    d = Decoder(m)
+                    try:
+                        items, normal = d
+                    finally:
+                        d.data.release()
+                    return {"items" : items, "normal" : normal}
+        except Exception:
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+
+    ## writes to a temporary file first, so a reader never sees half an entry
+    def store(self, source : str, mod : dict):
+        ## the cache is only an optimization: failing to write it is fine
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            f = NamedTemporaryFile("wb", dir=self.path, delete=False)
+        except OSError:
+            return
+        try:
+            with f:
+                e = Encoder(f)
+                e.write(mod["items"])
+                e.write(mod["normal"])
+            os.replace(f.name, self.entry(source))
+        except (OSError, CompileError, RecursionError):
+            os.unlink(f.name)
@@ -0,0 +1,316 @@
+import builtins
+import struct
+from io import BytesIO
+from fractions import Fraction
+
+try:
+    from ..defs import *
+    from .lexer import Span, SourceMap
+    from .nbe import NbEError
+except:
+    from defs import *
+    from lexer import Span, SourceMap
+    from nbe import NbEError
+
+"""
+Compact binary encoding of Plate terms.
+
+A stream is a header (MAGIC and FORMAT_VERSION) followed by any number
+of values, each one tag byte and then its payload:
+
+   NONE, TRUE, FALSE
+   INT       zigzag varint
+   FRACTION  two INT payloads, numerator and denominator
+   FLOAT     8 byte IEEE double
+   STR       varint byte length, then UTF-8; numbered as it is written
+   STR_REF   varint number of an earlier STR
+   LIST      varint length, then that many values
+   NODE      varint number of an earlier SHAPE, then a value for each
+             of its fields; numbered as it is written
+   SHAPE     a class name and its field names (STR or STR_REF each,
+             after a varint field count), taking the next shape number,
+             then a NODE payload for that shape
+   NODE_REF  varint number of an earlier NODE
+   ERROR     a STR naming an exception class, then its args as a LIST
+   SINGLETON varint index into SINGLETONS, the process-wide shared
+             nodes, which decode to the same objects
+
+Numbering runs across the whole stream, so a string, a node layout or a
+subterm shared by several values (as hash-consed terms are) is written
+once. Nodes are Exprs, Values, Spans and SourceMaps, rebuilt by filling
+in their slots, not by calling __init__.
+
+Encoder writes each value to its output as soon as it is given one;
+Decoder reads straight from a memoryview of its input (bytes, a
+bytearray or an mmap) and yields values one at a time.
+"""
+
+MAGIC = b"PLTB"
+FORMAT_VERSION = 2
+
+NONE, TRUE, FALSE, INT, FRACTION, FLOAT, STR, STR_REF, LIST, NODE, SHAPE, NODE_REF, ERROR, SINGLETON = range(14)
+
+## fields that only hold in the process that set them (as does the
+## INTERNED bit of flags, cleared on writing)
+_TRANSIENT = ('alpha_key',)
+
+
+## nodes every process shares, so identity checks and hash-consing
+## against them keep working on decoded terms; only ever append
+SINGLETONS : list = [NAT_TYPE, INT_TYPE, RATIONAL_TYPE, STRING_TYPE, BOOLEAN_TYPE,
+                     UNIVERSE0, PLACEHOLDER, true, false, nothing]
+_SINGLETON_INDEX : dict[int, int] = {id(v) : i for i, v in enumerate(SINGLETONS)}
+
+
+class DecodeError(Exception):
+    pass
+
+
+def _registry(base : type, extra : list[type]) -> dict[str, type]:
+    found = {c.__name__ : c for c in globals().values() if isinstance(c, type) and issubclass(c, base)}
+    found.update({c.__name__ : c for c in extra})
+    return found
+
+## the classes a stream may name
+NODES : dict[str, type] = _registry((Expr, Value), [ENothing, Span, SourceMap])
+ERRORS : dict[str, type] = {**{n : c for n, c in vars(builtins).items() if isinstance(c, type) and issubclass(c, Exception)},
+                            **_registry(Exception, [NbEError])}
+
+
+class Encoder():
+    def __init__(self, out):
+        ## out: anything with write(bytes)
+        self.out = out
+        self.buf = bytearray()
+        self.strings : dict[str, int] = {}
+        ## (class, field names) -> shape number
+        self.shapes : dict[tuple, int] = {}
+        ## id(node) -> number; nodes are kept so their ids stay unique
+        self.nodes : dict[int, int] = {}
+        self.kept : list = []
+        self.buf += MAGIC
+        self.varint(FORMAT_VERSION)
+        self.flush()
+
+    def write(self, v):
+        self.value(v)
+        self.flush()
+
+    def flush(self):
+        self.out.write(self.buf)
+        self.buf = bytearray()
+
+    def varint(self, n : int):
+        while n > 0x7f:
+            self.buf.append((n & 0x7f) | 0x80)
+            n >>= 7
+        self.buf.append(n)
+
+    def int(self, n : int):
+        self.varint(n << 1 if n >= 0 else ((-n) << 1) - 1)
+
+    def string(self, s : str):
+        i = self.strings.get(s)
+        if i is not None:
+            self.buf.append(STR_REF)
+            self.varint(i)
+            return
+        self.strings[s] = len(self.strings)
+        data = s.encode()
+        self.buf.append(STR)
+        self.varint(len(data))
+        self.buf += data
+
+    def value(self, v):
+        ## bool before int: True is an int too
+        if v is None:
+            self.buf.append(NONE)
+        elif v is True:
+            self.buf.append(TRUE)
+        elif v is False:
+            self.buf.append(FALSE)
+        elif isinstance(v, int):
+            self.buf.append(INT)
+            self.int(v)
+        elif isinstance(v, Fraction):
+            self.buf.append(FRACTION)
+            self.int(v.numerator)
+            self.int(v.denominator)
+        elif isinstance(v, float):
+            self.buf.append(FLOAT)
+            self.buf += struct.pack("<d", v)
+        elif isinstance(v, str):
+            self.string(v)
+        elif isinstance(v, (list, tuple, PList)):
+            self.buf.append(LIST)
+            self.varint(len(v))
+            for x in v:
+                self.value(x)
+        elif isinstance(v, BaseException):
+            if ERRORS.get(v.__class__.__name__) is not v.__class__:
+                raise CompileError(f"Cannot encode exception {v.__class__.__name__}")
+            self.buf.append(ERROR)
+            self.string(v.__class__.__name__)
+            self.value([a if isinstance(a, (int, str)) else str(a) for a in v.args])
+        else:
+            self.node(v)
+
+    def node(self, v):
+        i = _SINGLETON_INDEX.get(id(v))
+        if i is not None:
+            self.buf.append(SINGLETON)
+            self.varint(i)
+            return
+        i = self.nodes.get(id(v))
+        if i is not None:
+            self.buf.append(NODE_REF)
+            self.varint(i)
+            return
+        cls = v.__class__
+        if NODES.get(cls.__name__) is not cls:
+            raise CompileError(f"Cannot encode {cls.__name__}: {v}")
+        self.nodes[id(v)] = len(self.nodes)
+        self.kept.append(v)
+        fields = [(k, x & ~INTERNED if k == 'flags' else x) for k, x in node_fields(v) if k not in _TRANSIENT]
+        shape = (cls, tuple([k for k, _ in fields]))
+        n = self.shapes.get(shape)
+        if n is None:
+            self.shapes[shape] = len(self.shapes)
+            self.buf.append(SHAPE)
+            self.string(cls.__name__)
+            self.varint(len(fields))
+            for k, _ in fields:
+                self.string(k)
+        else:
+            self.buf.append(NODE)
+            self.varint(n)
+        for _, x in fields:
+            self.value(x)
+
+
+class Decoder():
+    def __init__(self, data):
+        self.data : memoryview = memoryview(data)
+        self.pos : int = 0
+        self.strings : list[str] = []
+        ## shape number -> (class, field names)
+        self.shapes : list[tuple[type, tuple[str]]] = []
+        self.nodes : list = []
+        if bytes(self.data[:len(MAGIC)]) != MAGIC:
+            raise DecodeError("Not a Plate term stream")
+        self.pos = len(MAGIC)
+        version = self.varint()
+        if version != FORMAT_VERSION:
+            raise DecodeError(f"Unsupported format version {version}, expected {FORMAT_VERSION}")
+
+    def __iter__(self):
+        while self.pos < len(self.data):
+            try:
+                yield self.value()
+            except (IndexError, struct.error):
+                raise DecodeError(f"Truncated or damaged term stream at offset {self.pos}")
+
+    def varint(self) -> int:
+        b = self.data[self.pos]
+        self.pos += 1
+        if b < 0x80:
+            return b
+        n = b & 0x7f
+        shift = 7
+        while True:
+            b = self.data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def int(self) -> int:
+        n = self.varint()
+        return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+    def string(self) -> str:
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == STR_REF:
+            return self.strings[self.varint()]
+        if tag != STR:
+            raise DecodeError(f"Expected a string, found tag {tag}")
+        return self.new_string()
+
+    def new_string(self) -> str:
+        n = self.varint()
+        end = self.pos + n
+        if end > len(self.data):
+            raise IndexError
+        s = str(self.data[self.pos:end], "utf-8")
+        self.pos = end
+        self.strings.append(s)
+        return s
+
+    ## tags roughly from most to least common in a module
+    def value(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == NODE_REF:
+            return self.nodes[self.varint()]
+        elif tag == NODE:
+            return self.node(self.shapes[self.varint()])
+        elif tag == FALSE:
+            return False
+        elif tag == TRUE:
+            return True
+        elif tag == INT:
+            return self.int()
+        elif tag == STR_REF:
+            return self.strings[self.varint()]
+        elif tag == STR:
+            return self.new_string()
+        elif tag == NONE:
+            return None
+        elif tag == LIST:
+            return [self.value() for _ in range(self.varint())]
+        elif tag == SHAPE:
+            name = self.string()
+            if name not in NODES:
+                raise DecodeError(f"Unknown class in term stream: {name}")
+            shape = (NODES[name], tuple([self.string() for _ in range(self.varint())]))
+            self.shapes.append(shape)
+            return self.node(shape)
+        elif tag == FRACTION:
+            return Fraction(self.int(), self.int())
+        elif tag == FLOAT:
+            v = struct.unpack_from("<d", self.data, self.pos)[0]
+            self.pos += 8
+            return v
+        elif tag == SINGLETON:
+            i = self.varint()
+            if i >= len(SINGLETONS):
+                raise DecodeError(f"Unknown shared node {i}")
+            return SINGLETONS[i]
+        elif tag == ERROR:
+            name = self.string()
+            if name not in ERRORS:
+                raise DecodeError(f"Unknown exception in term stream: {name}")
+            return ERRORS[name](*self.value())
+        raise DecodeError(f"Unknown tag {tag} at offset {self.pos - 1}")
+
+    ## the node is numbered before its fields are read, so they may refer to it
+    def node(self, shape : tuple[type, tuple[str]]):
+        cls, fields = shape
+        v = cls.__new__(cls)
+        self.nodes.append(v)
+        for k in fields:
+            setattr(v, k, self.value())
+        return v
+
+
+def dumps(*vs) -> bytes:
+    out = BytesIO()
+    e = Encoder(out)
+    for v in vs:
+        e.write(v)
+    return out.getvalue()
+
+def loads(data) -> list:
+    return list(Decoder(data))
@@ -0,0 +1,308 @@
+import re
+from fractions import Fraction
+from types import CodeType
+from typing import Callable
+
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Python code generation for normalized Plate terms.
+
+Takes the output of Normalizer.check / Normalizer.synth and emits the
+source of a Python function, which is compiled with compile() and run
+natively by CPython:
+   Lambda  -- a Python function (a lambda, or a def if its body needs
+              statements)
+   If      -- a conditional expression, or an if/else statement
+   induct  -- a for loop over range(n) for Nat, or over the reversed
+              list for List, folding the inductive step into an
+              accumulator
+
+Variables left free in the term become parameters of the generated
+function, in the order they first appear. Plate values are represented
+by Python ones: numbers, strings, booleans, lists, (v,) for just v and
+None for nothing.
+
+Compiled code objects are cached by their source, so regenerating the
+same term reuses the earlier compile().
+"""
+
+## name of the function every generated module defines
+ENTRY = "plate_main"
+
+## generated source -> compiled module
+_CODE_CACHE : dict[str, CodeType] = {}
+
+
+## lines of Python source at one indentation level
+class Block():
+    def __init__(self, indent : int):
+        self.indent : int = indent
+        self.lines : list[str] = []
+
+    def line(self, text : str):
+        self.lines.append("    " * self.indent + text)
+
+    def child(self):
+        return Block(self.indent + 1)
+
+    def extend(self, b):
+        self.lines.extend(b.lines)
+
+
+class CodeGen():
+    def __init__(self):
+        self.counter = 0
+        ## free Plate variable name -> parameter name
+        self.params : dict[str, str] = {}
+
+    ## a Python identifier for a Plate name, unique within the module
+    def fresh(self, name : str) -> str:
+        self.counter += 1
+        return f"{re.sub(r'[^A-Za-z0-9_]', '_', name)}_{self.counter}"
+
+    ## Python source of a module defining ENTRY for e
+    def generate(self, e : Expr) -> str:
+        if not getattr(e, "normalized", False):
+            raise CompileError(f"Expected a normalized expression, got {e}")
+        self.counter = 0
+        self.params = {}
+        body = Block(1)
+        result = self.emit(e, {}, body)
+        out = Block(0)
+        out.line(f"def {ENTRY}({', '.join(self.params.values())}):")
+        out.extend(body)
+        body.lines = []
+        body.line(f"return {result}")
+        out.extend(body)
+        return "\n".join(out.lines) + "\n"
+
+    ## compiles e to a Python function taking its free variables
+    def build(self, e : Expr) -> Callable:
+        src = self.generate(e)
+        code = _CODE_CACHE.get(src)
+        if code is None:
+            code = compile(src, "<plate>", "exec")
+            _CODE_CACHE[src] = code
+        namespace = {"Fraction": Fraction}
+        exec(code, namespace)
+        return namespace[ENTRY]
+
+    ## appends any statements e needs to out and returns a Python
+    ## expression for its value. scope maps Plate names to Python names.
+    def emit(self, e : Expr, scope : dict[str, str], out : Block) -> str:
+        emitter = GENERATE.get(e.__class__)
+        if emitter is None:
+            emitter = self.emitter_for(e.__class__)
+        return emitter(self, e, scope, out)
+
+    def emitter_for(self, cls : type):
+        for base in cls.__mro__:
+            if base in GENERATE:
+                GENERATE[cls] = GENERATE[base]
+                return GENERATE[cls]
+        raise CompileError(f"No code generation for {cls.__name__}")
+
+    ###############
+    ## Base cases
+    ###############
+
+    def emit_literal(self, e : Literal, scope : dict[str, str], out : Block) -> str:
+        if isinstance(e.val, Fraction):
+            return f"Fraction({e.val.numerator}, {e.val.denominator})"
+        return repr(e.val)
+
+    def emit_nothing(self, e : ENothing, scope : dict[str, str], out : Block) -> str:
+        return "None"
+
+    def emit_variable(self, e : Variable, scope : dict[str, str], out : Block) -> str:
+        name = scope.get(e.name)
+        if name is None:
+            name = self.params.get(e.name)
+        if name is None:
+            name = self.fresh(e.name)
+            self.params[e.name] = name
+        return name
+
+    ###############
+    ## Functions
+    ###############
+
+    def emit_lambda(self, e : Lambda, scope : dict[str, str], out : Block) -> str:
+        x = self.fresh(e.var.name)
+        body = out.child()
+        result = self.emit(e.body, {**scope, e.var.name : x}, body)
+        if not body.lines:
+            return f"(lambda {x}: {result})"
+        f = self.fresh("fn")
+        out.line(f"def {f}({x}):")
+        out.extend(body)
+        body.lines = []
+        body.line(f"return {result}")
+        out.extend(body)
+        return f
+
+    def emit_app(self, e : Application, scope : dict[str, str], out : Block) -> str:
+        f = self.emit(e.operator, scope, out)
+        a = self.emit(e.operand, scope, out)
+        return f"{f}({a})"
+
+    ###############
+    ## Booleans
+    ###############
+
+    ## the branches only run when taken: if either needs statements the
+    ## If becomes an if/else statement writing a temporary
+    def emit_if(self, e : If, scope : dict[str, str], out : Block) -> str:
+        test = self.emit(e.test, scope, out)
+        then_b = out.child()
+        a = self.emit(e.consequent, scope, then_b)
+        else_b = out.child()
+        b = self.emit(e.else_expr, scope, else_b)
+        if not (then_b.lines or else_b.lines):
+            return f"({a} if {test} else {b})"
+        t = self.fresh("if")
+        then_b.line(f"{t} = {a}")
+        else_b.line(f"{t} = {b}")
+        out.line(f"if {test}:")
+        out.extend(then_b)
+        out.line("else:")
+        out.extend(else_b)
+        return t
+
+    def emit_not(self, e : Not, scope : dict[str, str], out : Block) -> str:
+        return f"(not {self.emit(e.e1, scope, out)})"
+
+    ###############
+    ## Binary operators
+    ###############
+
+    ## Python operator for each binary node, applied to e1 and e2
+    BINARY = {
+        Plus     : "+",
+        Times    : "*",
+        Or       : "or",
+        And      : "and",
+        Equal    : "==",
+        Concat   : "+",
+        Append   : "+",
+    }
+
+    def emit_binary(self, e : Expr, scope : dict[str, str], out : Block) -> str:
+        a = self.emit(e.e1, scope, out)
+        b = self.emit(e.e2, scope, out)
+        return f"({a} {CodeGen.BINARY[e.__class__]} {b})"
+
+    ## Contains checks whether e1 is a substring of e2
+    def emit_contains(self, e : Contains, scope : dict[str, str], out : Block) -> str:
+        a = self.emit(e.e1, scope, out)
+        b = self.emit(e.e2, scope, out)
+        return f"({a} in {b})"
+
+    ###############
+    ## Lists
+    ###############
+
+    def emit_list(self, e : List, scope : dict[str, str], out : Block) -> str:
+        return "[" + ", ".join([self.emit(v, scope, out) for v in e.values]) + "]"
+
+    def emit_empty(self, e : Empty, scope : dict[str, str], out : Block) -> str:
+        return f"(len({self.emit(e.e1, scope, out)}) == 0)"
+
+    def emit_length(self, e : Length, scope : dict[str, str], out : Block) -> str:
+        return f"len({self.emit(e.e1, scope, out)})"
+
+    def emit_member(self, e : Member, scope : dict[str, str], out : Block) -> str:
+        x = self.emit(e.value, scope, out)
+        l = self.emit(e.list, scope, out)
+        return f"({x} in {l})"
+
+    ###############
+    ## Maybe
+    ###############
+
+    def emit_just(self, e : Just, scope : dict[str, str], out : Block) -> str:
+        return f"({self.emit(e.e1, scope, out)},)"
+
+    ###############
+    ## Induction
+    ###############
+
+    ## induct left stuck by the Normalizer (its argument is not a value
+    ## yet) becomes a loop folding the step over the argument:
+    ##    Nat:  acc = base; for k in range(n): acc = step(k)(acc)
+    ##    List: acc = base; for x in reversed(l): acc = step(x)(acc)
+    def emit_induct(self, e : Induct, scope : dict[str, str], out : Block) -> str:
+        ty = e.arg.type
+        if isinstance(ty, TNat):
+            iterate = "range({})"
+        elif isinstance(ty, TList):
+            iterate = "reversed({})"
+        else:
+            raise CompileError(f"No code generation for induct on {ty}")
+        arg = self.emit(e.arg, scope, out)
+        acc = self.fresh("acc")
+        out.line(f"{acc} = {self.emit(e.base, scope, out)}")
+        k = self.fresh("k")
+        loop = out.child()
+        step = e.inds[0]
+        if self.inlinable(step):
+            ## the step is lambda [k] [ih] : body; run body in the loop
+            inner = {**scope, step.var.name : k, step.body.var.name : acc}
+            result = self.emit(step.body.body, inner, loop)
+        else:
+            f = self.fresh("step")
+            out.line(f"{f} = {self.emit(step, scope, out)}")
+            result = f"{f}({k})({acc})"
+        loop.line(f"{acc} = {result}")
+        out.line(f"for {k} in {iterate.format(arg)}:")
+        out.extend(loop)
+        return acc
+
+    ## a curried two-argument lambda whose body makes no functions of its
+    ## own, which could otherwise capture the loop variables late
+    def inlinable(self, step : Expr) -> bool:
+        if not (isinstance(step, Lambda) and isinstance(step.body, Lambda)):
+            return False
+        pending = [step.body.body]
+        while pending:
+            e = pending.pop()
+            if isinstance(e, Lambda):
+                return False
+            for k, v in node_fields(e):
+                if k in ("type", "span"):
+                    continue
+                if isinstance(v, Expr):
+                    pending.append(v)
+                elif isinstance(v, list):
+                    pending.extend([x for x in v if isinstance(x, Expr)])
+        return True
+
+
+## node class -> emitter; subclasses get added on first use
+GENERATE = {
+    Literal     : CodeGen.emit_literal,
+    ENothing    : CodeGen.emit_nothing,
+    Variable    : CodeGen.emit_variable,
+    Lambda      : CodeGen.emit_lambda,
+    Application : CodeGen.emit_app,
+    If          : CodeGen.emit_if,
+    Not         : CodeGen.emit_not,
+    Plus        : CodeGen.emit_binary,
+    Times       : CodeGen.emit_binary,
+    Or          : CodeGen.emit_binary,
+    And         : CodeGen.emit_binary,
+    Equal       : CodeGen.emit_binary,
+    Concat      : CodeGen.emit_binary,
+    Append      : CodeGen.emit_binary,
+    Contains    : CodeGen.emit_contains,
+    List        : CodeGen.emit_list,
+    Empty       : CodeGen.emit_empty,
+    Length      : CodeGen.emit_length,
+    Member      : CodeGen.emit_member,
+    Just        : CodeGen.emit_just,
+    Induct      : CodeGen.emit_induct,
+}
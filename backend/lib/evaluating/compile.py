@@ -0,0 +1,340 @@
+from typing import Callable
+from loguru import logger
+
+try:
+    from ..defs import *
+    from .interp import Interpreter
+    from .vector import *
+    from .rational import *
+    from .tracing import tracer
+except:
+    from defs import *
+    from interp import Interpreter
+    from vector import *
+    from rational import *
+    from tracing import tracer
+
+"""
+Closure-compiling engine.
+
+Instead of walking the AST every time a node is evaluated, each Expr is
+compiled once into a tree of Python closures of type Frame -> Value.
+Dispatch on the node class, variable addresses, literal values and
+operators are all settled at compile time, so running a function body
+is just calling the closures built for it.
+
+Compiler shares its driver (init_env / eval_file / eval) with the
+Interpreter and produces the same Values, so the two are
+interchangeable; run.py picks one with --engine.
+"""
+
+## compiled code: takes the Frame to run in, returns a Value
+Code = Callable[[Frame], Value]
+
+
+class Compiler(Interpreter):
+    ## expressions reach _eval already resolved; compile and run them
+    def _eval(self, e : Expr, env : Frame) -> Value:
+        return self.compile(e)(env)
+
+    def compile(self, e : Expr) -> Code:
+        compiler = COMPILE.get(e.__class__)
+        if compiler is None:
+            compiler = self.compiler_for(e.__class__)
+        return compiler(self, e)
+
+    def compiler_for(self, cls : type):
+        for base in cls.__mro__:
+            if base in COMPILE:
+                COMPILE[cls] = COMPILE[base]
+                return COMPILE[cls]
+        if not issubclass(cls, Expr):
+            raise RuntimeError(f"Unknown expression in compile: {cls.__name__}")
+        COMPILE[cls] = Compiler.compile_unsupported
+        return COMPILE[cls]
+
+    ## same as the Interpreter: nodes with no rule evaluate to None
+    def compile_unsupported(self, e : Expr) -> Code:
+        logger.warning(f"No evaluation rule for {e.__class__.__name__}")
+        return lambda frame: None
+
+    ###############
+    ## Base cases
+    ###############
+
+    ## literals are built once and shared; Values are never mutated
+    def compile_literal(self, e : Literal) -> Code:
+        v = Interpreter.eval_literal(self, e, None)
+        return lambda frame: v
+
+    def compile_nothing(self, e : ENothing) -> Code:
+        return lambda frame: nothing
+
+    def compile_print(self, e : PrintThen) -> Code:
+        message = e.message
+        body = self.compile(e.body)
+        def code(frame):
+            print(message)
+            return body(frame)
+        return code
+
+    ###############
+    ## Environment Extension
+    ###############
+
+    def compile_variable(self, e : Variable) -> Code:
+        name, depth, index = e.name, e.depth, e.index
+        if depth < 0:
+            def code(frame):
+                raise UnboundVariable(name)
+        elif depth == 0:
+            def code(frame):
+                v = frame.slots[index]
+                if v is None:
+                    raise UnboundVariable(name)
+                return v
+        elif depth == 1:
+            def code(frame):
+                v = frame.parent.slots[index]
+                if v is None:
+                    raise UnboundVariable(name)
+                return v
+        else:
+            def code(frame):
+                for _ in range(depth):
+                    frame = frame.parent
+                v = frame.slots[index]
+                if v is None:
+                    raise UnboundVariable(name)
+                return v
+        return code
+
+    def compile_let(self, e : Let) -> Code:
+        slot = e.slot
+        bind = self.compile(e.bind)
+        body = self.compile(e.body)
+        def code(frame):
+            frame.slots[slot] = bind(frame)
+            return body(frame)
+        return code
+
+    ###############
+    ## Functions
+    ###############
+
+    def compile_lambda(self, e : Lambda) -> Code:
+        var, source, size = e.var, e.body, e.frame_size
+        body = self.compile(e.body)
+        return lambda frame: Closure(var, frame, source, size, body)
+
+    def compile_app(self, e : Application) -> Code:
+        rator = self.compile(e.operator)
+        rand = self.compile(e.operand)
+        def code(frame):
+            oper = rator(frame)
+            if not isinstance(oper, Closure):
+                raise RuntimeError(f"Expected a closure, found: {oper}")
+            operand = rand(frame)
+            if tracer.on:
+                tracer.emit('apply', oper, operand)
+            env = Frame(oper.frame_size, oper.env)
+            env.slots[0] = operand
+            return oper.code(env)
+        return code
+
+    ###############
+    ## Booleans
+    ###############
+
+    def compile_or(self, e : Or) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            b1 = a(frame)
+            b2 = b(frame)
+            if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+                raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+            return to_boolean(b1.value or b2.value)
+        return code
+
+    def compile_and(self, e : And) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            b1 = a(frame)
+            b2 = b(frame)
+            if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+                raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+            return to_boolean(b1.value and b2.value)
+        return code
+
+    def compile_not(self, e : Not) -> Code:
+        a = self.compile(e.e1)
+        def code(frame):
+            b1 = a(frame)
+            if not isinstance(b1, VBoolean):
+                raise RuntimeError(f"Expected a boolean, got {b1}")
+            return to_boolean(not b1.value)
+        return code
+
+    def compile_if(self, e : If) -> Code:
+        test = self.compile(e.test)
+        consequent = self.compile(e.consequent)
+        else_expr = self.compile(e.else_expr)
+        def code(frame):
+            b = test(frame)
+            if not isinstance(b, VNothing) and not (isinstance(b, VBoolean) and not b.value):
+                return consequent(frame)
+            return else_expr(frame)
+        return code
+
+    ###############
+    ## Numbers
+    ###############
+
+    ## op combines the two numbers, ty picks the result type from theirs;
+    ## with bulk, a list on either side is handed to list_arith
+    def compile_arith(self, e : Expr, op, ty, bulk : bool=False) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            n1 = a(frame)
+            n2 = b(frame)
+            if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+                if bulk:
+                    return list_arith(op, n1, n2)
+                raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+            return VNumber(op(n1.value, n2.value), ty(n1.type, n2.type))
+        return code
+
+    def compile_plus(self, e : Plus) -> Code:
+        return self.compile_arith(e, plus, merge_numeric_types, True)
+
+    def compile_times(self, e : Times) -> Code:
+        return self.compile_arith(e, times, merge_numeric_types, True)
+
+    def compile_divide(self, e : Divide) -> Code:
+        return self.compile_arith(e, divide, lambda t1, t2: RATIONAL_TYPE)
+
+    def compile_mod(self, e : Mod) -> Code:
+        return self.compile_arith(e, remainder, merge_numeric_types)
+
+    ###############
+    ## Strings
+    ###############
+
+    def compile_concat(self, e : Concat) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            s1 = a(frame)
+            s2 = b(frame)
+            if not (isinstance(s1, VString) and isinstance(s2, VString)):
+                raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+            return VString(s1.value + s2.value)
+        return code
+
+    def compile_contains(self, e : Contains) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            s1 = a(frame)
+            s2 = b(frame)
+            if not (isinstance(s1, VString) and isinstance(s2, VString)):
+                raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+            return to_boolean(s1.value in s2.value)
+        return code
+
+    ###############
+    ## Lists
+    ###############
+
+    def compile_list(self, e : List) -> Code:
+        items = [self.compile(a) for a in e.values]
+        ty = e.type
+        return lambda frame: pack_list([item(frame) for item in items], ty)
+
+    def compile_append(self, e : Append) -> Code:
+        a = self.compile(e.e1)
+        b = self.compile(e.e2)
+        def code(frame):
+            l1 = a(frame)
+            l2 = b(frame)
+            if not (isinstance(l1, VList) and isinstance(l2, VList)):
+                raise RuntimeError(f"Expected lists, got {l1}, {l2}")
+            return list_append(l1, l2)
+        return code
+
+    ## Empty, Car, Cdr and Length: check for a list, then apply op to it
+    def compile_list_op(self, e : Expr, op) -> Code:
+        a = self.compile(e.e1)
+        def code(frame):
+            l1 = a(frame)
+            if not isinstance(l1, VList):
+                raise RuntimeError(f"Expected a list, got {l1}")
+            return op(l1)
+        return code
+
+    def compile_empty(self, e : Empty) -> Code:
+        return self.compile_list_op(e, lambda l: to_boolean(l.length() == 0))
+
+    def compile_car(self, e : Car) -> Code:
+        return self.compile_list_op(e, list_car)
+
+    def compile_cdr(self, e : Cdr) -> Code:
+        return self.compile_list_op(e, list_cdr)
+
+    def compile_length(self, e : Length) -> Code:
+        return self.compile_list_op(e, lambda l: VNumber(l.length(), NAT_TYPE))
+
+    def compile_member(self, e : Member) -> Code:
+        a = self.compile(e.value)
+        b = self.compile(e.list)
+        def code(frame):
+            x = a(frame)
+            l1 = b(frame)
+            if not isinstance(l1, VList):
+                raise RuntimeError(f"Expected a list, got {l1}")
+            return list_member(x, l1)
+        return code
+
+    ###############
+    ## Maybe
+    ###############
+
+    def compile_just(self, e : Just) -> Code:
+        a = self.compile(e.e1)
+        def code(frame):
+            v = a(frame)
+            return VJust(v, v.type)
+        return code
+
+
+## node class -> compiler; subclasses get added on first use
+COMPILE = {
+    Literal     : Compiler.compile_literal,
+    ENothing    : Compiler.compile_nothing,
+    PrintThen   : Compiler.compile_print,
+    Variable    : Compiler.compile_variable,
+    Let         : Compiler.compile_let,
+    Lambda      : Compiler.compile_lambda,
+    Application : Compiler.compile_app,
+    Or          : Compiler.compile_or,
+    And         : Compiler.compile_and,
+    Not         : Compiler.compile_not,
+    If          : Compiler.compile_if,
+    Plus        : Compiler.compile_plus,
+    Times       : Compiler.compile_times,
+    Divide      : Compiler.compile_divide,
+    Mod         : Compiler.compile_mod,
+    Concat      : Compiler.compile_concat,
+    Contains    : Compiler.compile_contains,
+    List        : Compiler.compile_list,
+    Append      : Compiler.compile_append,
+    Empty       : Compiler.compile_empty,
+    Car         : Compiler.compile_car,
+    Cdr         : Compiler.compile_cdr,
+    Length      : Compiler.compile_length,
+    Member      : Compiler.compile_member,
+    Just        : Compiler.compile_just,
+}
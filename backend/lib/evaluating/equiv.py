@@ -1,7 +1,145 @@
+from collections import OrderedDict
 from ..defs import *
 from loguru import logger
-## TODO write alpha equivalence for expressions
-def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment(), Environment()], lex_addr=0) -> bool:
+
+###############
+## Alpha hashing
+###############
+
+## An alpha-invariant hash of a term: bound variables count by their De
+## Bruijn index, so terms alpha_equiv accepts always hash alike and two
+## terms with different hashes can be rejected without walking them.
+## Interned (hash-consed) terms are immutable, so theirs is computed once
+## and kept on the node.
+
+## hash of a term alpha_equiv cannot compare
+UNHASHABLE = None
+
+def alpha_hash(e : Expr) -> int:
+    h = getattr(e, 'alpha_key', False)
+    if h is not False:
+        return h
+    try:
+        h = _alpha_hash(e, {}, 0)
+    except Exception:
+        h = UNHASHABLE
+    if getattr(e, 'interned', False):
+        e.alpha_key = h
+    return h
+
+## scope maps bound names to the level of their binder; depth is the
+## number of binders above e. Mirrors the cases of alpha_equiv below.
+def _alpha_hash(e : Expr, scope : dict[str, int], depth : int) -> int:
+    if isinstance(e, PrintThen):
+        return _alpha_hash(e.body, scope, depth)
+    elif isinstance(e, Variable):
+        if e.name in scope:
+            return hash(('bound', depth - scope[e.name]))
+        return hash(('free', e.name))
+    elif isinstance(e, Literal):
+        return hash(('lit', e.val))
+    elif isinstance(e, Lambda):
+        return hash(('lambda', _alpha_hash(e.body, {**scope, e.var.name : depth}, depth + 1)))
+    elif isinstance(e, Let):
+        return hash(('let', _alpha_hash(e.bind, scope, depth),
+                     _alpha_hash(e.body, {**scope, e.var.name : depth}, depth + 1)))
+    elif isinstance(e, List):
+        return hash(('list',) + tuple([_alpha_hash(v, scope, depth) for v in e.values]))
+    elif isinstance(e, Induct):
+        return hash(('induct', _alpha_hash(e.arg, scope, depth), _alpha_hash(e.base, scope, depth),
+                     _alpha_hash(e.type, scope, depth))
+                    + tuple([_alpha_hash(v, scope, depth) for v in e.inds]))
+    elif isinstance(e, ENothing):
+        return hash('nothing')
+    for cls, fields in _OPEN_FIELDS:
+        if isinstance(e, cls):
+            return hash((cls.__name__,) + tuple([_alpha_hash(getattr(e, f), {}, 0) for f in fields]))
+    ## Nat, Int and Rational are told apart by subclass checks, so
+    ## alpha_equiv(Int, Nat) holds: hash them together
+    if isinstance(e, TRational):
+        return hash('number')
+    for cls, fields in _FIELDS:
+        if isinstance(e, cls):
+            return hash((cls.__name__,) + tuple([_alpha_hash(getattr(e, f), scope, depth) for f in fields]))
+    raise Exception(f"Unsupported expression in alpha: {e}")
+
+## node class -> the children alpha_equiv compares, in order
+_FIELDS = [
+    (Plus, ('e1', 'e2')),
+    (Times, ('e1', 'e2')),
+    (If, ('test', 'consequent', 'else_expr')),
+    (Or, ('e1', 'e2')),
+    (And, ('e1', 'e2')),
+    (Not, ('e1',)),
+    (Equal, ('e1', 'e2')),
+    (Concat, ('e1', 'e2')),
+    (Contains, ('e1', 'e2')),
+    (Append, ('e1', 'e2')),
+    (Empty, ('e1',)),
+    (Member, ('list', 'value')),
+    (Length, ('e1',)),
+    (Application, ('operator', 'operand')),
+    (TUniverse, ('level',)),
+    (TString, ()),
+    (TBoolean, ()),
+    (TEither, ('left', 'right')),
+    (TList, ('contents',)),
+    (TPlate, ('contents',)),
+    (TMaybe, ('subtype',)),
+    (TFunction, ('input', 'output')),
+    (TForAll, ('input', 'output')),
+]
+
+## the same, for nodes alpha_equiv compares outside of the current scope
+_OPEN_FIELDS = [
+    (Just, ('e1',)),
+    (Refl, ('val',)),
+    (Symm, ('body',)),
+    (Trans, ('e1', 'e2')),
+    (Cong, ('fn', 'e1')),
+    (Look, ('element', 'proof')),
+]
+
+###############
+## Alpha equivalence
+###############
+
+## most recently confirmed equivalent pairs of interned terms, by identity
+_EQUIV_CACHE_SIZE = 4096
+_EQUIV_CACHE : OrderedDict = OrderedDict()
+
+## names bound around each side (name -> level of its binder)
+Scope = dict[str, int]
+_EMPTY : Scope = {}
+
+## lex_env holds the scopes of e and e2 and lex_addr the number of binders
+## above them. Scopes are never mutated (binders make extended copies), so
+## nothing outlives a call and calls can run concurrently.
+def alpha_equiv(e : Expr, e2 : Expr, lex_env : tuple[Scope, Scope]=(_EMPTY, _EMPTY), lex_addr=0) -> bool:
+    ## interned terms are immutable: compare by identity, then by hash,
+    ## then by the memo, before walking them
+    if lex_addr == 0 and getattr(e, 'interned', False) and getattr(e2, 'interned', False):
+        if e is e2:
+            return True
+        h, h2 = alpha_hash(e), alpha_hash(e2)
+        if h is not UNHASHABLE and h2 is not UNHASHABLE and h != h2:
+            return False
+        pair = (id(e), id(e2))
+        try:
+            _EQUIV_CACHE.move_to_end(pair)
+            return True
+        except KeyError:
+            pass
+        res = _alpha_walk(e, e2, lex_env, lex_addr)
+        if res:
+            ## holding the terms keeps their ids from being reused
+            _EQUIV_CACHE[pair] = (e, e2)
+            if len(_EQUIV_CACHE) > _EQUIV_CACHE_SIZE:
+                _EQUIV_CACHE.popitem(last=False)
+        return res
+    return _alpha_walk(e, e2, lex_env, lex_addr)
+
+def _alpha_walk(e : Expr, e2 : Expr, lex_env : tuple[Scope, Scope], lex_addr : int) -> bool:
     ## Prints do not contribute to alpha
     # logger.debug(e)
     # logger.debug(e2)
@@ -12,20 +150,11 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
     elif isinstance(e, Variable):
         if not isinstance(e2, Variable):
             return False
-        try:
-            e_i = lex_env[0].lookup(e.name)
-            e_bound = True
-        except:
-            e_bound = False
-        try:
-            e2_i = lex_env[1].lookup(e2.name)
-            e2_bound = True
-        except:
-            e2_bound = False
-        if (not e_bound) or (not e2_bound):
-            if e_bound or e2_bound:
-                return False
-            return e.name == e2.name
+        e_i = lex_env[0].get(e.name)
+        e2_i = lex_env[1].get(e2.name)
+        if e_i is None or e2_i is None:
+            ## free variables are equivalent only to themselves
+            return e_i is None and e2_i is None and e.name == e2.name
         return e_i == e2_i
     elif isinstance(e, Literal):
         return isinstance(e2, Literal) and e.val == e2.val
@@ -33,9 +162,7 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
         if not isinstance(e2, Lambda):
             return False
         else:
-            lex_env[0].extend(e.var, lex_addr)
-            lex_env[1].extend(e2.var, lex_addr)
-            return alpha_equiv(e.body, e2.body, lex_env, lex_addr+1)
+            return alpha_equiv(e.body, e2.body, bind_scopes(lex_env, e.var, e2.var, lex_addr), lex_addr+1)
     elif isinstance(e, List):
         if not isinstance(e2, List):
             return False
@@ -112,9 +239,7 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
             return False
         if not alpha_equiv(e.bind, e2.bind, lex_env, lex_addr):
             return False
-        lex_env[0].extend(e.var, lex_addr)
-        lex_env[1].extend(e2.var, lex_addr)
-        return alpha_equiv(e.body, e2.body, lex_env, lex_addr+1)
+        return alpha_equiv(e.body, e2.body, bind_scopes(lex_env, e.var, e2.var, lex_addr), lex_addr+1)
     elif isinstance(e, Application):
         return isinstance(e2, Application) and \
             alpha_equiv(e.operator, e2.operator, lex_env, lex_addr) and \
@@ -173,6 +298,9 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
     elif isinstance(e, TList):
         return isinstance(e2, TList) and \
             alpha_equiv(e.contents, e2.contents, lex_env, lex_addr)
+    elif isinstance(e, TPlate):
+        return isinstance(e2, TPlate) and \
+            alpha_equiv(e.contents, e2.contents, lex_env, lex_addr)
     elif isinstance(e, TMaybe):
         return isinstance(e2, TMaybe) and \
             alpha_equiv(e.subtype, e2.subtype, lex_env, lex_addr)
@@ -186,8 +314,8 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
         if not isinstance(e2, TForAll):
             return False
         else:
-            return alpha_equiv(e.var, e2.var, lex_env, lex_addr) and \
-                alpha_equiv(e.prop, e2.prop, lex_env, lex_addr)
+            return alpha_equiv(e.input, e2.input, lex_env, lex_addr) and \
+                alpha_equiv(e.output, e2.output, lex_env, lex_addr)
     elif isinstance(e, TExists):
         raise NotImplementedError
     elif isinstance(e, TAbsurd):
@@ -197,6 +325,11 @@ def alpha_equiv(e : Expr, e2 : Expr, lex_env : list[Environment]= [Environment()
         raise Exception(f"Unsupported expression in alpha: {e}")
 
 
+## scopes with x bound on the left and y on the right, at level lex_addr
+def bind_scopes(lex_env : tuple[Scope, Scope], x : Variable, y : Variable, lex_addr : int) -> tuple[Scope, Scope]:
+    return ({**lex_env[0], x.name : lex_addr}, {**lex_env[1], y.name : lex_addr})
+
+
 def is_numeric_subtype(τ1 : Type, τ2 : type) -> bool:
     if isinstance(τ1, TNat):
         return (isinstance(τ2, TNat) or isinstance(τ2, TInt) or isinstance(τ2, TRational))
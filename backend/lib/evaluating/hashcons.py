@@ -0,0 +1,71 @@
+from copy import copy as _copy
+from weakref import WeakValueDictionary
+
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Hash-consing of normalized terms.
+
+The Normalizer passes every term it produces through intern(), which
+returns the one canonical node for that structure, so identical normal
+forms (and the types hanging off them) share a single object.
+
+Nodes are keyed by their class and fields: a canonical child counts by
+its identity, anything else by its own structure. Variables always
+count by identity, as binders are told apart by object. The table
+holds its nodes weakly, so a normal form nothing refers to any more
+drops out of it.
+
+Canonical nodes are shared and so must not be mutated; retyped() gives
+a canonical copy of a node with a different type instead.
+"""
+
+## fields that are bookkeeping rather than part of a term
+_IGNORED = ('span', 'flags', 'alpha_key')
+
+_TABLE = WeakValueDictionary()
+
+
+def _key(x):
+    if getattr(x, 'interned', False) or isinstance(x, Variable):
+        return id(x)
+    if isinstance(x, (Expr, ENothing)):
+        return (x.__class__,) + tuple([(k, _key(v)) for k, v in sorted(node_fields(x)) if k not in _IGNORED])
+    if isinstance(x, (list, tuple)):
+        return (list,) + tuple([_key(v) for v in x])
+    ## 1, 1.0 and True are equal in Python but are different literals
+    return (x.__class__, x)
+
+
+## the canonical node structurally identical to e (e itself if it is new)
+def intern(e : Expr) -> Expr:
+    if getattr(e, 'interned', False) or isinstance(e, Variable):
+        return e
+    try:
+        k = _key(e)
+        found = _TABLE.get(k)
+    except TypeError:
+        ## a field with an unhashable value: leave the node unshared
+        return e
+    if found is not None:
+        return found
+    e.interned = True
+    _TABLE[k] = e
+    return e
+
+
+## e with type τ, without mutating e (which may be shared)
+def retyped(e : Expr, τ : Type) -> Expr:
+    if e.type is τ:
+        return e
+    ## copying drops the interned mark and alpha hash (see Expr.__getstate__)
+    res = _copy(e)
+    res.type = τ
+    return intern(res)
+
+
+def table_size() -> int:
+    return len(_TABLE)
@@ -0,0 +1,186 @@
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from hashlib import blake2b
+
+try:
+    from ..defs import *
+    from .parse import Parser
+    from .nbe import Normalizer, Context
+    from .hashcons import intern
+except:
+    from defs import *
+    from parse import Parser
+    from nbe import Normalizer, Context
+    from hashcons import intern
+
+"""
+Incremental type-checking of a file.
+
+An editor re-checks the whole file on every save, although usually one
+definition changed. IncrementalChecker keeps the parse and the normal
+form of every top-level item between checks and redoes only what an
+edit touched:
+
+   - the source is cut into chunks at each line starting with a
+     definition keyword; a chunk is re-parsed only if its text changed
+   - each item is keyed by a content hash of its own text and of the
+     keys of the definitions it mentions, so editing a definition
+     changes its key and those of its transitive dependents only
+   - an item whose key was seen in the last check reuses its normal
+     form; everything else is normalized again
+
+An item sees the definitions before it in the file, and a defunc also
+sees itself (as a neutral variable) so it can recurse.
+
+Keys depend only on text, so they are all known before anything is
+normalized. With workers > 1 the items to normalize form a DAG by the
+keys they depend on, and each is sent to a process pool as soon as
+everything it depends on has its normal form.
+"""
+
+## where a chunk may start: a definition keyword at the start of a line
+_CHUNK_START = re.compile(r"^(?=(?:" + "|".join(DEFS) + r")\b)", re.MULTILINE)
+
+
+def content_hash(*parts : str) -> str:
+    h = blake2b(digest_size=16)
+    for p in parts:
+        h.update(p.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+## every variable name mentioned in e (binders included; a shadowed
+## name only adds a harmless extra dependency)
+def mentions(e : Expr) -> set[str]:
+    names = set()
+    pending = [e]
+    while pending:
+        x = pending.pop()
+        if isinstance(x, Variable):
+            names.add(x.name)
+        for _, v in node_fields(x):
+            if isinstance(v, (Expr, ENothing)):
+                pending.append(v)
+            elif isinstance(v, list):
+                pending.extend([y for y in v if isinstance(y, (Expr, ENothing))])
+    return names
+
+
+## the Normalizer pool workers check with: inherited when the pool
+## forks, or sent to each worker once
+_NBE = None
+
+def _init_worker(nbe : Normalizer):
+    global _NBE
+    _NBE = nbe
+
+def _normalize(e : Expr, deps : list[tuple[str, Expr]]) -> Expr:
+    return IncrementalChecker(_NBE).normalize(e, deps)
+
+
+class IncrementalChecker():
+    def __init__(self, nbe : Normalizer=None):
+        self.nbe : Normalizer = nbe if nbe is not None else Normalizer()
+        ## chunk text -> its parsed items and the names each mentions,
+        ## as of the last check
+        self.parsed : dict[str, list[tuple[Expr, set[str]]]] = {}
+        ## item key -> normal form (or the error raised checking it)
+        self.results : dict[str, Expr] = {}
+        ## number of items normalized (not reused) by the last check
+        self.normalized : int = 0
+
+    ## normal forms of the top-level items of source, in order; an item
+    ## that fails to check has the exception as its result instead
+    def check(self, source : str, workers : int=1) -> list[Expr]:
+        parsed = {}
+        ## definition name -> key of its latest definition
+        scope : dict[str, str] = {}
+        ## key -> the item and the (name, key) of each definition it
+        ## uses, for items with no normal form yet
+        todo : dict[str, tuple[Expr, list[tuple[str, str]]]] = {}
+        keys = []
+        for chunk in _CHUNK_START.split(source):
+            items = self.parsed.get(chunk)
+            if items is None:
+                items = [(e, mentions(e)) for e in Parser(chunk).parse_file()]
+            parsed[chunk] = items
+            for i, (e, names) in enumerate(items):
+                deps = sorted([x for x in names if x in scope])
+                if getattr(e, 'span', None) is not None:
+                    text = chunk[e.span.start:e.span.end]
+                else:
+                    text = f"{i}:{chunk}"
+                key = content_hash(text, *[f"{x}={scope[x]}" for x in deps])
+                if key not in self.results and key not in todo:
+                    todo[key] = (e, [(x, scope[x]) for x in deps])
+                if isinstance(e, Def):
+                    scope[e.var.name] = key
+                keys.append(key)
+        results = {k : self.results[k] for k in keys if k in self.results}
+        if workers > 1 and len(todo) > 1:
+            self.normalize_parallel(todo, results, workers)
+        else:
+            ## a dependency always comes before its dependents in todo
+            for key, (e, deps) in todo.items():
+                results[key] = self.normalize(e, [(x, results[k]) for x, k in deps])
+        self.normalized = len(todo)
+        self.parsed = parsed
+        self.results = results
+        return [results[k] for k in keys]
+
+    ## normalizes todo into results on a pool of workers, submitting
+    ## each item once everything it depends on is done
+    def normalize_parallel(self, todo : dict, results : dict[str, Expr], workers : int):
+        global _NBE
+        dependents = {key : [] for key in todo}
+        blocked = {}
+        for key, (_, deps) in todo.items():
+            ks = {k for _, k in deps if k in todo}
+            blocked[key] = len(ks)
+            for k in ks:
+                dependents[k].append(key)
+        ready = [key for key, n in blocked.items() if n == 0]
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _NBE = self.nbe
+            pool = ProcessPoolExecutor(workers, multiprocessing.get_context('fork'))
+        else:
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.nbe,))
+        running = {}
+        try:
+            with pool:
+                while ready or running:
+                    for key in ready:
+                        e, deps = todo[key]
+                        running[pool.submit(_normalize, e, [(x, results[k]) for x, k in deps])] = key
+                    ready = []
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        key = running.pop(f)
+                        res = f.result()
+                        results[key] = res if isinstance(res, Exception) else intern(res)
+                        for d in dependents[key]:
+                            blocked[d] -= 1
+                            if blocked[d] == 0:
+                                ready.append(d)
+        finally:
+            _NBE = None
+
+    ## e's normal form in a Context of the normal forms deps name
+    def normalize(self, e : Expr, deps : list[tuple[str, Expr]]) -> Expr:
+        Γ = Context()
+        for x, nf in deps:
+            if not isinstance(nf, Exception):
+                Γ = Γ.extend(Variable(x), nf)
+        try:
+            if isinstance(e, Defunc):
+                return self.nbe.check(Γ.extend(e.var, e.var), e.body, e.var.type)
+            elif isinstance(e, Defconst):
+                return self.nbe.check(Γ, e.body, e.var.type)
+            elif isinstance(e, Defrel):
+                raise NotImplementedError
+            return self.nbe.synth(Γ, e)
+        except Exception as err:
+            ## the traceback would keep every frame of the failed check alive
+            return err.with_traceback(None)
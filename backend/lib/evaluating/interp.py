@@ -1,215 +1,321 @@
 from loguru import logger
+import multiprocessing
 import sys
 from ..defs import *
+from .resolve import Resolver
+from .vector import *
+from .rational import *
+from .tracing import tracer
+
+## (interpreter, expressions, global Frame) a pool worker evaluates
+## against: set before the pool forks, or sent to each worker once
+_WORKER = None
+
+def _init_worker(state : tuple):
+    global _WORKER
+    _WORKER = state
+
+def _eval_top(k : int) -> Value:
+    interp, es, ρ = _WORKER
+    return interp._eval(es[k], Frame(es[k].root_frame_size, ρ))
 
 class Interpreter():
     def __init__(self):
         pass
 
     def apply_closure(self, rator : Closure, rand : Value):
-        env : Environment = rator.env
-        env.extend(rator.var, rand)
-        logger.info(str(rator))
+        env = Frame(rator.frame_size, rator.env)
+        env.bind(0, rand)
+        if tracer.on:
+            tracer.emit('apply', rator, rand)
         return self._eval(rator.body, env)
 
-    def init_env(self, es : list[Expr]) -> Environment:
-        env = Environment()
+    ## resolves the file and evaluates its definitions into the global Frame
+    def init_env(self, es : list[Expr]) -> Frame:
+        scope = Resolver().resolve_program(es)
+        env = Frame(scope.size)
         for e in es:
-            if isinstance(e, Defconst):
-                logger.info(f'extending {e.var} : {e.body.type} with {e.body}')
-                env.extend(e.var, self._eval(e.body, env))
-                logger.info(f"Env: {env.vars}")
-            elif isinstance(e, Defunc):
-                var : Variable = e.var
-                env.extend(var, self._eval(e.body, env))
+            if isinstance(e, (Defconst, Defunc)):
+                v = self._eval(e.body, Frame(e.root_frame_size, env))
+                env.bind(e.slot, v)
+                if tracer.on:
+                    tracer.emit('define', e.var, v)
             elif isinstance(e, Defrel):
                 raise NotImplementedError
             else:
                 pass
-            logger.info(f"Current Env: {env}")
-        for x in env.vars:
-            if isinstance(x[1], Closure):
-                x[1].env = env.copy()
-        logger.info(f"Final Env: {env}")
         return env
 
-    def eval_file(self, es : list[Expr], ρ : Environment) -> list[Value]:
-        ans = []
-        for e in es:
-            if not isinstance(e, Def):
-                ans.append(self._eval(e, ρ))
-        return ans
+    ## es must have been through init_env, which returned ρ. Once ρ is
+    ## built the top-level expressions are independent, so with workers
+    ## > 1 they are spread over a process pool; values come back in
+    ## source order, but anything they print may interleave
+    def eval_file(self, es : list[Expr], ρ : Frame, workers : int=1) -> list[Value]:
+        es = [e for e in es if not isinstance(e, Def)]
+        if workers > 1 and len(es) > 1:
+            return self.eval_parallel(es, ρ, workers)
+        return [self._eval(e, Frame(e.root_frame_size, ρ)) for e in es]
+
+    ## a forked worker already has ρ; otherwise it gets a pickled copy
+    def eval_parallel(self, es : list[Expr], ρ : Frame, workers : int) -> list[Value]:
+        global _WORKER
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _WORKER = (self, es, ρ)
+            pool = multiprocessing.get_context('fork').Pool(workers)
+        else:
+            pool = multiprocessing.Pool(workers, _init_worker, ((self, es, ρ),))
+        try:
+            with pool:
+                return pool.map(_eval_top, range(len(es)))
+        finally:
+            _WORKER = None
 
 
     def eval(self, e : Expr):
-        v = self._eval(e, Environment())
+        Resolver().resolve_root(e, e)
+        v = self._eval(e, Frame(e.root_frame_size))
         return v
 
-    def _eval(self, e : Expr, env : Environment) -> Value:
-        ## base cases
-        if isinstance(e, Literal):
-            if isinstance(e.type, TNum):
-                return VNumber(e.val, e.type)
-            elif isinstance(e.type, TList):
-                return VList(e.val, e.type)
-            elif isinstance(e.type, TString):
-                return VString(e.val)
-            elif isinstance(e.type, TBoolean):
-                return VBoolean(e.val)
-            
-        if isinstance(e, ENothing):
-            return VNothing(e.type)
-
-        ## print statement
-        if isinstance(e, PrintThen):
-            print(e.message)
-            return self._eval(e.body, env)
-
-        ## Environment Extension
-        if isinstance(e, Variable):
-            return env.lookup(e.name)
-        
-        if isinstance(e, Let):
-            v = self._eval(e.bind, env)
-            env.extend(e.var, v)
-            return self._eval(e.body, env)
-        
-        ## Functions 
-        if isinstance(e, Lambda):
-            return Closure(e.var, env.copy(), e.body)
-
-        if isinstance(e, Application):
-            logger.info(f"IN APP WITH: {e}")
-            oper = self._eval(e.operator, env)
-
-            if not isinstance(oper, Closure):
-                raise RuntimeError(f"Expected a closure, found: {oper}")
-            operand = self._eval(e.operand, env)
-            logger.info(f"\nAPPLYING CLOSURE: \n({oper}, \n{operand})")
-
-            return self.apply_closure(oper, operand)
-
-        ## Booleans
-        if isinstance(e, Or):
-            b1 = self._eval(e.e1, env)
-            b2 = self._eval(e.e2, env)
-            if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
-                raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
-            else:
-                return VBoolean(b1.value or b2.value)
-        if isinstance(e, And):
-            b1 = self._eval(e.e1, env)
-            b2 = self._eval(e.e2, env)
-            if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
-                raise RuntimeError
-            else:
-                return VBoolean(b1.value and b2.value)
-            
-        if isinstance(e, Not):
-            b1 = self._eval(e.e1, env)
-            if not isinstance(b1, VBoolean):
-                raise RuntimeError
-            else:
-                return VBoolean(not b1.value)
-            
-        if isinstance(e, If):
-            b = self._eval(e.test, env)
-            if not isinstance(b, VNothing()) and not (isinstance(b, VBoolean) and not b.value):
-                return self._eval(e.consequent, env)
-            return self._eval(e.else_expr, env)
-                    
-        
-        ## Numbers
-        if isinstance(e, Plus):
-            n1 = self._eval(e.e1, env)
-            n2 = self._eval(e.e2, env)
-            if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
-                raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
-            else:
-                ty = merge_numeric_types(n1.type, n2.type)
-                return VNumber(n1.value + n2.value, ty)
-        if isinstance(e, Times):
-            n1 = self._eval(e.e1, env)
-            n2 = self._eval(e.e2, env)
-            if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
-                raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
-            else:
-                ty = merge_numeric_types(n1.type, n2.type)
-                return VNumber(n1.value * n2.value, ty)
-            
-        if isinstance(e, Divide):
-            n1 = self._eval(e.e1, env)
-            n2 = self._eval(e.e2, env)
-            if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
-                raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
-            if n2.value == 0:
-                raise RuntimeError(f"Cannot divide by 0")
-            else:
-                return VNumber(n1.value / n2.value, TRational())
-        
-        if isinstance(e, Mod):
-            n1 = self._eval(e.e1, env)
-            n2 = self._eval(e.e2, env)
-            if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
-                raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
-            else:
-                ty = merge_numeric_types(n1.type, n2.type)
-                return VNumber(n1.value / n2.value, ty)
-
-        ## Strings
-        if isinstance(e, Concat):
-            s1 = self._eval(e.e1, env)
-            s2 = self._eval(e.e2, env)
-            if not (isinstance(s1, VString) and isinstance(s2, VString)):
-                raise RuntimeError
-            else:
-                return VString(s1.value + s2.value)
-        if isinstance(e, Contains):
-            s1 = self._eval(e.e1, env)
-            s2 = self._eval(e.e2, env)
-            if not (isinstance(s1, VString) and isinstance(s2, VString)):
-                raise RuntimeError
-            else:
-                return VBoolean(s1.value in s2.value)
-            
-        if isinstance(e, List):
-            ans = []
-            for a in e.values:
-                ans.append(self._eval(a, env))
-            return VList(ans, e.type)
-
-        ## Lists
-        if isinstance(e, Append):
-            l1 = self._eval(e.e1, env)
-            l2 = self._eval(e.e2, env)
-            if not (isinstance(l1, VList) and isinstance(s2, VList)):
-                raise RuntimeError
-            if not (l1.type == l2.type):
-                raise RuntimeError
-            else:
-                return VList(l1.value + l2.value)
-        if isinstance(e, Empty):
-            l1 = self._eval(e.e1, env)
-            if not (isinstance(l1, VList)):
-                raise RuntimeError
-            else:
-                return VBoolean(len(l1.value) == 0)
-        if isinstance(e, Car):
-            l1 = self._eval(e.e1, env)
-            if not (isinstance(l1, VList)):
-                raise RuntimeError
-            else:
-                return l1.value[0]
-            
-        if isinstance(e, Cdr):
-            l1 = self._eval(e.e1, env)
-            if not (isinstance(l1, VList)):
-                raise RuntimeError
-            else:
-                return VList(l1.value[1:], l1.type)
-            
-        ## Maybe
-        if isinstance(e, Just):
-            v = self._eval(e, env)
-            return VJust(e, v.type)
-            
\ No newline at end of file
+    ## looks up the handler for e's class; subclasses of a handled class
+    ## are resolved once through their MRO and then cached in the table.
+    ## Nodes the interpreter has no rule for (e.g. induct) evaluate to
+    ## None, as they did before the table existed.
+    def _eval(self, e : Expr, env : Frame) -> Value:
+        handler = DISPATCH.get(e.__class__)
+        if handler is None:
+            handler = self.handler_for(e.__class__)
+        return handler(self, e, env)
+
+    def handler_for(self, cls : type):
+        for base in cls.__mro__:
+            if base in DISPATCH:
+                DISPATCH[cls] = DISPATCH[base]
+                return DISPATCH[cls]
+        if not issubclass(cls, Expr):
+            raise RuntimeError(f"Unknown expression in eval: {cls.__name__}")
+        DISPATCH[cls] = Interpreter.eval_unsupported
+        return DISPATCH[cls]
+
+    def eval_unsupported(self, e : Expr, env : Frame) -> Value:
+        logger.warning(f"No evaluation rule for {e.__class__.__name__}")
+        return None
+
+    ###############
+    ## Base cases
+    ###############
+
+    def eval_literal(self, e : Literal, env : Frame) -> Value:
+        if isinstance(e.type, TNum):
+            return VNumber(e.val, e.type)
+        elif isinstance(e.type, TList):
+            return VList(e.val, e.type)
+        elif isinstance(e.type, TString):
+            return VString(e.val)
+        elif isinstance(e.type, TBoolean):
+            return to_boolean(e.val)
+        raise RuntimeError(f"Invalid literal/type combo at {e.val} : {e.type}")
+
+    def eval_nothing(self, e : ENothing, env : Frame) -> Value:
+        return nothing
+
+    ## print statement
+    def eval_print(self, e : PrintThen, env : Frame) -> Value:
+        print(e.message)
+        return self._eval(e.body, env)
+
+    ###############
+    ## Environment Extension
+    ###############
+
+    def eval_variable(self, e : Variable, env : Frame) -> Value:
+        return env.lookup(e)
+
+    def eval_let(self, e : Let, env : Frame) -> Value:
+        v = self._eval(e.bind, env)
+        env.bind(e.slot, v)
+        return self._eval(e.body, env)
+
+    ###############
+    ## Functions
+    ###############
+
+    def eval_lambda(self, e : Lambda, env : Frame) -> Value:
+        return Closure(e.var, env, e.body, e.frame_size)
+
+    def eval_app(self, e : Application, env : Frame) -> Value:
+        oper = self._eval(e.operator, env)
+
+        if not isinstance(oper, Closure):
+            raise RuntimeError(f"Expected a closure, found: {oper}")
+        operand = self._eval(e.operand, env)
+
+        return self.apply_closure(oper, operand)
+
+    ###############
+    ## Booleans
+    ###############
+
+    def eval_or(self, e : Or, env : Frame) -> Value:
+        b1 = self._eval(e.e1, env)
+        b2 = self._eval(e.e2, env)
+        if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+            raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+        return to_boolean(b1.value or b2.value)
+
+    def eval_and(self, e : And, env : Frame) -> Value:
+        b1 = self._eval(e.e1, env)
+        b2 = self._eval(e.e2, env)
+        if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+            raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+        return to_boolean(b1.value and b2.value)
+
+    def eval_not(self, e : Not, env : Frame) -> Value:
+        b1 = self._eval(e.e1, env)
+        if not isinstance(b1, VBoolean):
+            raise RuntimeError(f"Expected a boolean, got {b1}")
+        return to_boolean(not b1.value)
+
+    def eval_if(self, e : If, env : Frame) -> Value:
+        b = self._eval(e.test, env)
+        if not isinstance(b, VNothing) and not (isinstance(b, VBoolean) and not b.value):
+            return self._eval(e.consequent, env)
+        return self._eval(e.else_expr, env)
+
+    ###############
+    ## Numbers
+    ###############
+
+    def eval_plus(self, e : Plus, env : Frame) -> Value:
+        n1 = self._eval(e.e1, env)
+        n2 = self._eval(e.e2, env)
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            return list_arith(plus, n1, n2)
+        ty = merge_numeric_types(n1.type, n2.type)
+        return VNumber(plus(n1.value, n2.value), ty)
+
+    def eval_times(self, e : Times, env : Frame) -> Value:
+        n1 = self._eval(e.e1, env)
+        n2 = self._eval(e.e2, env)
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            return list_arith(times, n1, n2)
+        ty = merge_numeric_types(n1.type, n2.type)
+        return VNumber(times(n1.value, n2.value), ty)
+
+    def eval_divide(self, e : Divide, env : Frame) -> Value:
+        n1 = self._eval(e.e1, env)
+        n2 = self._eval(e.e2, env)
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+        return VNumber(divide(n1.value, n2.value), RATIONAL_TYPE)
+
+    def eval_mod(self, e : Mod, env : Frame) -> Value:
+        n1 = self._eval(e.e1, env)
+        n2 = self._eval(e.e2, env)
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+        ty = merge_numeric_types(n1.type, n2.type)
+        return VNumber(remainder(n1.value, n2.value), ty)
+
+    ###############
+    ## Strings
+    ###############
+
+    def eval_concat(self, e : Concat, env : Frame) -> Value:
+        s1 = self._eval(e.e1, env)
+        s2 = self._eval(e.e2, env)
+        if not (isinstance(s1, VString) and isinstance(s2, VString)):
+            raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+        return VString(s1.value + s2.value)
+
+    def eval_contains(self, e : Contains, env : Frame) -> Value:
+        s1 = self._eval(e.e1, env)
+        s2 = self._eval(e.e2, env)
+        if not (isinstance(s1, VString) and isinstance(s2, VString)):
+            raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+        return to_boolean(s1.value in s2.value)
+
+    ###############
+    ## Lists
+    ###############
+
+    def eval_list(self, e : List, env : Frame) -> Value:
+        ans = []
+        for a in e.values:
+            ans.append(self._eval(a, env))
+        return pack_list(ans, e.type)
+
+    def eval_append(self, e : Append, env : Frame) -> Value:
+        l1 = self._eval(e.e1, env)
+        l2 = self._eval(e.e2, env)
+        if not (isinstance(l1, VList) and isinstance(l2, VList)):
+            raise RuntimeError(f"Expected lists, got {l1}, {l2}")
+        return list_append(l1, l2)
+
+    def eval_empty(self, e : Empty, env : Frame) -> Value:
+        l1 = self._eval(e.e1, env)
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return to_boolean(l1.length() == 0)
+
+    def eval_car(self, e : Car, env : Frame) -> Value:
+        l1 = self._eval(e.e1, env)
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_car(l1)
+
+    def eval_cdr(self, e : Cdr, env : Frame) -> Value:
+        l1 = self._eval(e.e1, env)
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_cdr(l1)
+
+    def eval_length(self, e : Length, env : Frame) -> Value:
+        l1 = self._eval(e.e1, env)
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return VNumber(l1.length(), NAT_TYPE)
+
+    def eval_member(self, e : Member, env : Frame) -> Value:
+        x = self._eval(e.value, env)
+        l1 = self._eval(e.list, env)
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_member(x, l1)
+
+    ###############
+    ## Maybe
+    ###############
+
+    def eval_just(self, e : Just, env : Frame) -> Value:
+        v = self._eval(e.e1, env)
+        return VJust(v, v.type)
+
+
+## node class -> handler; subclasses get added on first use
+DISPATCH = {
+    Literal     : Interpreter.eval_literal,
+    ENothing    : Interpreter.eval_nothing,
+    PrintThen   : Interpreter.eval_print,
+    Variable    : Interpreter.eval_variable,
+    Let         : Interpreter.eval_let,
+    Lambda      : Interpreter.eval_lambda,
+    Application : Interpreter.eval_app,
+    Or          : Interpreter.eval_or,
+    And         : Interpreter.eval_and,
+    Not         : Interpreter.eval_not,
+    If          : Interpreter.eval_if,
+    Plus        : Interpreter.eval_plus,
+    Times       : Interpreter.eval_times,
+    Divide      : Interpreter.eval_divide,
+    Mod         : Interpreter.eval_mod,
+    Concat      : Interpreter.eval_concat,
+    Contains    : Interpreter.eval_contains,
+    List        : Interpreter.eval_list,
+    Append      : Interpreter.eval_append,
+    Empty       : Interpreter.eval_empty,
+    Car         : Interpreter.eval_car,
+    Cdr         : Interpreter.eval_cdr,
+    Length      : Interpreter.eval_length,
+    Member      : Interpreter.eval_member,
+    Just        : Interpreter.eval_just,
+}
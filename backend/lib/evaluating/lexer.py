@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_right
+from functools import wraps
+
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Single-pass tokenizer shared by the parsers.
+
+The source is scanned exactly once, producing a list of Tokens that
+carry their offsets into the original string. The parsers walk that
+list with a cursor instead of re-slicing the source, so parsing stays
+linear in the size of the input.
+
+Every Expr a parser builds gets a Span of offsets. Line and column are
+only worked out when asked for, from the line-start index in SourceMap.
+"""
+
+## token kinds
+NAME   = "name"
+NUMBER = "number"
+STRING = "string"
+OP     = "op"
+PUNCT  = "punct"
+EOF    = "eof"
+
+TOKEN_PATTERN = re.compile(r"""
+      (?P<ws>\s+)
+    | (?P<string>"[^"]*")
+    | (?P<number>-?[0-9]+(?:\.[0-9]+)?)
+    | (?P<name>[A-Za-z](?:[A-Za-z0-9_~]|-(?!>))*)
+    | (?P<op>[-+*/%=<>!&|]+)
+    | (?P<punct>[()\[\],:])
+""", re.VERBOSE)
+
+
+class Token():
+    def __init__(self, kind : str, text : str, start : int, end : int):
+        self.kind : str = kind
+        self.text : str = text
+        self.start : int = start
+        self.end : int = end
+
+    def __str__(self):
+        return f"({self.kind} {self.text} @ {self.start})"
+
+
+## offsets of the start of every line, for turning offsets into line/column
+class SourceMap():
+    __slots__ = ('line_starts',)
+
+    def __init__(self, source : str):
+        self.line_starts : list[int] = [0]
+        i = source.find("\n")
+        while i >= 0:
+            self.line_starts.append(i + 1)
+            i = source.find("\n", i + 1)
+
+    ## (line, column) of an offset, both counting from 1
+    def position(self, offset : int) -> (int, int):
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
+
+
+class Span():
+    __slots__ = ('start', 'end', 'lines')
+
+    def __init__(self, start : int, end : int, lines : SourceMap):
+        self.start : int = start
+        self.end : int = end
+        self.lines : SourceMap = lines
+
+    @property
+    def line(self) -> int:
+        return self.lines.position(self.start)[0]
+
+    @property
+    def col(self) -> int:
+        return self.lines.position(self.start)[1]
+
+    def __str__(self):
+        line, col = self.lines.position(self.start)
+        return f"{line}:{col}"
+
+
+## shared nodes (the base types) never get a span
+def _unspanned(e) -> bool:
+    return isinstance(e, Expr) and not e.interned and getattr(e, 'span', None) is None
+
+## gives e, and any lambdas curried inside it, the span if they have none
+def spread_span(e : Expr, span : Span):
+    while _unspanned(e):
+        e.span = span
+        if not isinstance(e, Lambda):
+            break
+        e = e.body
+
+
+## decorator for parser methods: spans the result over the tokens consumed
+def spanned(parse):
+    @wraps(parse)
+    def parse_spanned(self, *args):
+        start = self.peek().start
+        e = parse(self, *args)
+        if _unspanned(e):
+            e.span = self.span_from(start)
+        return e
+    return parse_spanned
+
+
+def tokenize(source : str) -> list[Token]:
+    tokens : list[Token] = []
+    match = TOKEN_PATTERN.match
+    i = 0
+    n = len(source)
+    while i < n:
+        m = match(source, i)
+        if m is None:
+            line, col = SourceMap(source).position(i)
+            if source[i] == "\"":
+                raise SyntaxError(f"Unterminated string literal at {line}:{col}")
+            raise SyntaxError(f"Unexpected character {source[i]!r} at {line}:{col}")
+        kind = m.lastgroup
+        j = m.end()
+        if kind != "ws":
+            tokens.append(Token(kind, m.group(), i, j))
+        i = j
+    tokens.append(Token(EOF, "", n, n))
+    return tokens
@@ -0,0 +1,282 @@
+from types import GeneratorType
+from loguru import logger
+
+
+try:
+    from ..defs import *
+    from .interp import Interpreter
+    from .vector import *
+    from .rational import *
+    from .tracing import tracer
+except:
+    from defs import *
+    from interp import Interpreter
+    from vector import *
+    from rational import *
+    from tracing import tracer
+
+"""
+Explicit-stack evaluation engine.
+
+The Interpreter recurses on the Python stack once per nested node and
+once per closure application, so deep recursion in a Plate program
+ends in a Python RecursionError. Machine evaluates the same programs
+with its own stack on the heap instead:
+
+   - a rule that needs the value of a subexpression is a generator that
+     yields (expr, frame) and is resumed with the resulting Value
+   - suspended rules wait on a list, so nesting only grows that list
+   - a rule whose last step is evaluating another expression (the
+     branches of an if, the body of a let, a closure body) returns a
+     TailCall instead, which replaces the rule on the stack, so tail
+     recursion in Plate runs in constant space
+
+Machine shares its driver with the Interpreter and produces the same
+Values; run.py selects it with --engine machine.
+"""
+
+## the rest of the evaluation is e in env; returned from rules in tail position
+class TailCall():
+    def __init__(self, e : Expr, env : Frame):
+        self.e : Expr = e
+        self.env : Frame = env
+
+
+class Machine(Interpreter):
+    def _eval(self, e : Expr, env : Frame) -> Value:
+        stack = []
+        out = self.step(e, env)
+        while True:
+            if type(out) is GeneratorType:
+                stack.append(out)
+                send = None
+            elif type(out) is TailCall:
+                out = self.step(out.e, out.env)
+                continue
+            elif not stack:
+                return out
+            else:
+                send = out
+            try:
+                e, env = stack[-1].send(send)
+            except StopIteration as done:
+                stack.pop()
+                out = done.value
+                continue
+            out = self.step(e, env)
+
+    ## starts evaluating e: a Value, a TailCall, or a suspended rule
+    def step(self, e : Expr, env : Frame):
+        rule = STEPS.get(e.__class__)
+        if rule is None:
+            rule = self.rule_for(e.__class__)
+        return rule(self, e, env)
+
+    def rule_for(self, cls : type):
+        for base in cls.__mro__:
+            if base in STEPS:
+                STEPS[cls] = STEPS[base]
+                return STEPS[cls]
+        if not issubclass(cls, Expr):
+            raise RuntimeError(f"Unknown expression in eval: {cls.__name__}")
+        STEPS[cls] = Interpreter.eval_unsupported
+        return STEPS[cls]
+
+    ###############
+    ## Base cases
+    ###############
+
+    def step_print(self, e : PrintThen, env : Frame):
+        print(e.message)
+        return TailCall(e.body, env)
+
+    ###############
+    ## Environment Extension
+    ###############
+
+    def step_let(self, e : Let, env : Frame):
+        v = yield e.bind, env
+        env.bind(e.slot, v)
+        return TailCall(e.body, env)
+
+    ###############
+    ## Functions
+    ###############
+
+    def step_app(self, e : Application, env : Frame):
+        oper = yield e.operator, env
+        if not isinstance(oper, Closure):
+            raise RuntimeError(f"Expected a closure, found: {oper}")
+        operand = yield e.operand, env
+        if tracer.on:
+            tracer.emit('apply', oper, operand)
+        inner = Frame(oper.frame_size, oper.env)
+        inner.bind(0, operand)
+        return TailCall(oper.body, inner)
+
+    ###############
+    ## Booleans
+    ###############
+
+    def step_or(self, e : Or, env : Frame):
+        b1 = yield e.e1, env
+        b2 = yield e.e2, env
+        if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+            raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+        return to_boolean(b1.value or b2.value)
+
+    def step_and(self, e : And, env : Frame):
+        b1 = yield e.e1, env
+        b2 = yield e.e2, env
+        if not (isinstance(b1, VBoolean) and isinstance(b2, VBoolean)):
+            raise RuntimeError(f"Expected booleans, got {b1}, {b2}")
+        return to_boolean(b1.value and b2.value)
+
+    def step_not(self, e : Not, env : Frame):
+        b1 = yield e.e1, env
+        if not isinstance(b1, VBoolean):
+            raise RuntimeError(f"Expected a boolean, got {b1}")
+        return to_boolean(not b1.value)
+
+    def step_if(self, e : If, env : Frame):
+        b = yield e.test, env
+        if not isinstance(b, VNothing) and not (isinstance(b, VBoolean) and not b.value):
+            return TailCall(e.consequent, env)
+        return TailCall(e.else_expr, env)
+
+    ###############
+    ## Numbers
+    ###############
+
+    def step_plus(self, e : Plus, env : Frame):
+        n1 = yield e.e1, env
+        n2 = yield e.e2, env
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            return list_arith(plus, n1, n2)
+        return VNumber(plus(n1.value, n2.value), merge_numeric_types(n1.type, n2.type))
+
+    def step_times(self, e : Times, env : Frame):
+        n1 = yield e.e1, env
+        n2 = yield e.e2, env
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            return list_arith(times, n1, n2)
+        return VNumber(times(n1.value, n2.value), merge_numeric_types(n1.type, n2.type))
+
+    def step_divide(self, e : Divide, env : Frame):
+        n1 = yield e.e1, env
+        n2 = yield e.e2, env
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+        return VNumber(divide(n1.value, n2.value), RATIONAL_TYPE)
+
+    def step_mod(self, e : Mod, env : Frame):
+        n1 = yield e.e1, env
+        n2 = yield e.e2, env
+        if not (isinstance(n1, VNumber) and isinstance(n2, VNumber)):
+            raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+        return VNumber(remainder(n1.value, n2.value), merge_numeric_types(n1.type, n2.type))
+
+    ###############
+    ## Strings
+    ###############
+
+    def step_concat(self, e : Concat, env : Frame):
+        s1 = yield e.e1, env
+        s2 = yield e.e2, env
+        if not (isinstance(s1, VString) and isinstance(s2, VString)):
+            raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+        return VString(s1.value + s2.value)
+
+    def step_contains(self, e : Contains, env : Frame):
+        s1 = yield e.e1, env
+        s2 = yield e.e2, env
+        if not (isinstance(s1, VString) and isinstance(s2, VString)):
+            raise RuntimeError(f"Expected strings, got {s1}, {s2}")
+        return to_boolean(s1.value in s2.value)
+
+    ###############
+    ## Lists
+    ###############
+
+    def step_list(self, e : List, env : Frame):
+        ans = []
+        for a in e.values:
+            ans.append((yield a, env))
+        return pack_list(ans, e.type)
+
+    def step_append(self, e : Append, env : Frame):
+        l1 = yield e.e1, env
+        l2 = yield e.e2, env
+        if not (isinstance(l1, VList) and isinstance(l2, VList)):
+            raise RuntimeError(f"Expected lists, got {l1}, {l2}")
+        return list_append(l1, l2)
+
+    def step_empty(self, e : Empty, env : Frame):
+        l1 = yield e.e1, env
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return to_boolean(l1.length() == 0)
+
+    def step_car(self, e : Car, env : Frame):
+        l1 = yield e.e1, env
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_car(l1)
+
+    def step_cdr(self, e : Cdr, env : Frame):
+        l1 = yield e.e1, env
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_cdr(l1)
+
+    def step_length(self, e : Length, env : Frame):
+        l1 = yield e.e1, env
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return VNumber(l1.length(), NAT_TYPE)
+
+    def step_member(self, e : Member, env : Frame):
+        x = yield e.value, env
+        l1 = yield e.list, env
+        if not isinstance(l1, VList):
+            raise RuntimeError(f"Expected a list, got {l1}")
+        return list_member(x, l1)
+
+    ###############
+    ## Maybe
+    ###############
+
+    def step_just(self, e : Just, env : Frame):
+        v = yield e.e1, env
+        return VJust(v, v.type)
+
+
+## node class -> rule; rules that never evaluate a subexpression are
+## shared with the Interpreter. Subclasses get added on first use.
+STEPS = {
+    Literal     : Interpreter.eval_literal,
+    ENothing    : Interpreter.eval_nothing,
+    PrintThen   : Machine.step_print,
+    Variable    : Interpreter.eval_variable,
+    Let         : Machine.step_let,
+    Lambda      : Interpreter.eval_lambda,
+    Application : Machine.step_app,
+    Or          : Machine.step_or,
+    And         : Machine.step_and,
+    Not         : Machine.step_not,
+    If          : Machine.step_if,
+    Plus        : Machine.step_plus,
+    Times       : Machine.step_times,
+    Divide      : Machine.step_divide,
+    Mod         : Machine.step_mod,
+    Concat      : Machine.step_concat,
+    Contains    : Machine.step_contains,
+    List        : Machine.step_list,
+    Append      : Machine.step_append,
+    Empty       : Machine.step_empty,
+    Car         : Machine.step_car,
+    Cdr         : Machine.step_cdr,
+    Length      : Machine.step_length,
+    Member      : Machine.step_member,
+    Just        : Machine.step_just,
+}
@@ -1,5 +1,7 @@
 from ..defs import *
 from .equiv import alpha_equiv, is_numeric_subtype
+from .hashcons import intern, retyped
+from .tracing import tracer
 from fractions import Fraction
 from traceback import format_exc
 from loguru import logger
@@ -32,6 +34,32 @@ Expressions Handled by Check:
 class NbEError(Exception):
     pass
 
+## normal forms of the base types, shared like the types themselves
+def _normal_base(cls : type) -> Type:
+    t = cls(UNIVERSE0)
+    t.flags = CHECKED | INTERNED
+    return t
+
+BASE_NORMAL : dict[type, Type] = {cls : _normal_base(cls) for cls in (TNat, TInt, TRational, TString, TBoolean)}
+
+## whether τ holds a bare Type (PLACEHOLDER), as in a variable bound
+## without a kind: what its printed form shows as "Type". Only a
+## Variable shows its own type
+def mentions_type(τ) -> bool:
+    pending = [τ]
+    while pending:
+        x = pending.pop()
+        if x.__class__ is Type:
+            return True
+        for k, v in node_fields(x):
+            if k == 'type' and not isinstance(x, Variable):
+                continue
+            if isinstance(v, (Expr, ENothing)):
+                pending.append(v)
+            elif isinstance(v, list):
+                pending.extend([y for y in v if isinstance(y, (Expr, ENothing))])
+    return False
+
 class Normalizer():
     def __init__(self):
         pass
@@ -51,32 +79,28 @@ class Normalizer():
     def synth_literal(self, l : Literal) -> Expr:
         t = l.type
         v = l.val
-        l.normalized = True
-        l.typed = True
+        l.flags |= CHECKED
         if (isinstance(v, str)):
-            res = Literal(v, TString())
+            res = Literal(v, STRING_TYPE)
         elif (isinstance(v, bool)):
-            res = Literal(v, TBoolean())
+            res = Literal(v, BOOLEAN_TYPE)
         elif (isinstance(v, int) and (v >= 0)):
-            res = Literal(v, TNat())
+            res = Literal(v, NAT_TYPE)
         elif isinstance(v, int):
-            res = Literal(v, TInt())
+            res = Literal(v, INT_TYPE)
         elif isinstance(v, Fraction):
-            res = Literal(v, TRational())
-            raise NotImplementedError
+            res = Literal(v, RATIONAL_TYPE)
         elif isinstance(v, float):
             raise NotImplementedError
         else:
             raise NbEError(f"Found Invalid literal/type combo at {v} : {t}")
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_print(self, Γ : Context, e : PrintThen) -> PrintThen:
         e = self.synth(Γ, e)
         res = PrintThen(e.type, e)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_app(self, Γ : Context, e : Application) -> Expr:
@@ -85,16 +109,15 @@ class Normalizer():
         else:
             op = e.operator
         #logger.info(Γ)
-        logger.info(e.operator)
         # op = self.synth(Γ, e.operator)
-        logger.info(op.type)
         if isinstance(op.type.input, Variable):
             arg = self.check(Γ, e.operand, op.type.input.type)
             input_ty = op.type.input.type
         else:
             arg = self.check(Γ, e.operand, op.type.input)
             input_ty = op.type.input
-        logger.info(arg)
+        if tracer.on:
+            tracer.emit('synth_app', op, arg)
         #logger.info(f'{op}, {op.type}')
         #logger.info(f'{arg}, {arg.type}')
         if not (isinstance(op.type, TFunction) or isinstance(op.type, TForAll)):
@@ -107,8 +130,7 @@ class Normalizer():
 
             raise NbEError(f"Invalid Argument type when expecting {input_ty}: {arg_ty} for {arg}")
         if isinstance(op, Lambda):
-            Γ2 = Γ.copy()
-            Γ2.extend(op.var, arg)
+            Γ2 = Γ.extend(op.var, arg)
             return self.check(Γ2, op.body, op.body.type)
         else:
             res = Application(op, arg)
@@ -120,8 +142,7 @@ class Normalizer():
                 new_ty = Let(Variable("_f", TFunction(arg.type, op.type)),
                              Lambda(Variable("_a", arg.type)))
                 res_type = self.synth()
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
         return res
         
     def synth_if(self, Γ : Context, e : If) -> Expr:
@@ -139,8 +160,7 @@ class Normalizer():
                 return els
         else:
             res = If(test, conseq, els, conseq.type)
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
             return res
 
 
@@ -158,8 +178,7 @@ class Normalizer():
             res = Literal(out_v, out_ty)
         else:
             res = Plus(e1, e2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_times(self, Γ : Context, e : Times) -> Expr:
@@ -176,8 +195,7 @@ class Normalizer():
             res = Literal(out_v, out_ty)
         else:
             res = Times(e1, e2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_or(self, Γ : Context, e : Or) -> Expr:
@@ -189,11 +207,10 @@ class Normalizer():
             raise NbEError(f"Non-boolean type in Or e2: {e2.type}")
         if isinstance(e1, Literal) and isinstance(e2, Literal):
             out_v = e1.val or e2.val
-            res = Literal(out_v, TBoolean())
+            res = Literal(out_v, BOOLEAN_TYPE)
         else:
             res = Or(e1, e2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_and(self, Γ : Context, e : And) -> Expr:
@@ -205,11 +222,10 @@ class Normalizer():
             raise NbEError(f"Non-boolean type in And e2: {e2.type}")
         if isinstance(e1, Literal) and isinstance(e2, Literal):
             out_v = e1.val and e2.val
-            res = Literal(out_v, TBoolean())
+            res = Literal(out_v, BOOLEAN_TYPE)
         else:
             res = And(e1, e2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_not(self, Γ : Context, e : Not) -> Expr:
@@ -218,11 +234,10 @@ class Normalizer():
             raise NbEError(f"Non-boolean type in Not: {e1.type}")
         if isinstance(e1, Literal):
             out_v = not e1.val
-            res = Literal(out_v, TBoolean())
+            res = Literal(out_v, BOOLEAN_TYPE)
         else:
             res = Not(e1)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
 
     ## equality only normalizes when both inputs are literals
@@ -231,11 +246,10 @@ class Normalizer():
         e2 = self.synth(Γ, e.e2)
         if isinstance(e1, Literal) and isinstance(e2, Literal):
             out_v = e1.val == e2.val
-            res = Literal(out_v, TBoolean())
+            res = Literal(out_v, BOOLEAN_TYPE)
         else:
             res = Equal(e1, e2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
         
     def synth_concat(self, Γ : Context, e : Concat) -> Expr:
@@ -247,11 +261,10 @@ class Normalizer():
             raise NbEError(f"Non-string type in Concat e2: {s2.type}")
         if isinstance(s1, Literal) and isinstance(s2, Literal):
             out_v = s1.val + s2.val
-            res = Literal(out_v, TString())
+            res = Literal(out_v, STRING_TYPE)
         else:
             res = Concat(s1, s2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_contains(self, Γ : Context, e : Contains) -> Expr:
@@ -263,11 +276,10 @@ class Normalizer():
             raise NbEError(f"Non-string type in Contains e2: {s2.type}")
         if isinstance(s1, Literal) and isinstance(s2, Literal):
             out_v = s1.val + s2.val
-            res = Literal(out_v, TString())
+            res = Literal(out_v, STRING_TYPE)
         else:
             res = Contains(s1, s2)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_append(self, Γ : Context, e : Append) -> Expr:
@@ -284,8 +296,7 @@ class Normalizer():
             res = List(out_v, s1.type)
         else:
             res = Append(s1, s2, s1.type)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_empty(self, Γ : Context, e : Empty) -> Expr:
@@ -294,11 +305,10 @@ class Normalizer():
             raise NbEError(f"Non-list type in Empty e1: {l.type}")
         if isinstance(l, List):
             out_v = len(l.values) == 0
-            res = Literal(out_v, TBoolean())
+            res = Literal(out_v, BOOLEAN_TYPE)
         else:
             res = Empty(l)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_length(self, Γ : Context, e : Length) -> Expr:
@@ -307,11 +317,10 @@ class Normalizer():
             raise NbEError(f"Non-list type in Empty e1: {l.type}")
         if isinstance(l, List):
             out_v = len(l.values)
-            res = Literal(out_v, TNat())
+            res = Literal(out_v, NAT_TYPE)
         else:
             res = Length(l)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     ## only evaluates if value and all list elements are literals
@@ -323,17 +332,15 @@ class Normalizer():
         if isinstance(x, Literal) and isinstance(l, List):
             all_literals = all([isinstance(e, Literal) for e in l.values])
             if all_literals:
-                res = Literal(False, TBoolean())
+                res = Literal(False, BOOLEAN_TYPE)
                 for v in l.values:
                     if isinstance(v, Literal):
                         if x.val == v.val:
-                            res = Literal(True, TBoolean())
-                res.normalized = True
-                res.typed = True
+                            res = Literal(True, BOOLEAN_TYPE)
+                res.flags |= CHECKED
                 return res
         res = Member(x, l)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
     
     def synth_let(self, Γ : Context, e : Let) -> Expr:
@@ -341,92 +348,114 @@ class Normalizer():
         x : Variable = e.var
         a = self.check(Γ, e.bind, x.type)
         #logger.info(e.bind)
-        Γ2 = Γ.copy()
-        Γ2.extend(x, a)
+        Γ2 = Γ.extend(x, a)
         return self.synth(Γ2, e.body)
     
     def synth_induct_nat(self, Γ : Context, arg : Expr, out_type : Expr, inds : Expr, base : Expr, inst_type : Expr):
-        base_type = self.synth(Application(out_type, Literal(0)))
+        base_type = self.synth(Γ, Application(out_type, Literal(0, NAT_TYPE)))
         base = self.check(Γ, base, base_type)
-        new_var = Variable("_n", TNat())
-        Γ2 = Γ.copy()
-        Γ2.extend(new_var, new_var)
+        new_var = Variable("_n", NAT_TYPE)
+        Γ2 = Γ.extend(new_var, new_var)
         rec_type = self.synth(Γ2, Application(out_type, new_var)) 
-        ind_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, TNat()), new_var))) 
+        ind_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, NAT_TYPE), new_var))) 
         ind_type = TForAll(new_var, TForAll(Variable("_IH", rec_type), ind_step))
         ind = self.check(Γ, inds[0], ind_type)
-        def synth_induct_nat_helper(e : Expr):
+        return self.unfold_number(Γ, arg, base, ind, None, out_type, [ind], inst_type)
+
+    ## Unfolds induct on a number. Literal offsets are peeled off arg down
+    ## to 0 (or to a neutral term, where induct stays stuck); each offset
+    ## n then folds ind_pos (n > 0) or ind_neg (n < 0) over the numbers
+    ## between, innermost first.
+    def unfold_number(self, Γ : Context, arg : Expr, base : Expr, ind_pos : Expr, ind_neg : Expr,
+                      out_type : Expr, inds : list[Expr], inst_type : Expr) -> Expr:
+        segments = []
+        e = arg
+        while True:
             if isinstance(e, Literal):
-                if (e.val == 0):
-                    return base
-                else:
-                    v = synth_induct_nat_helper(Literal(e.val - 1, TNat()))
-                    return self.synth(Γ, Application(Application(ind, e.val - 1), v))
-            elif isinstance(e, Plus):
-                if isinstance(e.e1, Literal) and isinstance(e.e1.type, TNat):
-                    if e.e1.val == 0:
-                        raise NbEError(f"Found 0 at top of normalized plus: {e}")
-                    elif e.e1.val < 0:
-                        raise NbEError(f"Found negative in TNat Literal")
-                    else:
-                        v = synth_induct_nat_helper(Plus(Literal(e.e1.val - 1, TNat), e.e2))
-                        return self.synth(Γ, Application(Application(ind, e.e1.val - 1), v))
-                else:
-                    res = Induct(e, out_type, base, [ind], inst_type)
-                    res.normalized = True
-                    res.typed = True
-                    return res
-                
-        return synth_induct_nat_helper(arg)
+                n, rest = e.val, None
+            elif isinstance(e, Plus) and isinstance(e.e1, Literal):
+                n, rest = e.e1.val, e.e2
+                if n == 0:
+                    raise NbEError(f"Found 0 at top of normalized plus: {e}")
+            else:
+                v = self.stuck_induct(Γ, e, out_type, base, inds, arg, inst_type)
+                break
+            if n < 0 and ind_neg is None:
+                raise NbEError(f"Found negative in TNat Literal")
+            ## the step from k to k+1 (or k-1) for each k from 0 towards n
+            if n > 0:
+                segments.append((ind_pos, self.offsets(Γ, range(0, n), rest)))
+            elif n < 0:
+                segments.append((ind_neg, self.offsets(Γ, range(0, n, -1), rest)))
+            if rest is None:
+                v = base
+                break
+            e = rest
+        for ind, ks in reversed(segments):
+            v = self.fold_induct(Γ, ind, ks, v)
+        return v
+
+    ## the normalized numbers k + rest for k in ks (just k if rest is None)
+    def offsets(self, Γ : Context, ks : range, rest : Expr):
+        for k in ks:
+            if rest is None:
+                yield self.number(k)
+            elif k == 0:
+                yield rest
+            else:
+                yield self.synth(Γ, Plus(self.number(k), rest))
+
+    def number(self, k : int) -> Literal:
+        res = Literal(k, NAT_TYPE if k >= 0 else INT_TYPE)
+        res.flags |= CHECKED
+        return res
+
+    ## Applies the curried step ind to each k in ks and the result so far.
+    ## When ind is a lambda [k] [ih] : body (it has already been checked),
+    ## each step only normalizes body with k and ih bound, instead of
+    ## building and re-checking two applications of ind.
+    def fold_induct(self, Γ : Context, ind : Expr, ks, v : Expr) -> Expr:
+        if isinstance(ind, Lambda) and isinstance(ind.body, Lambda):
+            k_var = ind.var
+            ih_var = ind.body.var
+            body = ind.body.body
+            body_type = ind.body.type.output
+            for k in ks:
+                v = self.check(Γ.extend(k_var, k).extend(ih_var, v), body, body_type)
+            return v
+        for k in ks:
+            v = self.synth(Γ, Application(Application(ind, k), v))
+        return v
+
+    ## induct on a neutral e, which is what remains of arg after unfolding
+    def stuck_induct(self, Γ : Context, e : Expr, out_type : Expr, base : Expr, inds : list[Expr], arg : Expr, inst_type : Expr) -> Induct:
+        if e is not arg:
+            inst_type = self.synth(Γ, Application(out_type, e))
+        res = Induct(e, out_type, base, inds, inst_type)
+        res.flags |= CHECKED
+        return res
 
     def synth_induct_int(self, Γ : Context, arg : Expr, out_type : Expr, inds : Expr, base : Expr, inst_type : Expr):
-        base_type = self.synth(Application(out_type, Literal(0)))
+        base_type = self.synth(Γ, Application(out_type, Literal(0, INT_TYPE)))
         base = self.check(Γ, base, base_type)
-        new_var = Variable("_i", TInt())
-        Γ2 = Γ.copy()
-        Γ2.extend(new_var, new_var)
+        new_var = Variable("_i", INT_TYPE)
+        Γ2 = Γ.extend(new_var, new_var)
         rec_type = self.synth(Γ2, Application(out_type, new_var)) 
-        ind_pos_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, TNat()), new_var))) 
-        ind_neg_step = self.synth(Γ2, Application(out_type, Plus(Literal(-1, TInt()), new_var))) 
+        ind_pos_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, NAT_TYPE), new_var))) 
+        ind_neg_step = self.synth(Γ2, Application(out_type, Plus(Literal(-1, INT_TYPE), new_var))) 
         ind_type_pos = TForAll(new_var, TForAll(Variable("_IH", rec_type), ind_pos_step))
         ind_type_neg = TForAll(new_var, TForAll(Variable("_IH", rec_type), ind_neg_step))
         ind_pos = self.check(Γ, inds[0], ind_type_pos)
         ind_neg = self.check(Γ, inds[1], ind_type_neg)
-        def synth_induct_int_helper(e : Expr):
-            if isinstance(e, Literal):
-                if (e.val == 0):
-                    return base
-                elif (e.val < 0):
-                    v = synth_induct_int_helper(Literal(e.val + 1, TInt()))
-                    return self.synth(Γ, Application(ind_neg, v))
-                else:
-                    v = synth_induct_int_helper(Literal(e.val - 1, TNat()))
-                    return self.synth(Γ, Application(ind_pos, v))
-            elif isinstance(e, Plus):
-                if isinstance(e.e1, Literal) and isinstance(e.e1.type, TNat):
-                    if e.e1.val == 0:
-                        raise NbEError(f"Found 0 at top of normalized plus: {e}")
-                    elif e.e1.val < 0:
-                        v = synth_induct_int_helper(Plus(Literal(e.e1.val + 1, TInt()), e.e2))
-                        return self.synth(Γ, Application(ind_neg, v))
-                    else:
-                        v = synth_induct_int_helper(Plus(Literal(e.e1.val - 1, TNat()), e.e2))
-                        return self.synth(Γ, Application(ind_pos, v))
-                else:
-                    res = Induct(e, out_type, base, [ind_pos, ind_neg], inst_type)
-                    res.normalized = True
-                    res.typed = True
-                    return res
-        return synth_induct_int_helper(arg)
+        return self.unfold_number(Γ, arg, base, ind_pos, ind_neg, out_type, [ind_pos, ind_neg], inst_type)
     
     def synth_induct_maybe(self, Γ : Context, arg : Expr, out_type : Expr, inds : Expr, base : Expr, inst_type : Expr):
         base_type = self.synth(Application(out_type, Literal(0)))
         base = self.check(Γ, base, base_type)
         new_var = Variable("_maybe", arg.type)
-        Γ2 = Γ.copy()
-        Γ2.extend(new_var, new_var)
+        Γ2 = Γ.extend(new_var, new_var)
         rec_type = self.synth(Γ2, Application(out_type, new_var)) 
-        ind_pos_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, TNat()), new_var)))
+        ind_pos_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, NAT_TYPE), new_var)))
         ind_type_pos = TForAll(Variable("_IH", rec_type), ind_pos_step)
         ind = self.check(Γ, inds[0], ind_type_pos)
         def synth_induct_maybe_helper(e : Expr):
@@ -436,46 +465,37 @@ class Normalizer():
                 return self.check(Γ, Application(ind, e.e1), rec_type, inst_type)
             else:
                 res = Induct(e, out_type, base, [ind], inst_type)
-                res.normalized = True
-                res.typed = True
+                res.flags |= CHECKED
                 return res
         return synth_induct_maybe_helper(arg)
     
     def synth_induct_list(self, Γ : Context, arg : Expr, out_type : Expr, inds : Expr, base : Expr, inst_type : Expr):
-        base_type = self.synth(Γ, Application(out_type, Literal(0, TNat())))
+        base_type = self.synth(Γ, Application(out_type, List([], arg.type)))
         base = self.check(Γ, base, base_type)
-        new_var = Variable("_elem", arg.type.type)
+        new_var = Variable("_elem", arg.type.contents)
         ls      = Variable("_ls", arg.type)
-        Γ2 = Γ.copy()
-        Γ2.extend(new_var, new_var)
-        Γ2.extend(ls, ls)
-        rec_type = self.synth(Γ2, Application(out_type, new_var)) 
-        ind_step = self.synth(Γ2, Application(out_type, Plus(Literal(1, TNat()), new_var))) 
+        Γ2 = Γ.extend(new_var, new_var).extend(ls, ls)
+        rec_type = self.synth(Γ2, Application(out_type, ls))
+        ind_step = self.synth(Γ2, Application(out_type, Append(List([new_var], arg.type), ls, arg.type)))
         ind_type = TForAll(new_var, TForAll(Variable("_IH", rec_type), ind_step))
         ind = self.check(Γ, inds[0], ind_type)
-        def synth_induct_list_helper(e : Expr):
+        ## collect the known heads of the list on an explicit stack down to
+        ## [] (or to a neutral tail, where induct stays stuck), then apply
+        ## the step to each head from the last one back
+        heads = []
+        e = arg
+        while True:
             if isinstance(e, List):
-                if len(e.values) == 0:
-                    return base
-                else:
-                    new_ls = List(e.values[1:].copy(), e.type)
-                    v = synth_induct_list_helper(new_ls)
-                    return self.synth(Γ, Application(Application(ind, e.values[0]), v))
-            elif isinstance(e, Append):
-                if isinstance(e.e1, List):
-                    if len(e.e1.values) == 0:
-                        raise NbEError(f"Found empty list at top of normalized append: {e}")
-                    else:
-                        new_ls = List(e.e1.values[1:].copy(), e.e1.type)
-                        v = synth_induct_list_helper(Append(new_ls, e.e2))
-                        return self.synth(Γ, Application(Application(ind, e.e1.values[0]), v))
-                else:
-                    res = Induct(e, out_type, base, [ind], inst_type)
-                    res.normalized = True
-                    res.typed = True
-                    return res
-                
-        return synth_induct_list_helper(arg)
+                heads.extend(e.values)
+                v = base
+                break
+            elif isinstance(e, Append) and isinstance(e.e1, List):
+                heads.extend(e.e1.values)
+                e = e.e2
+            else:
+                v = self.stuck_induct(Γ, e, out_type, base, [ind], arg, inst_type)
+                break
+        return self.fold_induct(Γ, ind, reversed(heads), v)
     
     def synth_induct_either(self, Γ : Context, arg : Expr, out_type : Expr, inds : Expr, base : Expr, inst_type : Expr):
         raise NotImplementedError
@@ -485,14 +505,21 @@ class Normalizer():
 
     def synth_induct(self, Γ : Context, e : Induct) -> Expr:
         arg = self.synth(Γ, e.arg)
-        out_type = self.synth(Γ, e.out_type)
+        ## synth has no rule for lambdas, so a motive written in place is
+        ## checked as a function from the argument's type into types
+        if isinstance(e.out_type, Lambda):
+            motive_ty = TFunction(Variable("_motive", arg.type), UNIVERSE0)
+            out_type = self.check(Γ, e.out_type, motive_ty)
+        else:
+            out_type = self.synth(Γ, e.out_type)
         if not isinstance(out_type, Lambda):
             raise NbEError(f"Not a Lambda: {out_type}")
-        if not alpha_equiv(arg.type, out_type.var.type):
+        if not (alpha_equiv(arg.type, out_type.var.type) or is_numeric_subtype(arg.type, out_type.var.type)):
             raise NbEError(f"Invalid type function input type for {arg.type} : {out_type.var.type}")
         
         inst_type = self.synth(Γ, Application(out_type, arg))
-        if isinstance(arg.type, TNat):
+        ## a Nat passed to a motive over Int is inducted on as an Int
+        if isinstance(arg.type, TNat) and isinstance(out_type.var.type, TNat):
             return self.synth_induct_nat(Γ, arg, out_type, e.inds, e.base, inst_type)
         if isinstance(arg.type, TInt):
             return self.synth_induct_int(Γ, arg, out_type, e.inds, e.base, inst_type)
@@ -554,6 +581,9 @@ class Normalizer():
             res = self.synth_member(Γ, e)
         elif isinstance(e, Length):
             res = self.synth_length(Γ, e)
+        elif isinstance(e, List) and isinstance(e.type, TList) and type(e.type.contents) is not Type:
+            ## lists built with their element type (as induct does) check against it
+            res = self.check_list(Γ, e, e.type)
 
         ## Environment Mutation
         elif isinstance(e, Let):
@@ -570,82 +600,58 @@ class Normalizer():
             level = self.synth(Γ, e.level)
             if not isinstance(level.type, TNat):
                 raise NbEError(f"Expected universe level to have nat type, got: {level}")
-            level = self.check(Γ, Plus(Literal(1, TNat()), level), TNat())
-            level2 = self.check(Γ, Plus(Literal(2, TNat()), level), TNat())
+            level = self.check(Γ, Plus(Literal(1, NAT_TYPE), level), NAT_TYPE)
+            level2 = self.check(Γ, Plus(Literal(2, NAT_TYPE), level), NAT_TYPE)
             res = TUniverse(level)
             res.type = TUniverse(level2)
-            res.normalized = True
-            res.typed = True
-        elif isinstance(e, TNat):
-            res = TNat()
-            res.type = TUniverse(Literal(0, TNat()))
-            res.normalized = True
-            res.typed = True
-        elif isinstance(e, TInt):
-            res = TInt()
-            res.type = TUniverse(Literal(0, TNat()))
-            res.normalized = True
-            res.typed = True
-        elif isinstance(e, TRational):
-            res = TRational()
-            res.type = TUniverse(Literal(0, TNat()))
-            res.normalized = True
-            res.typed = True
-        elif isinstance(e, TString):
-            res = TString()  
-            res.type = TUniverse(Literal(0, TNat()))
-            res.normalized = True
-            res.typed = True
-        elif isinstance(e, TBoolean):
-            res = TBoolean()  
-            res.type = TUniverse(Literal(0, TNat()))
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
+        elif e.__class__ in BASE_NORMAL:
+            res = BASE_NORMAL[e.__class__]
         elif isinstance(e, TEither):
             lft = self.synth(Γ, e.left)
             rght = self.synth(Γ, e.right)
             if not (isinstance(lft.type, TUniverse) and isinstance(rght.type, TUniverse)):
                 raise NbEError(f"Expected either subtypes type to be universe, got: {lft.type}, {rght.type}")
-            level = self.check(Γ, Plus(Literal(1, TNat()), Max(lft.type.level, rght.type.level)), TNat())
+            level = self.check(Γ, Plus(Literal(1, NAT_TYPE), Max(lft.type.level, rght.type.level)), NAT_TYPE)
             res_ty = TUniverse(level)
-            res_ty.normalized = True
-            res_ty.typed = True
+            res_ty.flags |= CHECKED
             res = TEither(lft.type, rght.type, res_ty)
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
 
         elif isinstance(e, TList):
             elem_ty = self.synth(Γ, e.contents)
             if isinstance(elem_ty, TUniverse):
-                level = self.check(Γ, Plus(Literal(1, TNat()), elem_ty.level), TNat())
+                level = self.check(Γ, Plus(Literal(1, NAT_TYPE), elem_ty.level), NAT_TYPE)
                 res_ty = TUniverse(elem_ty.level+1)
+                res_ty.flags |= CHECKED
             else:
-                res_ty = TUniverse(Literal(0, TNat()))
-            res_ty.normalized = True
-            res_ty.typed = True
+                res_ty = UNIVERSE0
             res = TList(elem_ty, res_ty)
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
+        ## Plates hold machine ints only: they live in one typed buffer
+        elif isinstance(e, TPlate):
+            elem_ty = self.synth(Γ, e.contents)
+            if not (isinstance(elem_ty, TNat) or isinstance(elem_ty, TInt)):
+                raise NbEError(f"Expected Nat or Int for the elements of a Plate, got: {elem_ty}")
+            res = TPlate(elem_ty, UNIVERSE0)
+            res.flags |= CHECKED
         elif isinstance(e, TMaybe):
             subty = self.synth(Γ, e.subtype)
             if not isinstance(subty, TUniverse):
                 raise NbEError(f"Expected maybe subtype type to be universe, got: {subty}")
-            level = self.check(Γ, Plus(Literal(1, TNat()), subty.level), TNat())
+            level = self.check(Γ, Plus(Literal(1, NAT_TYPE), subty.level), NAT_TYPE)
             res_ty = TUniverse(level)
             res = TList(elem_ty, res_ty)
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
         elif isinstance(e, TFunction):
-            Γ2 = Γ.copy()
-            Γ2.extend(e.input, e.input)
+            Γ2 = Γ.extend(e.input, e.input)
             body = self.synth(Γ2, e.output)
             res = TFunction(e.input, body)
             if not isinstance(body.type, TUniverse):
                 raise NbEError(f"Expected function output type type to be universe, got: {body.type}")
-            level = self.check(Γ, Plus(Literal(1, TNat()), body.type.level), TNat())
+            level = self.check(Γ, Plus(Literal(1, NAT_TYPE), body.type.level), NAT_TYPE)
             res.type = TUniverse(level)
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
         elif isinstance(e, TEqual):
             raise NotImplementedError
         elif isinstance(e, TForAll):
@@ -658,7 +664,7 @@ class Normalizer():
             raise NbEError(f"Unknown Expression in synth: {e}")
         assert isinstance(res, Expr)
         assert res.normalized and res.typed
-        return res
+        return intern(res)
 
     ###############
     ## Check Helpers
@@ -671,8 +677,7 @@ class Normalizer():
             logger.error(Γ)
             raise NbEError(f"Expected function type for Lambda {e}, got: {τ}")
         x = e.var
-        Γ2 = Γ.copy()
-        Γ2.extend(x, x)
+        Γ2 = Γ.extend(x, x)
         if isinstance(τ, TFunction):
             b : Expr = self.check(Γ2, e.body, τ.output)
         elif isinstance(τ, TForAll):
@@ -681,9 +686,7 @@ class Normalizer():
             raise NbEError(f"Invalid function type: {τ}")
         res = Lambda([x], b)
         res.type = τ
-        res.normalized = True
-        res.typed = True
-        logger.info(res)
+        res.flags |= CHECKED
         return res
     
     def check_list(self, Γ, e : List, τ : Type) -> Expr:
@@ -692,8 +695,7 @@ class Normalizer():
         ty_elems = τ.contents
         vs = [self.check(Γ, elem, ty_elems) for elem in e.values]
         res = List(vs, TList(ty_elems))
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
 
     def check_left(self, Γ, e : Left, τ : Type) -> Expr:
@@ -702,8 +704,7 @@ class Normalizer():
         ty = τ.left
         r = self.check(Γ, e.e1, ty)
         res = Left(r, τ)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
 
     def check_right(self, Γ, e : Right, τ : Type) -> Expr:
@@ -712,8 +713,7 @@ class Normalizer():
         ty = τ.right
         r = self.check(Γ, e.e1, ty)
         res = Right(r, τ)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
 
     ## Maybe Expressions
     def check_nothing(self, Γ, e : ENothing, τ : Type) -> Expr:
@@ -721,8 +721,7 @@ class Normalizer():
             raise NbEError(f"Expected Maybe type for nothing, got: {τ}")
     
         res = ENothing(τ)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
 
     def check_just(self, Γ, e : Just, τ : Type) -> Expr:
         body = e.e1
@@ -732,8 +731,7 @@ class Normalizer():
         else:
             e = self.check(Γ, body, τ.type)
             res = Just(e, TMaybe(e.type))
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
             
     ## = Expressions
     def check_refl(self, Γ, e : Refl, τ : Type) -> Expr:
@@ -746,8 +744,7 @@ class Normalizer():
             raise NbEError(f"Invalid type for {ex}: {τ}")
         else:
             res = Refl(ex, TEqual(ex.type, ex, ex))
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
             return res
         
     def check_symm(self, Γ, e : Symm, τ : Type) -> Expr:
@@ -755,8 +752,7 @@ class Normalizer():
             raise NbEError(f"Expected Equal type for symm, got: {τ}")
         e = self.check(Γ, e.body, TEqual(τ.type, τ.rhs, τ.lhs))
         res = Symm(e, τ)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
 
     def check_trans(self, Γ, e : Trans, τ : Type) -> Expr:
@@ -774,8 +770,7 @@ class Normalizer():
         if not alpha_equiv(res_ty, τ):
             raise NbEError(f"Invalid final type terms for trans: Expected {τ}, got {res_ty}")
         res = Trans(e1, e2, res_ty)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         
     
     def check_cong(self, Γ, e : Cong, τ : Type) -> Expr:
@@ -793,8 +788,7 @@ class Normalizer():
         f_e2 = self.check(Γ, Application(op, e2), τ.type)
         res_ty = TEqual(τ.type, f_e1, f_e2)
         res = Cong(op, exp, res_ty)
-        res.normalized = True
-        res.typed = True
+        res.flags |= CHECKED
         return res
         
     ## Σ Expressions
@@ -817,8 +811,7 @@ class Normalizer():
         else:
             res = Car(e)
             res.type = e.type.var_type
-            res.normalized = True
-            res.typed = True
+            res.flags |= CHECKED
             return res
         
 
@@ -827,7 +820,8 @@ class Normalizer():
 
     def check(self, Γ : Context, e: Expr, τ : Type) -> Expr:
         res = None
-        logger.debug(f"in check with {e}, {τ}")
+        if tracer.on:
+            tracer.emit('check', e, τ)
         # if 'Type' in str(type(τ)):
         #     raise ValueError(f'cannot check Type for: {e}')
         if isinstance(e, Lambda):
@@ -855,21 +849,20 @@ class Normalizer():
 
         else:
             e2 = self.synth(Γ, e)
-            logger.debug(e2)
-            logger.debug(e2.type)
-            logger.debug(τ)
             α = alpha_equiv(e2.type, τ)
-            if 'Type' in str(τ) and ('Type' not in str(e2.type)):
+            if mentions_type(τ) and not mentions_type(e2.type):
                 res = e2
             elif α or is_numeric_subtype(e2.type, τ):
-                e2.type = τ
-                res = e2
+                ## e2 may be shared, so retype a copy
+                res = retyped(e2, τ)
             else:
                 raise NbEError(f"Encounted invalid type from synth case of check when expecting {τ}: {e2.type}")
         try:
             assert isinstance(res, Expr)
             assert res.normalized and res.typed
-            return res
+            if tracer.on:
+                tracer.emit('checked', res, τ)
+            return intern(res)
         except Exception as err:
             logger.error(format_exc())
             logger.error(f"Error for exp type {type(res)}: {res}")
@@ -3,46 +3,53 @@ from fractions import Fraction
 
 try:
     from ..defs import *
+    from .lexer import *
+    from .rational import parse_rational
 except:
     from defs import *
+    from lexer import *
+    from rational import parse_rational
 
 class Parser():
     def __init__(self, content=""):
         self.parsing = content
 
-        self.total_chars = len(self.parsing)
-        ## to use when we fix next()
+        self.tokens : list[Token] = tokenize(content)
+        self.total_tokens = len(self.tokens)
+        self.lines : SourceMap = SourceMap(content)
+        self.pos = 0
         self.char_index = 0
-        self.line_number = 1
-        self.line_index = 1
 
+    ## span from offset start to the end of the last consumed token
+    def span_from(self, start : int) -> Span:
+        end = self.tokens[self.pos - 1].end if self.pos > 0 else start
+        return Span(start, max(start, end), self.lines)
 
-    def eoe(self) -> int:
-        i = self.total_chars
-        for c in DELIMS:
-            j = self.parsing.find(c)
-            if j > 0:
-                i = min(i, j)
-                # logger.info(f"Using {c} : {i} in {self.parsing} as delimiter")
-        return i
+    ## line:column of the cursor, for error messages
+    def location(self) -> str:
+        line, col = self.lines.position(self.char_index)
+        return f"{line}:{col}"
 
+    ## the token k places past the cursor (the final EOF token once exhausted)
+    def peek(self, k : int=0) -> Token:
+        return self.tokens[min(self.pos + k, self.total_tokens - 1)]
 
     # find the next token (used when expecting a new Phrase or Expression)
     def next(self) -> str:
-        ## todo fix this to manually count whitespace
-        
-        self.parsing = self.parsing.strip()
-        i = self.eoe()
-        
-        s = self.parsing[:i]
-
-        # logger.debug(f"Next finds: {s}")
-        return s.strip()
+        return self.tokens[self.pos].text
     
     ## move past the first token
     def skip(self):
-        i = self.eoe()
-        self.parsing = self.parsing[i:].strip()
+        if self.pos < self.total_tokens - 1:
+            self.pos += 1
+        self.char_index = self.tokens[self.pos].start
+
+    ## move past the first token, which must be s
+    def expect(self, s : str, context : str):
+        t = self.next()
+        if t != s:
+            raise SyntaxError(f"Expected '{s}' {context}, found {t} at {self.location()}")
+        self.skip()
     
     ## calls helper function depending on keyword type
     def dispatch(self, token : str) -> Expr:
@@ -59,66 +66,55 @@ class Parser():
     ## parsing literals
     ###################################
 
+    @spanned
     def parse_list(self) -> List:
         # logger.debug("calling parse list")
-        bracket = self.parsing[0]
+        bracket = self.next()
         if bracket != "[":
             raise CompileError(f"Expected bracket to start list parsing, found {bracket}")
-        self.parsing = self.parsing[1:].replace(",", " , ")
+        self.skip()
         es = []
 
-        while self.parsing[0] != "]":
+        while self.next() != "]":
             e = self.parse_expr()
             es.append(e)
-            end = self.parsing.find(']')
-            comma = self.parsing.find(",")
-            if comma < end:
-                
-                self.parsing = self.parsing[comma +1:]
+            if self.next() == ",":
+                self.skip()
             else:
                 break
-            
-        self.parsing = self.parsing[self.parsing.find("]")+1:]
+
+        self.expect("]", "to close list")
         res = List(es)
         # logger.debug(res)
         return res
 
+    @spanned
     def parse_string(self) -> Expr:
         # logger.debug("calling parse string")
-        quote = self.parsing[0]
-        if quote != "\"":
-            raise CompileError(f"Expected double quote for string literal, found {quote}")
-        self.parsing = self.parsing[1:]
-        loc = self.parsing.find("\"")
-        word = self.parsing[0:loc]
-        self.parsing = self.parsing[loc+1:]
-        res = Literal(word, TString())
+        tok = self.peek()
+        if tok.kind != STRING:
+            raise CompileError(f"Expected double quote for string literal, found {tok.text}")
+        self.skip()
+        word = tok.text[1:-1]
+        res = Literal(word, STRING_TYPE)
         # logger.debug(res)
         return res
 
-    def check_num(self, token) -> [bool, float]:
-        try:
-            v = float(token)
-        except:
-            return [False, 0.0]
-        return [True, v]
-    
-    def parse_number(self, n) -> Expr:
+    @spanned
+    def parse_number(self, n : str) -> Expr:
         # logger.debug("calling parse number")
         self.skip()
-        n = float(n)
-        if n % 1 == 0:
-            n = int(n)
-            if n > 0:
-                res = Literal(n, TNat())
-            else:
-                res = Literal(n, TInt())
+        n = parse_rational(n)
+        if isinstance(n, Fraction):
+            res = Literal(n, RATIONAL_TYPE)
+        elif n > 0:
+            res = Literal(n, NAT_TYPE)
         else:
-            n = Fraction(n)
-            res = Literal(n, TRational())
+            res = Literal(n, INT_TYPE)
         # logger.debug(res)
         return res
 
+    @spanned
     def parse_literal(self) -> Literal:
         # logger.debug("calling parse literal")
         s = self.next()
@@ -130,35 +126,29 @@ class Parser():
             case 'nothing':
                 res = ENothing()
             case 'true':
-                res = Literal(True, TBoolean())
+                res = Literal(True, BOOLEAN_TYPE)
             case 'false':
-                res = Literal(False, TBoolean())
+                res = Literal(False, BOOLEAN_TYPE)
         # logger.debug(res)
         if res != False:
             return res
         raise CompileError(f"Unknown Literal: {s}")
 
+    @spanned
     def parse_id(self) -> Variable:
         # logger.debug("calling parse id")
-        self.parsing = self.parsing.strip()
-        if self.parsing[0] != '[':
-            raise SyntaxError(f"Expected id to start with '[', found {self.parsing[:10]}")
-        
-        self.parsing = self.parsing[1:]
+        bracket = self.next()
+        if bracket != '[':
+            raise SyntaxError(f"Expected id to start with '[', found {bracket}")
+        self.skip()
         var = self.next()
         if var in AllKeywords:
             raise SyntaxError(f"Keyword cannot be used in id: {var}")
         self.skip()
-        close = self.parsing.find("]")
-        colon = self.parsing.find(":")
-        if close < colon:
-            raise SyntaxError(f"Expected : before type in ID, found {self.parsing[:20]}")
-        self.parsing = self.parsing[colon+1:]
-        #logger.debug(self.parsing)
+        self.expect(":", "before type in ID")
         ty = self.parse_type()
         #logger.debug(ty)
-        close = self.parsing.find("]")
-        self.parsing = self.parsing[close+1:]
+        self.expect("]", "to close ID")
         res = Variable(var, ty)
         # logger.debug(res)
         return res
@@ -173,12 +163,12 @@ class Parser():
         k = self.next()
         if k != "if":
             raise CompileError(f'Expected if, found {k}')
-        self.parsing = self.parsing[2:].strip()
+        self.skip()
         test : Expr = self.parse_expr()
         then = self.next()
         if then != "then":
             raise SyntaxError(f"Expected 'then' in if expression, found {then}")
-        self.parsing = self.parsing[4:].strip()
+        self.skip()
         then : Expr = self.parse_expr()
         els = self.next()
         if els != "else":
@@ -193,7 +183,7 @@ class Parser():
         k = self.next()
         if k != "induct":
             raise CompileError(f'Expected induct, found {k}')
-        self.parsing = self.parsing[6:].strip()
+        self.skip()
         arg : Expr = self.parse_expr()
         out_type : Expr = self.parse_expr()
         base : Expr = self.parse_expr()
@@ -233,14 +223,15 @@ class Parser():
             in_ = self.next()
             if in_ != "in":
                 raise SyntaxError(f"Expected 'in' after let binding expression, found {in_}")
-            
-            self.parsing = self.parsing[self.parsing.find(":")+1:]
+            self.skip()
+            self.expect(":", "after 'in' in let statement")
             body = self.parse_expr()
             res = Let(id, bind, body)
             # logger.debug(res)
             return res
         
     def parse_lambda(self) -> Lambda:
+        start = self.char_index
         #logger.debug("calling parse lambda")
         l = self.next()
         if l != 'lambda':
@@ -259,6 +250,7 @@ class Parser():
         self.skip()
         body = self.parse_expr()
         res = Lambda(args, body)
+        spread_span(res, self.span_from(start))
         # logger.debug(res)
         return res
 
@@ -301,6 +293,8 @@ class Parser():
                         res = Cdr(e)
                     case 'length':
                         res = Length(e)
+                    case _:
+                        raise CompileError(f"Unsupported prefix operator: {token}")
         # logger.debug(res)
         return res
 
@@ -319,6 +313,14 @@ class Parser():
         # logger.debug(res)
         return res
 
+    def parse_tplate(self) -> TPlate:
+        l = self.next()
+        if l != "Plate":
+            raise CompileError(f"Expected 'Plate' in type, found {l}")
+        self.skip()
+        t : Type = self.parse_type()
+        return TPlate(t)
+
     
     def parse_maybe(self) -> TMaybe:
         #logger.debug("calling parse tmaybe")
@@ -375,11 +377,16 @@ class Parser():
         #logger.debug("calling parse forall")
         raise NotImplementedError
     
+    @spanned
     def parse_single_type(self) -> Type:
         #logger.debug("calling parse single type")
         token = self.next()
         res = False
-        if token[0] == "[":
+        if token == "(":
+            self.skip()
+            res = self.parse_type()
+            self.expect(")", "to close type")
+        elif token == "[":
             id = self.parse_id()
             arrow = self.next()
             if arrow != "->":
@@ -394,21 +401,23 @@ class Parser():
                     res = TAbsurd()
                 case "Rational":
                     self.skip()
-                    res = TRational()
+                    res = RATIONAL_TYPE
                 case "Int":
                     self.skip()
-                    res = TInt()
+                    res = INT_TYPE
                 case "Nat":
                     self.skip()
-                    res = TNat()
+                    res = NAT_TYPE
                 case "String":
                     self.skip()
-                    res = TString()
+                    res = STRING_TYPE
                 case "Boolean" | "Bool":
                     self.skip()
-                    res = TBoolean()
+                    res = BOOLEAN_TYPE
                 case "List":
                     res = self.parse_tlist()
+                case "Plate":
+                    res = self.parse_tplate()
                 case "Maybe":
                     res = self.parse_maybe()
                 case "Universe":
@@ -422,18 +431,11 @@ class Parser():
         # logger.info(res)
         return res
             
+    @spanned
     def parse_type(self) -> Type:
         # logger.debug(f"calling parse type on {self.parsing}")
         t : Type = self.parse_single_type()
         op = self.next()
-        if op == "":
-            pass
-        elif op[0] == "(":
-            self.parsing = self.parsing[1:]
-            t = self.parse_type()
-            self.parsing = self.parsing[self.parsing.find(")")+1:]
-            op = self.next()
-            
         if op == "->":
             self.skip()
             t2 : Expr = self.parse_type()
@@ -445,26 +447,31 @@ class Parser():
     ## General-Case parsing
     ###########################
     def parse_app(self, f : Expr) -> Expr:
+        start = f.span.start if getattr(f, 'span', None) else self.char_index
         a = False
-        while self.next()[0] != ")":
+        while self.next() != ")":
             a = self.parse_expr()
+            if not a:
+                raise SyntaxError(f"Invalid argument in application of {f}, found {self.next()}")
             # logger.debug(f"Found arg: {a}")
             f = Application(f, a)
-            self.parsing = self.parsing.strip()
+            f.span = self.span_from(start)
         
         if isinstance(a, bool):
-            raise SyntaxError()
-        self.parsing = self.parsing[1:]
+            raise SyntaxError(f"Expected at least one argument in application of {f}")
+        self.skip()
+        f.span = self.span_from(start)
         # logger.debug(f)
         return f
     
     def parse_paren(self) -> Expr:
         #logger.debug("calling parse paren")
-        if self.parsing[0] != "(":
-            raise CompileError(f"Expected to be at open paren, found {self.parsing[:10]}")
-        self.parsing = self.parsing[1:]
+        paren = self.next()
+        if paren != "(":
+            raise CompileError(f"Expected to be at open paren, found {paren}")
+        self.skip()
         expr : Expr = self.parse_expr()
-        self.parsing = self.parsing[self.parsing.find(")")+1:]
+        self.expect(")", "to close parenthesized expression")
         # logger.debug(expr)
         return expr
 
@@ -480,7 +487,10 @@ class Parser():
             case "*":
                 return Times(e1, e2)
             case "-":
-                return Plus(e1, Times(Literal(-1, TInt()), e2))
+                neg_one = Literal(-1, INT_TYPE)
+                neg = Times(neg_one, e2)
+                neg_one.span = neg.span = e2.span
+                return Plus(e1, neg)
             case "/":
                 return Divide(e1, e2)
             case "%":
@@ -491,40 +501,41 @@ class Parser():
                 return Equal(e1, e2)
         raise CompileError(f"Unknown Infix Operator: {op}")
 
+    @spanned
     def parse_single_expr(self) -> Expr:
         #logger.debug(f"calling parse single expr on {self.parsing}")
-        token = self.next()
+        tok = self.peek()
+        token = tok.text
         #logger.debug(f"TOKEN: {token}")
-        if token in AllKeywords:
+        if tok.kind == EOF:
+            raise SyntaxError(f"Unexpected end of input at {self.location()}")
+        elif tok.kind == NAME and token in AllKeywords:
             return self.dispatch(token)
-        elif "\"" == token[0]:
+        elif tok.kind == STRING:
             return self.parse_string()
-        elif "(" == token[0]:
+        elif "(" == token:
             return self.parse_paren()
-        elif "[" == token[0]:
+        elif "[" == token:
             return self.parse_list()
-        elif "(" == token[-1]:
-            f = token[:-1]
-            self.parsing = self.parsing[self.parsing.find("(")+1:]
-            return self.parse_app(f)
-        else:
-            is_num = self.check_num(token)
-            if is_num[0]:
-                return self.parse_number(is_num[1])
-            else:
-                if "(" in token:
-                    loc = token.find("(")
-                    f = Variable(token[:loc], Type())
-                    self.parsing = self.parsing[loc+1:]
-                    return self.parse_app(f)
-                if valid_variable_name(token):
-                    self.skip()
-                    return Variable(token)
-                else:
-                    return False
+        elif tok.kind == NUMBER:
+            return self.parse_number(token)
+        elif tok.kind == NAME:
+            ## f(x ...) applies f only when the paren directly follows the name
+            paren = self.peek(1)
+            if paren.text == "(" and paren.start == tok.end:
+                f = Variable(token, PLACEHOLDER)
+                f.span = Span(tok.start, tok.end, self.lines)
+                self.skip()
+                self.skip()
+                return self.parse_app(f)
+            if valid_variable_name(token):
+                self.skip()
+                return Variable(token)
+        return False
     
 
     # it's either a single expression, or two expressions joined by an infix operator
+    @spanned
     def parse_expr(self) -> Expr:
         #logger.debug(f"calling parse expression {self.parsing}")
         e = self.parse_single_expr()
@@ -545,6 +556,7 @@ class Parser():
         #logger.debug("calling parse defrel")
         raise NotImplementedError
     
+    @spanned
     def parse_defconst(self):
         #logger.debug("calling parse defconst")
         token = self.next()
@@ -558,25 +570,22 @@ class Parser():
         #logger.info(exp)
         return Defconst(var, exp)
 
+    @spanned
     def parse_defunc(self):
         #logger.debug("calling parse defunc")
         token = self.next()
         if token != "defunc":
             raise CompileError(f"Expected defunc, found {token}")
+        start = self.char_index
         self.skip()
         name : str = self.next()
+        name_span = Span(self.peek().start, self.peek().end, self.lines)
         if name in AllKeywords:
             raise SyntaxError(f"Cannot use keyword {name} for top-level function")
         self.skip()
-        colon = self.next()
-        if colon != ":":
-            raise SyntaxError(f"Expected colon after defunc name, found {colon}")
-        self.parsing = self.parsing[self.parsing.find(":")+1:]
+        self.expect(":", "after defunc name")
         ty = self.parse_type()
-        colon = self.next()
-        if colon != ":":
-            raise SyntaxError(f"Expected colon after defunc type, found {colon}")
-        self.parsing = self.parsing[self.parsing.find(":")+1:]
+        self.expect(":", "after defunc type")
         exp : Expr = self.parse_expr()
         #logger.info(ty)
         if not isinstance(ty, TFunction):
@@ -589,7 +598,10 @@ class Parser():
             f_ty = f_ty.output
         #logger.debug(args)
         exp = Lambda(args, exp)
-        res = Defunc(Variable(name, ty), exp)
+        spread_span(exp, self.span_from(start))
+        var = Variable(name, ty)
+        var.span = name_span
+        res = Defunc(var, exp)
         #logger.debug(res)
         return res
 
@@ -608,14 +620,15 @@ class Parser():
     def parse_file(self) -> list[Expr]:
         #logger.debug("calling parse file")
         ans = []
-        while len(self.parsing) > 0:
-            self.parsing = self.parsing.strip()
+        while self.peek().kind != EOF:
             t = self.next()
             if t in DEFS:
                 ans.append(self.parse_def())
             else:
-                ans.append(self.parse_expr())
-            self.parsing = self.parsing.strip()
+                e = self.parse_expr()
+                if not e:
+                    raise SyntaxError(f"Invalid expression at offset {self.char_index}: {t}")
+                ans.append(e)
         return ans
     
 if __name__ == "__main__":
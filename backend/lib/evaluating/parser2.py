@@ -1,107 +1,70 @@
-from loguru import logger
 from fractions import Fraction
 
 try:
     from ..defs import *
+    from .lexer import *
+    from .rational import parse_rational
 except:
     from defs import *
+    from lexer import *
+    from rational import parse_rational
 
 class Parser():
     def __init__(self, content=""):
         self.parsing = content
 
-        self.total_chars = len(self.parsing)
-        ## to use when we fix next()
+        self.tokens : list[Token] = tokenize(content)
+        self.total_tokens = len(self.tokens)
+        self.lines : SourceMap = SourceMap(content)
+        self.pos = 0
         self.char_index = 0
-        self.line_number = 1
-        self.line_index = 1
 
+    ## span from offset start to the end of the last consumed token
+    def span_from(self, start : int) -> Span:
+        end = self.tokens[self.pos - 1].end if self.pos > 0 else start
+        return Span(start, max(start, end), self.lines)
 
-    # def eoe(self) -> int:
-    #     i = self.total_chars
-    #     for c in DELIMS:
-    #         j = self.parsing.find(c, self.char_index)
-    #         if j > 0:
-    #             i = min(i, j)
-    #     return i
+    ## line:column of the cursor, for error messages
+    def location(self) -> str:
+        line, col = self.lines.position(self.char_index)
+        return f"{line}:{col}"
 
+    @property
+    def line_number(self) -> int:
+        return self.lines.position(self.char_index)[0]
 
-    # # find the next token (used when expecting a new Phrase or Expression)
-    # def next(self) -> str:
-    #     ## todo fix this to manually count whitespace
-        
-    #     self.parsing = self.parsing.strip()
-    #     i = self.eoe()
-        
-    #     s = self.parsing[:i]
-        
-    #     if s == "":
-    #         s = self.parsing
-    #     logger.debug(f"Next finds: {s}")
-    #     return s.strip()
-    
-    # ## move past the first token
-    # def skip(self):
-    #     i = self.eoe()
-    #     self.parsing = self.parsing[i:].strip()
-
-    def eoe(self) -> int:
-        i = self.total_chars
-        for c in DELIMS:
-            j = self.parsing.find(c, self.char_index)
-            if j > 0:
-                i = min(i, j)
-        return i
-
-    def scroll_through_whitespace(self):
-        while (self.char_index < self.total_chars) and (self.parsing[self.char_index] in [" ", "\n", "\t"]):
-            
-            c = self.parsing[self.char_index]
-            if c == "\n":
-                self.char_index += 1
-                self.line_number += 1
-                self.line_index = 0
-            else:
-                self.char_index += 1
-                self.line_index += 1
-    
+    @property
+    def line_index(self) -> int:
+        return self.lines.position(self.char_index)[1]
+
+    ## the token k places past the cursor (the final EOF token once exhausted)
+    def peek(self, k : int=0) -> Token:
+        return self.tokens[min(self.pos + k, self.total_tokens - 1)]
+
+    ## move the cursor forward by k tokens
     def increment(self, k : int):
         if k < 0:
-            raise CompileError(f"Invalid increment of {k} while at idx {self.char_index} in {self.parsing}")
-        logger.debug(f"Incrementing {self.parsing[self.char_index:]}, {self.char_index} by {k}")
-        self.char_index += k
-        self.char_index = min(self.total_chars-1, self.char_index)
-        self.scroll_through_whitespace()
-        logger.debug(self.parsing[self.char_index:])
-
+            raise CompileError(f"Invalid increment of {k} while at idx {self.char_index}")
+        self.pos = min(self.total_tokens - 1, self.pos + k)
+        self.char_index = self.tokens[self.pos].start
 
     # find the next token 
     def next(self) -> str:
-        self.scroll_through_whitespace()
-        i = self.eoe()
-        if self.char_index == i:
-            self.increment(1)
-        s = self.parsing[self.char_index:i]
-        if s == "":
-            s = self.parsing[self.char_index:]
-        logger.debug(f"Next finds: {s}")
-        self.scroll_through_whitespace()
-        return s
+        return self.tokens[self.pos].text
     
     ## move past the first token
     def skip(self):
-        i = self.eoe()
-        self.char_index += i
-        self.scroll_through_whitespace()
-
-    def lookup(self, c : str):
-        i = self.parsing.find(c, self.char_index)
-        logger.debug(f"Found {c} in {self.parsing} at {i} starting from {self.char_index}")
-        return i
+        self.increment(1)
+
+    ## move past the first token, which must be s
+    def expect(self, s : str, context : str):
+        t = self.next()
+        if t != s:
+            raise SyntaxError(f"Expected '{s}' {context}, found {t} at {self.location()}")
+        self.skip()
     
     ## calls helper function depending on keyword type
     def dispatch(self, token : str) -> Expr:
-        logger.debug("calling dispatch")
         if token in LITERALS:
             return self.parse_literal()
         elif token in TYPES:
@@ -114,112 +77,75 @@ class Parser():
     ## parsing literals
     ###################################
 
+    @spanned
     def parse_list(self) -> List:
-        logger.debug("calling parse list")
-        bracket = self.parsing[self.char_index]
+        bracket = self.next()
         if bracket != "[":
             raise CompileError(f"Expected bracket to start list parsing, found {bracket}")
         
         self.increment(1)
-        #self.parsing = self.parsing[1:]
         es = []
 
-        while self.parsing[self.char_index] != "]":
-            logger.debug(self.parsing[self.char_index:])
+        while self.next() != "]":
             e = self.parse_expr()
             es.append(e)
-            end = self.lookup(']')
-            comma = self.lookup(",")
-            if comma < end:
-                logger.debug(self.parsing[self.char_index:])
-                # self.increment(comma+1)
-                logger.debug(self.parsing[self.char_index:])
-                #self.parsing = self.parsing[comma +1:]
+            if self.next() == ",":
+                self.increment(1)
             else:
                 break
-        loc = self.lookup("]")
-        self.increment(loc+1 - self.char_index)
-        # self.parsing = self.parsing[self.parsing.find("]")+1:]
+        self.expect("]", "to close list")
         return List(es)
 
+    @spanned
     def parse_string(self) -> Expr:
-        logger.debug("calling parse string")
-        quote = self.parsing[self.char_index]
-        if quote != "\"":
-            raise CompileError(f"Expected double quote for string literal, found {quote}")
+        tok = self.peek()
+        if tok.kind != STRING:
+            raise CompileError(f"Expected double quote for string literal, found {tok.text}")
         
         self.increment(1)
-        #self.parsing = self.parsing[1:]
-        loc = self.lookup("\"")
-        logger.debug(loc)
-        word = self.parsing[self.char_index:loc]
-
-        self.increment(loc - self.char_index)
-        #self.parsing = self.parsing[loc+1:]
-        return Literal(word, TString())
-
-    def check_num(self, token) -> [bool, float]:
-        try:
-            v = float(token)
-        except:
-            return [False, False]
-        return [True, token]
+        word = tok.text[1:-1]
+        return Literal(word, STRING_TYPE)
     
+    @spanned
     def parse_number(self, n : str) -> Expr:
-        logger.debug("calling parse number")
-        self.increment(len(n))
-        n = float(n)
+        self.increment(1)
+        n = parse_rational(n)
         
-        if n % 1 == 0:
-            n = int(n)
-            if n > 0:
-                return Literal(n, TNat())
-            else:
-                return Literal(n, TInt())
+        if isinstance(n, Fraction):
+            return Literal(n, RATIONAL_TYPE)
+        elif n > 0:
+            return Literal(n, NAT_TYPE)
         else:
-            n = Fraction(n)
-            return Literal(n, TRational())
+            return Literal(n, INT_TYPE)
 
 
+    @spanned
     def parse_literal(self) -> Literal:
-        logger.debug("calling parse literal")
         s = self.next()
         self.skip()
         match s:
             case 'nothing':
                 return ENothing()
             case 'true':
-                return Literal(True, TBoolean())
+                return Literal(True, BOOLEAN_TYPE)
             case 'false':
-                return Literal(False, TBoolean())
+                return Literal(False, BOOLEAN_TYPE)
         raise CompileError(f"Unknown Literal: {s}")
 
+    @spanned
     def parse_id(self) -> Variable:
-        logger.debug("calling parse id")
-        self.scroll_through_whitespace()
-        # self.parsing = self.parsing.strip()
-        if self.parsing[self.char_index] != '[':
-            raise SyntaxError(f"Expected id to start with '[', found {self.parsing[self.char_index:]}")
+        bracket = self.next()
+        if bracket != '[':
+            raise SyntaxError(f"Expected id to start with '[', found {bracket} at {self.location()}")
         
         self.increment(1)
-        #self.parsing = self.parsing[1:]
         var = self.next()
         if var in AllKeywords:
             raise SyntaxError(f"Keyword cannot be used in id: {var}")
-        # self.skip()
-        close = self.lookup("]")
-        colon = self.lookup(":")
-        if close < colon:
-            raise SyntaxError(f"Expected : before type in ID, found {self.parsing[self.char_index:]}")
-        logger.info(colon)
-        self.increment(colon+1 - self.char_index)
-        # self.parsing = self.parsing[colon+1:]
-        logger.debug(self.parsing[self.char_index:])
+        self.skip()
+        self.expect(":", "before type in ID")
         ty = self.parse_type()
-        close = self.lookup("]")
-
-        self.increment(close+1 - self.char_index)
-        # self.parsing = self.parsing[close+1:]
+        self.expect("]", "to close ID")
         return Variable(var, ty)
 
 
@@ -228,20 +154,16 @@ class Parser():
     ###########################
 
     def parse_if(self) -> If:
-        logger.debug("calling parse if")
         k = self.next()
         if k != "if":
             raise CompileError(f'Expected if, found {k}')
-        self.increment(2)
-        self.scroll_through_whitespace()
-        # self.parsing = self.parsing[2:].strip()
+        self.increment(1)
         test : Expr = self.parse_expr()
         then = self.next()
         if then != "then":
             raise SyntaxError(f"Expected 'then' in if expression, found {then}")
         
-        self.increment(4)
-        #self.parsing = self.parsing[4:].strip()
+        self.increment(1)
         then : Expr = self.parse_expr()
         els = self.next()
         if els != "else":
@@ -251,40 +173,28 @@ class Parser():
         return If(test, then, els)
 
     def parse_let(self) -> Let:
-        logger.debug("calling parse let")
-        logger.debug(self.parsing)
         k = self.next()
         if k != "let":
             raise CompileError(f"Expected let, found {k}")
         else:
-            self.increment(3)
-            logger.debug(self.parsing[self.char_index:])
+            self.increment(1)
             id : Variable = self.parse_id()
-            logger.debug(self.parsing[self.char_index:])
             eq = self.next()
             if eq != "be":
-                logger.debug(self.parsing[self.char_index:])
                 raise SyntaxError(f"Expected 'be' after let identifier, found {eq}")
-            self.increment(2)
-            logger.debug(f"Parsing Bind with: {self.parsing[self.char_index:]}")
+            self.increment(1)
             bind : Expr = self.parse_expr()
-            logger.debug(bind)
             in_ = self.next()
             if in_ != "in":
                 raise SyntaxError(f"Expected 'in' after let binding expression, found {in_}")
-            
-            loc = self.lookup(":")
-            if loc < 0:
-                raise SyntaxError(f"Expected : after 'in' in let statement")
-            self.increment(loc+1 - self.char_index)
-
-            # self.parsing = self.parsing[self.parsing.find(":")+1:]
+            self.increment(1)
+            self.expect(":", "after 'in' in let statement")
             body = self.parse_expr()
 
             return Let(id, bind, body)
         
     def parse_lambda(self) -> Lambda:
-        logger.debug("calling parse lambda")
+        start = self.char_index
         l = self.next()
         if l != 'lambda':
             raise CompileError(f"Expected lambda, found {l}")
@@ -293,7 +203,6 @@ class Parser():
         while self.next() != ":":
             id = self.parse_id()
             args.append(id)
-        logger.debug([str(arg) for arg in args])
         if len(args) == 0:
             raise SyntaxError(f"Expected at least one argument for lambda, got none")
         colon = self.next()
@@ -301,10 +210,11 @@ class Parser():
             raise SyntaxError(f"Expected a colon before lambda body, found {colon}")
         self.skip()
         body = self.parse_expr()
-        return Lambda(args, body)
+        res = Lambda(args, body)
+        spread_span(res, self.span_from(start))
+        return res
 
     def parse_print(self) -> PrintThen:
-        logger.debug("calling parse print")
         p = self.next()
         if p != "print":
             raise CompileError(f"Expected print, found {p}")
@@ -314,7 +224,6 @@ class Parser():
         return PrintThen(msg, body)
             
     def parse_prefix(self, token : str) -> Expr:
-        logger.debug("calling parse prefix")
         match token:
             case "if":
                 return self.parse_if()
@@ -344,7 +253,6 @@ class Parser():
     ##############################
 
     def parse_tlist(self) -> TList:
-        logger.debug("calling parse tlist")
         l = self.next()
         if l != "List":
             raise CompileError(f"Expected 'List' in type, found {l}")
@@ -352,9 +260,16 @@ class Parser():
         t : Type = self.parse_type()
         return TList(t)
 
+    def parse_tplate(self) -> TPlate:
+        l = self.next()
+        if l != "Plate":
+            raise CompileError(f"Expected 'Plate' in type, found {l}")
+        self.skip()
+        t : Type = self.parse_type()
+        return TPlate(t)
+
     
     def parse_maybe(self) -> TMaybe:
-        logger.debug("calling parse tmaybe")
         l = self.next()
         if l != "Maybe":
             raise CompileError(f"Expected 'Maybe' in type, found {l}")
@@ -363,7 +278,6 @@ class Parser():
         return TMaybe(t)
     
     def parse_universe(self) -> TUniverse:
-        logger.debug("calling parse universe")
         l = self.next()
         if l != "Universe":
             raise CompileError(f"Expected 'Universe' in type, found {l}")
@@ -372,7 +286,6 @@ class Parser():
         return TUniverse(e)
     
     def parse_equal(self) -> TEqual:
-        logger.debug("calling parse equal")
         l = self.next()
         if l != "Equal":
             raise CompileError(f"Expected 'Equal' in type, found {l}")
@@ -383,7 +296,6 @@ class Parser():
         return TEqual(t, e1, e2)
     
     def parse_exists(self) -> TExists:
-        logger.debug("calling parse exists")
         l = self.next()
         if l != "Exists":
             raise CompileError(f"Expected 'Exists' in type, found {l}")
@@ -393,17 +305,20 @@ class Parser():
         return TExists(x, t)
     
     def parse_function(self) -> TFunction:
-        logger.debug("calling parse function")
         raise NotImplementedError
     
     def parse_forall(self) -> TFunction:
-        logger.debug("calling parse forall")
         raise NotImplementedError
     
+    @spanned
     def parse_single_type(self) -> Type:
-        logger.debug("calling parse single type")
         token = self.next()
-        if token[0] == "[":
+        if token == "(":
+            self.increment(1)
+            t = self.parse_type()
+            self.expect(")", "to close type")
+            return t
+        if token == "[":
             id = self.parse_id()
             arrow = self.next()
             if arrow != "->":
@@ -417,21 +332,23 @@ class Parser():
                 return TAbsurd()
             case "Rational":
                 self.skip()
-                return TRational()
+                return RATIONAL_TYPE
             case "Int":
                 self.skip()
-                return TInt()
+                return INT_TYPE
             case "Nat":
                 self.skip()
-                return TNat()
+                return NAT_TYPE
             case "String":
                 self.skip()
-                return TString()
+                return STRING_TYPE
             case "Boolean" | "Bool":
                 self.skip()
-                return TBoolean()
+                return BOOLEAN_TYPE
             case "List":
                 return self.parse_tlist()
+            case "Plate":
+                return self.parse_tplate()
             case "Maybe":
                 return self.parse_maybe()
             case "Universe":
@@ -443,21 +360,10 @@ class Parser():
             case "Forall":
                 return self.parse_forall()
             
+    @spanned
     def parse_type(self) -> Type:
-        logger.debug("calling parse type")
         t : Type = self.parse_single_type()
         op = self.next()
-        if op[0] == "(":
-            self.increment(1)
-            # self.parsing = self.parsing[1:]
-            t = self.parse_type()
-
-            loc = self.lookup(")")
-            if loc < 0:
-                raise SyntaxError(f"No closing paren at {self.parsing[self.char_index:]}")
-            self.increment(loc+1 - self.char_index)
-            # self.parsing = self.parsing[self.parsing.find(")")+1:]
-            return t
         if op == "->":
             self.skip()
             t2 : Expr = self.parse_type()
@@ -468,37 +374,31 @@ class Parser():
     ## General-Case parsing
     ###########################
     def parse_app(self, f : Expr) -> Expr:
+        start = f.span.start if getattr(f, 'span', None) else self.char_index
         a = False
         while self.next() != ")":
             a = self.parse_expr()
             f = Application(f, a)
-            # self.parsing = self.parsing.strip()
-            self.scroll_through_whitespace()
+            f.span = self.span_from(start)
         
         if isinstance(a, bool):
             raise SyntaxError()
         self.increment(1)
-        # self.parsing = self.parsing[1:]
+        f.span = self.span_from(start)
         return f
     
     def parse_paren(self) -> Expr:
-        logger.debug("calling parse paren")
-        if self.parsing[self.char_index] != "(":
-            raise CompileError(f"Expected to be at open paren, found {self.parsing[self.char_index:10]}")
+        if self.next() != "(":
+            raise CompileError(f"Expected to be at open paren, found {self.next()} at {self.location()}")
         
         self.increment(1)
-        # self.parsing = self.parsing[1:]
         expr : Expr = self.parse_expr()
-
-        loc = self.lookup(")")
-        if loc < 0:
-            raise SyntaxError(f"No closing paren for at {self.parsing[self.char_index:]}")
-        self.increment(loc+1 - self.char_index)
-        # self.parsing = self.parsing[self.parsing.find(")")+1:]
+        if self.next() != ")":
+            raise SyntaxError(f"No closing paren at {self.location()}")
+        self.increment(1)
         return expr
 
     def join_infix(self, e1 : Expr, op : str, e2 : Expr) -> Expr:
-        logger.debug("calling join infix")
         match op:
             case "and":
                 return And(e1, e2)
@@ -509,7 +409,10 @@ class Parser():
             case "*":
                 return Times(e1, e2)
             case "-":
-                return Plus(e1, Times(Literal(-1, TInt()), e2))
+                neg_one = Literal(-1, INT_TYPE)
+                neg = Times(neg_one, e2)
+                neg_one.span = neg.span = e2.span
+                return Plus(e1, neg)
             case "/":
                 return Divide(e1, e2)
             case "%":
@@ -520,45 +423,38 @@ class Parser():
                 return Equal(e1, e2)
         raise CompileError(f"Unknown Infix Operator: {op}")
 
+    @spanned
     def parse_single_expr(self) -> Expr:
-        logger.debug("calling parse single expr")
-        token = self.next()
-        logger.debug(f"TOKEN: {token}")
-        if token in AllKeywords:
+        tok = self.peek()
+        token = tok.text
+        if tok.kind == EOF:
+            raise SyntaxError(f"Unexpected end of input at {self.location()}")
+        elif tok.kind == NAME and token in AllKeywords:
             return self.dispatch(token)
-        elif "\"" == token[0]:
+        elif tok.kind == STRING:
             return self.parse_string()
-        elif "(" == token[0]:
+        elif "(" == token:
             return self.parse_paren()
-        elif "[" == token[0]:
+        elif "[" == token:
             return self.parse_list()
-        elif "(" == token[-1]:
-            f = token[:-1]
-
-            loc = self.lookup("(")
-            self.increment(loc+1 - self.char_index)
-            # self.parsing = self.parsing[self.parsing.find("(")+1:]
-            return self.parse_app(f)
+        elif tok.kind == NUMBER:
+            return self.parse_number(token)
         else:
-            is_num = self.check_num(token)
-            if is_num[0]:
-                return self.parse_number(is_num[1])
-            else:
-                if "(" in token:
-                    loc = token.find("(")
-                    f = Variable(token[:loc], TFunction())
-                    self.increment(loc+1)
-                    # self.parsing = self.parsing[loc+1:]
-                    return self.parse_app(f)
-                if not valid_variable_name(token):
-                    raise SyntaxError(f"Invalid variable name: {token}")
-                self.skip()
-                return Variable(token)
+            paren = self.peek(1)
+            if tok.kind == NAME and paren.text == "(" and paren.start == tok.end:
+                f = Variable(token, PLACEHOLDER)
+                f.span = Span(tok.start, tok.end, self.lines)
+                self.increment(2)
+                return self.parse_app(f)
+            if not valid_variable_name(token):
+                raise SyntaxError(f"Invalid variable name: {token}")
+            self.skip()
+            return Variable(token)
     
 
     # it's either a single expression, or two expressions joined by an infix operator
+    @spanned
     def parse_expr(self) -> Expr:
-        logger.debug(f"calling parse expression {self.parsing[self.char_index:]}")
         e = self.parse_single_expr()
         if not e:
             return False
@@ -574,11 +470,10 @@ class Parser():
     ## Top-Level definitions
     ###############################
     def parse_defrel(self):
-        logger.debug("calling parse defrel")
         raise NotImplementedError
     
+    @spanned
     def parse_defconst(self):
-        logger.debug("calling parse defconst")
         token = self.next()
         if token != "defconst":
             raise CompileError(f"Expected defconst, found {token}")
@@ -587,35 +482,36 @@ class Parser():
         exp : Expr = self.parse_expr()
         return Defconst(var, exp)
 
+    @spanned
     def parse_defunc(self):
-        logger.debug("calling parse defunc")
         token = self.next()
         if token != "defunc":
             raise CompileError(f"Expected defunc, found {token}")
+        start = self.char_index
         self.skip()
         name : str = self.next()
+        name_span = Span(self.peek().start, self.peek().end, self.lines)
         if name in AllKeywords:
             raise SyntaxError(f"Cannot use keyword {name} for top-level function")
         self.skip()
-        colon = self.next()
-        if colon != ":":
-            raise SyntaxError(f"Expected colon after defunc name, found {colon}")
-        
-        loc = self.lookup(":")
-        self.increment(loc+1 - self.char_index)
-        # self.parsing = self.parsing[self.parsing.find(":")+1:]
+        self.expect(":", "after defunc name")
         ty = self.parse_type()
-        colon = self.next()
-        if colon != ":":
-            raise SyntaxError(f"Expected colon after defunc type, found {colon}")
-        loc = self.lookup(":")
-        self.increment(loc+1 - self.char_index)
-        # self.parsing = self.parsing[self.parsing.find(":")+1:]
+        self.expect(":", "after defunc type")
         exp : Expr = self.parse_expr()
-        return Defunc(name, ty, exp)
+        if not isinstance(ty, TFunction):
+            raise SyntaxError(f"Expected a function type for defunc, got {ty}")
+        args = []
+        f_ty = ty
+        while isinstance(f_ty, TFunction):
+            args.append(f_ty.input)
+            f_ty = f_ty.output
+        exp = Lambda(args, exp)
+        spread_span(exp, self.span_from(start))
+        var = Variable(name, ty)
+        var.span = name_span
+        return Defunc(var, exp)
 
     def parse_def(self) -> Def:
-        logger.debug("calling parse def")
         token = self.next()
         match token:
             case 'defunc':
@@ -627,15 +523,11 @@ class Parser():
         raise CompileError(f"Unknown Definition Keyword: {token}")
 
     def parse_file(self) -> list[Expr]:
-        logger.debug("calling parse file")
         ans = []
-        while self.char_index < self.total_chars:
-            self.scroll_through_whitespace()
-            # self.parsing = self.parsing.strip()
+        while self.peek().kind != EOF:
             t = self.next()
             if t in DEFS:
                 ans.append(self.parse_def())
-            ans.append(self.parse_expr())
-            self.scroll_through_whitespace()
-            # self.parsing = self.parsing.strip()
-        return []
\ No newline at end of file
+            else:
+                ans.append(self.parse_expr())
+        return ans
\ No newline at end of file
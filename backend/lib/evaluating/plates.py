@@ -0,0 +1,297 @@
+import multiprocessing
+from array import array as _array
+from functools import reduce
+from itertools import islice, product
+from math import prod
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    from ..defs import *
+    from .interp import Interpreter
+except:
+    from defs import *
+    from interp import Interpreter
+
+"""
+Runtime for Plates, the concurrent n-dimensional arrays of the language
+overview: numbers in one typed buffer in shared memory, passed between
+processes by reference.
+
+A SharedPlate is a strided view (shape, strides and offset, counted in
+elements) of a shared memory segment. Indexing with ints and slices
+gives another view of the same memory, and pickling one sends only the
+segment's name and the view, so a worker attaches to the segment (once
+per process) and reads and writes it in place. Elements are never
+pickled: pmap and preduce hand each worker a range of element indices.
+
+The process that made a segment owns it and unlinks it on close():
+
+   with SharedPlate.from_list([[1, 2], [3, 4]]) as p:
+       pmap(operator.neg, p[:, 1], workers=2)
+"""
+
+## memoryview element formats a Plate may hold, and the type of a Value
+## read from one. Only machine ints: a float buffer would bring back the
+## rounding Rational doesn't have
+ELEMENT_TYPES = {code : INT_TYPE for code in 'bhilq'}
+ELEMENT_TYPES.update({code : NAT_TYPE for code in 'BHILQ'})
+
+## segment name -> (segment, its buffer cast to the element format), for
+## the segments this process attached to by unpickling a view
+_ATTACHED : dict[str, tuple] = {}
+
+
+def c_strides(shape : tuple) -> tuple:
+    strides, n = [], 1
+    for d in reversed(shape):
+        strides.append(n)
+        n *= d
+    return tuple(reversed(strides))
+
+## the shape of a nested list of numbers
+def shape_of(xs) -> tuple:
+    shape = []
+    while isinstance(xs, (list, tuple)):
+        shape.append(len(xs))
+        xs = xs[0] if xs else None
+    return tuple(shape)
+
+
+def _flatten(xs):
+    for x in xs:
+        if isinstance(x, (list, tuple)):
+            yield from _flatten(x)
+        else:
+            yield x
+
+
+class SharedPlate():
+    __slots__ = ('shm', 'flat', 'typecode', 'shape', 'strides', 'offset', 'owner')
+
+    def __init__(self, shm : SharedMemory, flat : memoryview, typecode : str, shape : tuple,
+                 strides : tuple=None, offset : int=0, owner : bool=False):
+        self.shm = shm
+        self.flat = flat
+        self.typecode = typecode
+        self.shape = shape
+        self.strides = c_strides(shape) if strides is None else strides
+        self.offset = offset
+        self.owner = owner
+
+    ###############
+    ## Making Plates
+    ###############
+
+    @staticmethod
+    def create(shape : tuple, typecode : str='q') -> 'SharedPlate':
+        if typecode not in ELEMENT_TYPES:
+            raise RuntimeError(f"Plates cannot hold elements of format {typecode!r}")
+        size = prod(shape) * _array(typecode).itemsize
+        shm = SharedMemory(create=True, size=max(size, 1))
+        return SharedPlate(shm, shm.buf[:size].cast(typecode), typecode, tuple(shape), owner=True)
+
+    @staticmethod
+    def from_list(xs : list, typecode : str='q') -> 'SharedPlate':
+        p = SharedPlate.create(shape_of(xs), typecode)
+        try:
+            for _ in range(p.ndim - 1):
+                xs = [x for row in xs for x in row]
+            p.flat[:] = _array(typecode, xs)
+        except (ValueError, TypeError, OverflowError):
+            p.close()
+            raise RuntimeError(f"Expected a rectangular list of format {typecode!r} for a Plate of shape {p.shape}")
+        except BaseException:
+            p.close()
+            raise
+        return p
+
+    ## only the names travel; see attach
+    def __reduce__(self):
+        return attach, (self.shm.name, self.typecode, self.shape, self.strides, self.offset)
+
+    ## the owner frees the memory. A memoryview taken from the Plate
+    ## (see memory()) keeps this process's mapping until it goes too
+    def close(self):
+        if not self.owner:
+            return
+        self.owner = False
+        self.shm.unlink()
+        try:
+            self.flat.release()
+            self.shm.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    ###############
+    ## Views
+    ###############
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return prod(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def contiguous(self) -> bool:
+        return self.strides == c_strides(self.shape)
+
+    ## this view's elements in place, as a flat memoryview
+    def memory(self) -> memoryview:
+        if not self.contiguous():
+            raise RuntimeError(f"Plate view of shape {self.shape} is not contiguous")
+        return self.flat[self.offset:self.offset + self.size]
+
+    ## the position in flat of element k of this view, counting in
+    ## row-major order, for k in lo..hi
+    def positions(self, lo : int=0, hi : int=None):
+        hi = self.size if hi is None else hi
+        if self.contiguous():
+            return range(self.offset + lo, self.offset + hi)
+        every = product(*[range(0, d * s, s) for d, s in zip(self.shape, self.strides)])
+        return map(lambda ix: self.offset + sum(ix), islice(every, lo, hi))
+
+    ## (flat position, remaining shape, strides) picked out by key
+    def locate(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError(f"Too many indices for a Plate of shape {self.shape}")
+        offset, shape, strides = self.offset, [], []
+        for axis, (d, s) in enumerate(zip(self.shape, self.strides)):
+            k = key[axis] if axis < len(key) else slice(None)
+            if isinstance(k, slice):
+                start, stop, step = k.indices(d)
+                offset += start * s
+                shape.append(len(range(start, stop, step)))
+                strides.append(s * step)
+            else:
+                if k < 0:
+                    k += d
+                if not 0 <= k < d:
+                    raise IndexError(f"Index {key[axis]} out of range for axis {axis} of size {d}")
+                offset += k * s
+        return offset, tuple(shape), tuple(strides)
+
+    def __getitem__(self, key):
+        offset, shape, strides = self.locate(key)
+        if not shape:
+            return self.flat[offset]
+        return SharedPlate(self.shm, self.flat, self.typecode, shape, strides, offset)
+
+    ## v is a number for every element, or as many numbers (or a Plate
+    ## of as many) as the key picks out, in row-major order
+    def __setitem__(self, key, v):
+        offset, shape, strides = self.locate(key)
+        view = SharedPlate(self.shm, self.flat, self.typecode, shape, strides, offset)
+        if isinstance(v, int):
+            v = [v] * view.size
+        elif isinstance(v, SharedPlate):
+            v = map(v.flat.__getitem__, v.positions())
+        elif isinstance(v, (list, tuple)):
+            v = _flatten(v)
+        else:
+            v = [v]
+        ## a bad element is caught before any is written
+        try:
+            v = _array(self.typecode, v)
+        except (ValueError, TypeError, OverflowError):
+            raise RuntimeError(f"Expected elements of format {self.typecode!r} for a Plate view of shape {shape}")
+        if len(v) != view.size:
+            raise RuntimeError(f"Expected {view.size} elements for a Plate view of shape {shape}, got {len(v)}")
+        if view.contiguous():
+            view.memory()[:] = v
+            return
+        for i, x in zip(view.positions(), v):
+            self.flat[i] = x
+
+    def tolist(self) -> list:
+        xs = [self.flat[i] for i in self.positions()]
+        for d in reversed(self.shape[1:]):
+            xs = [xs[i:i + d] for i in range(0, len(xs), d)]
+        return xs
+
+    def __repr__(self):
+        return f"SharedPlate({self.tolist()})"
+
+def attach(name : str, typecode : str, shape : tuple, strides : tuple, offset : int) -> SharedPlate:
+    if name not in _ATTACHED:
+        shm = SharedMemory(name=name)
+        ## the segment may have been rounded up to a whole page
+        n = len(shm.buf) // _array(typecode).itemsize
+        _ATTACHED[name] = shm, shm.buf[:n * _array(typecode).itemsize].cast(typecode)
+    shm, flat = _ATTACHED[name]
+    return SharedPlate(shm, flat, typecode, shape, strides, offset)
+
+
+###############
+## Parallel Operations
+###############
+
+## f as a function on numbers; a Closure is applied by the Interpreter
+def on_numbers(f, elem : Type):
+    if not isinstance(f, Closure):
+        return f
+    interp = Interpreter()
+    return lambda x: interp.apply_closure(f, VNumber(x, elem)).value
+
+## out[k] = f(src[k]) for the k-th elements lo..hi of the views
+def _map_range(f, src : SharedPlate, out : SharedPlate, lo : int, hi : int):
+    f = on_numbers(f, ELEMENT_TYPES[src.typecode])
+    if src.contiguous() and out.contiguous():
+        out.memory()[lo:hi] = _array(out.typecode, map(f, src.memory()[lo:hi]))
+        return
+    for i, j in zip(src.positions(lo, hi), out.positions(lo, hi)):
+        out.flat[j] = f(src.flat[i])
+
+def _reduce_range(op, src : SharedPlate, lo : int, hi : int):
+    op = on_numbers(op, ELEMENT_TYPES[src.typecode])
+    return reduce(op, map(src.flat.__getitem__, src.positions(lo, hi)))
+
+## the element ranges the work is split into, at most one per worker
+def _chunks(size : int, workers : int) -> list[tuple[int, int]]:
+    step = -(-size // workers) if size else 1
+    return [(lo, min(lo + step, size)) for lo in range(0, size, step)]
+
+def _run(fn, tasks : list[tuple], workers : int) -> list:
+    if workers <= 1 or len(tasks) <= 1:
+        return [fn(*t) for t in tasks]
+    if 'fork' in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    else:
+        pool = multiprocessing.Pool(workers)
+    with pool:
+        return pool.starmap(fn, tasks)
+
+## f applied to every element of src, written to out (a new Plate of the
+## same shape if None) across workers processes. f must pickle: a
+## module-level function, an operator, or a Closure of one argument
+def pmap(f, src : SharedPlate, out : SharedPlate=None, workers : int=None) -> SharedPlate:
+    workers = workers or multiprocessing.cpu_count()
+    if out is None:
+        out = SharedPlate.create(src.shape, src.typecode)
+    elif out.shape != src.shape:
+        raise RuntimeError(f"Cannot map a Plate of shape {src.shape} into one of shape {out.shape}")
+    _run(_map_range, [(f, src, out, lo, hi) for lo, hi in _chunks(src.size, workers)], workers)
+    return out
+
+## src's elements combined with op, which must be associative: each
+## worker reduces a range and the results are reduced here
+def preduce(op, src : SharedPlate, initial=None, workers : int=None):
+    workers = workers or multiprocessing.cpu_count()
+    parts = _run(_reduce_range, [(op, src, lo, hi) for lo, hi in _chunks(src.size, workers)], workers)
+    if initial is not None:
+        parts = [initial] + parts
+    if not parts:
+        raise RuntimeError("Cannot reduce an empty Plate without an initial value")
+    return reduce(on_numbers(op, ELEMENT_TYPES[src.typecode]), parts)
@@ -0,0 +1,179 @@
+import json
+import sys
+from time import perf_counter_ns
+
+try:
+    from ..defs import *
+    from .interp import Interpreter
+    from .nbe import Normalizer
+    from .tracing import tracer
+except:
+    from defs import *
+    from interp import Interpreter
+    from nbe import Normalizer
+    from tracing import tracer
+
+"""
+Opt-in profiler for the Interpreter and the Normalizer.
+
+attach() shadows the instance's _eval (or synth and check) with a timed
+wrapper, so an instance that is not being profiled runs exactly as
+before. Every call is a frame named after what it works on:
+
+   Plus, If, ...           Interpreter._eval on a node of that class
+   synth:Plus, check:...   Normalizer.synth / check on a node
+   defunc:fact             applying the closure a defunc evaluated to
+
+and for each name the profiler keeps calls, cumulative time (counted
+once however deeply the name recurses), self time and the net number
+of memory blocks allocated in the frame itself (sys.getallocatedblocks).
+It also keeps the deepest stack reached, and self time per call path,
+which write_collapsed writes as the folded stacks flamegraph.pl and
+speedscope read.
+"""
+
+class Stats():
+    __slots__ = ('calls', 'cum_ns', 'self_ns', 'allocs')
+
+    def __init__(self):
+        self.calls : int = 0
+        self.cum_ns : int = 0
+        self.self_ns : int = 0
+        self.allocs : int = 0
+
+## a call path: self time and allocations of the frames that ended here
+class PathNode():
+    __slots__ = ('children', 'self_ns', 'allocs')
+
+    def __init__(self):
+        self.children : dict[str, PathNode] = {}
+        self.self_ns : int = 0
+        self.allocs : int = 0
+
+class Profiler():
+    def __init__(self):
+        self.stats : dict[str, Stats] = {}
+        self.root : PathNode = PathNode()
+        ## [name, path node, start ns, child ns, start blocks, child blocks]
+        self.stack : list[list] = []
+        self.active : dict[str, int] = {}
+        self.peak_depth : int = 0
+        ## closure bodies of defuncs -> their names
+        self.names : dict[int, str] = {}
+
+    ###############
+    ## Hooks
+    ###############
+
+    def attach(self, engine):
+        if isinstance(engine, Normalizer):
+            engine.synth = self.wrap(engine.synth, "synth:", 1)
+            engine.check = self.wrap(engine.check, "check:", 1)
+        ## the Compiler and Machine don't recurse through _eval
+        elif engine.__class__ is Interpreter:
+            engine._eval = self.wrap(engine._eval, "", 0)
+            engine.apply_closure = self.wrap_apply(engine.apply_closure)
+            tracer.attach(self.on_event)
+        else:
+            raise TypeError(f"Cannot profile {engine.__class__.__name__}")
+        return engine
+
+    ## stops listening for definitions; the instance stays wrapped
+    def detach(self):
+        if self.on_event in tracer.sinks:
+            tracer.detach(self.on_event)
+
+    ## f's argument at is the node it works on
+    def wrap(self, f, prefix : str, at : int):
+        def profiled(*args):
+            self.enter(prefix + args[at].__class__.__name__)
+            try:
+                return f(*args)
+            finally:
+                self.leave()
+        return profiled
+
+    def wrap_apply(self, f):
+        def profiled(rator : Closure, rand : Value):
+            name = self.names.get(id(rator.body))
+            if name is None:
+                return f(rator, rand)
+            self.enter("defunc:" + name)
+            try:
+                return f(rator, rand)
+            finally:
+                self.leave()
+        return profiled
+
+    def on_event(self, event : str, payload : tuple):
+        if event == 'define' and isinstance(payload[1], Closure):
+            self.names[id(payload[1].body)] = payload[0].name
+
+    ###############
+    ## Frames
+    ###############
+
+    def enter(self, name : str):
+        parent = self.stack[-1][1] if self.stack else self.root
+        node = parent.children.get(name)
+        if node is None:
+            node = parent.children[name] = PathNode()
+        self.active[name] = self.active.get(name, 0) + 1
+        frame = [name, node, 0, 0, 0, 0]
+        self.stack.append(frame)
+        if len(self.stack) > self.peak_depth:
+            self.peak_depth = len(self.stack)
+        ## read last, so the frame's own bookkeeping isn't counted
+        frame[4] = sys.getallocatedblocks()
+        frame[2] = perf_counter_ns()
+
+    def leave(self):
+        now, blocks = perf_counter_ns(), sys.getallocatedblocks()
+        name, node, start, child, start_blocks, child_blocks = self.stack.pop()
+        elapsed, allocated = now - start, blocks - start_blocks
+        if self.stack:
+            self.stack[-1][3] += elapsed
+            self.stack[-1][5] += allocated
+        s = self.stats.get(name)
+        if s is None:
+            s = self.stats[name] = Stats()
+        s.calls += 1
+        s.self_ns += elapsed - child
+        s.allocs += allocated - child_blocks
+        node.self_ns += elapsed - child
+        node.allocs += allocated - child_blocks
+        self.active[name] -= 1
+        if self.active[name] == 0:
+            s.cum_ns += elapsed
+
+    ###############
+    ## Output
+    ###############
+
+    ## times in microseconds, heaviest self time first
+    def summary(self) -> dict:
+        rows = sorted(self.stats.items(), key=lambda kv: -kv[1].self_ns)
+        return {
+            "peak_depth" : self.peak_depth,
+            "frames" : {name : {"calls" : s.calls, "cum_us" : s.cum_ns // 1000, "self_us" : s.self_ns // 1000,
+                                "allocs" : s.allocs} for name, s in rows},
+        }
+
+    def write_json(self, path : str):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    ## one "a;b;c <self us>" line per call path
+    def collapsed(self) -> list[str]:
+        lines = []
+        todo = [(name, node) for name, node in self.root.children.items()]
+        while todo:
+            path, node = todo.pop()
+            if node.self_ns >= 1000:
+                lines.append(f"{path} {node.self_ns // 1000}")
+            todo.extend([(f"{path};{name}", child) for name, child in node.children.items()])
+        return sorted(lines)
+
+    def write_collapsed(self, path : str):
+        with open(path, 'w') as f:
+            f.writelines([line + "\n" for line in self.collapsed()])
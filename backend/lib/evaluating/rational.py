@@ -0,0 +1,50 @@
+from fractions import Fraction
+
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Exact arithmetic behind Nat, Int and Rational, shared by the parsers and
+the Interpreter, Compiler and Machine.
+
+Numbers are Python ints whenever they are whole, and Fractions only when
+they are not: a literal is read straight from its text, division builds
+a Fraction (one gcd) only when it leaves a remainder, and any result
+that comes out whole is turned back into an int. Loops over whole
+numbers so never leave machine-speed int arithmetic, and nothing is
+ever rounded through a float.
+"""
+
+## x as an int when it is whole
+def exact(x : int | Fraction) -> int | Fraction:
+    if x.__class__ is Fraction and x.denominator == 1:
+        return x.numerator
+    return x
+
+## the value of a number literal, e.g. "3", "-2", "1.25"
+def parse_rational(text : str) -> int | Fraction:
+    if '.' not in text:
+        return int(text)
+    return exact(Fraction(text))
+
+def plus(x : int | Fraction, y : int | Fraction) -> int | Fraction:
+    return exact(x + y)
+
+def times(x : int | Fraction, y : int | Fraction) -> int | Fraction:
+    return exact(x * y)
+
+def divide(x : int | Fraction, y : int | Fraction) -> int | Fraction:
+    if y == 0:
+        raise RuntimeError(f"Cannot divide by 0")
+    if x.__class__ is int and y.__class__ is int:
+        q, r = divmod(x, y)
+        return q if r == 0 else Fraction(x, y)
+    return exact(Fraction(x) / y)
+
+## the remainder of x / y, with the sign of y
+def remainder(x : int | Fraction, y : int | Fraction) -> int | Fraction:
+    if y == 0:
+        raise RuntimeError(f"Cannot divide by 0")
+    return exact(x % y)
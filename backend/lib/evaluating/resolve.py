@@ -0,0 +1,104 @@
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Resolver pass run before the Interpreter.
+
+Walks the AST once and gives every Variable reference a (depth, index)
+address into the Frame chain it will be evaluated in:
+   depth -- how many Frames up (one per enclosing Lambda)
+   index -- which slot of that Frame
+
+Lambdas record how many slots their Frame needs (the parameter plus one
+per Let in their body), Lets record the slot they write, and each
+top-level root records the size of the Frame it is evaluated in.
+"""
+
+## compile-time mirror of a Frame: the names in scope and the slots used
+class Scope():
+    def __init__(self, parent=None):
+        self.names : dict[str, int] = {}
+        self.size = 0
+        self.parent : Scope = parent
+
+    def declare(self, name : str) -> int:
+        i = self.size
+        self.size += 1
+        self.names[name] = i
+        return i
+
+    def address(self, name : str) -> (int, int):
+        depth = 0
+        s = self
+        while s is not None:
+            i = s.names.get(name)
+            if i is not None:
+                return depth, i
+            s = s.parent
+            depth += 1
+        return -1, -1
+
+
+class Resolver():
+    ## attributes that hold types, not expressions that get evaluated
+    SKIP = ('type', 'ty', 'span')
+
+    ## resolves a whole file against a global Scope, which is returned.
+    ## Functions may refer to any definition (including later ones and
+    ## themselves); constants only see what was defined before them.
+    def resolve_program(self, es : list[Expr]) -> Scope:
+        globals_ = Scope()
+        for e in es:
+            if isinstance(e, Defunc):
+                e.slot = globals_.declare(e.var.name)
+        for e in es:
+            if isinstance(e, Defconst):
+                self.resolve_root(e, e.body, globals_)
+                e.slot = globals_.declare(e.var.name)
+        for e in es:
+            if isinstance(e, Defunc):
+                self.resolve_root(e, e.body, globals_)
+            elif not isinstance(e, Def):
+                self.resolve_root(e, e, globals_)
+        return globals_
+
+    ## e is evaluated in a fresh Frame under parent; its size goes on root
+    def resolve_root(self, root : Expr, e : Expr, parent : Scope=None):
+        scope = Scope(parent)
+        self.resolve(e, scope)
+        root.root_frame_size = scope.size
+
+    def resolve(self, e : Expr, scope : Scope):
+        if isinstance(e, Variable):
+            e.depth, e.index = scope.address(e.name)
+        elif isinstance(e, Let):
+            self.resolve(e.bind, scope)
+            name = e.var.name
+            shadowed = scope.names.get(name)
+            e.slot = scope.declare(name)
+            self.resolve(e.body, scope)
+            if shadowed is None:
+                del scope.names[name]
+            else:
+                scope.names[name] = shadowed
+        elif isinstance(e, Lambda):
+            inner = Scope(scope)
+            inner.declare(e.var.name)
+            self.resolve(e.body, inner)
+            e.frame_size = inner.size
+        elif isinstance(e, Expr):
+            for child in self.children(e):
+                self.resolve(child, scope)
+
+    def children(self, e : Expr):
+        for k, v in node_fields(e):
+            if k in self.SKIP:
+                continue
+            if isinstance(v, Expr):
+                yield v
+            elif isinstance(v, list):
+                for x in v:
+                    if isinstance(x, Expr):
+                        yield x
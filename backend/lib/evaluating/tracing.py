@@ -0,0 +1,51 @@
+from loguru import logger
+
+"""
+Trace points for the Interpreter and the Normalizer.
+
+Every trace point is guarded by the tracer's flag:
+
+   if tracer.on:
+       tracer.emit('apply', rator, rand)
+
+so with no sink attached a trace point costs one attribute read and
+builds nothing. When on, the event is handed to each sink as its name
+and a tuple of the objects involved, unformatted; a sink that wants
+text formats what it receives (see log_sink).
+
+Events:
+   define    (var, value)       a top-level definition was evaluated
+   apply     (closure, operand) an evaluator applies a closure
+   check     (e, τ)             the Normalizer starts checking e against τ
+   checked   (e, τ)             ... and e is the result
+   synth_app (operator, operand) the Normalizer synthesized an application
+"""
+
+class Tracer():
+    __slots__ = ('on', 'sinks')
+
+    def __init__(self):
+        self.on : bool = False
+        self.sinks : list = []
+
+    ## sink is called as sink(event, payload) for every event
+    def attach(self, sink):
+        self.sinks.append(sink)
+        self.on = True
+
+    def detach(self, sink):
+        self.sinks.remove(sink)
+        self.on = bool(self.sinks)
+
+    def emit(self, event : str, *payload):
+        for sink in self.sinks:
+            sink(event, payload)
+
+tracer = Tracer()
+
+## a sink sending each event to loguru at level; the payload is only
+## stringified if loguru keeps the message
+def log_sink(level : str='DEBUG'):
+    def sink(event : str, payload : tuple):
+        logger.opt(lazy=True).log(level, "{}: {}", lambda: event, lambda: ", ".join(map(str, payload)))
+    return sink
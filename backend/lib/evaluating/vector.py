@@ -0,0 +1,96 @@
+from array import array as _array
+from functools import reduce
+from itertools import repeat
+
+try:
+    from ..defs import *
+except:
+    from defs import *
+
+"""
+Numeric list runtime shared by the Interpreter, Compiler and Machine.
+
+A list whose elements all evaluate to numbers is packed into one
+VNumList instead of a VNumber per element. The buffer is an array of
+64-bit ints when every element fits, and otherwise a list of ints and
+Fractions, so nothing is rounded. Buffers are held in a PList, so cdr
+is a view that shares its buffer and append onto a list nothing else
+extends writes into that buffer. The list rules below work on the whole
+buffer on packed lists, and on the elements of any other VList:
+
+   car, cdr, empty, length, append, member
+   Plus and Times with a list on either side: elementwise between two
+   lists of the same length, or a number against every element
+"""
+
+## the buffer for a list of numbers
+def numbers(xs : list) -> PList:
+    try:
+        return PList(_array('q', xs), owned=True)
+    except (OverflowError, TypeError):
+        return PList(xs, owned=True)
+
+## the value of a List whose elements evaluated to vs
+def pack_list(vs : list[Value], ty : Type) -> VList:
+    if not vs or not all([v.__class__ is VNumber for v in vs]):
+        return VList(vs, ty)
+    elem = reduce(merge_numeric_types, [v.type for v in vs])
+    return VNumList(numbers([v.value for v in vs]), ty, elem)
+
+
+def list_car(l : VList) -> Value:
+    if isinstance(l, VNumList):
+        return VNumber(l.data[0], l.elem)
+    return l.values[0]
+
+def list_cdr(l : VList) -> VList:
+    if isinstance(l, VNumList):
+        return VNumList(l.data[1:], l.type, l.elem)
+    return VList(plist(l.values)[1:], l.type)
+
+def list_append(l1 : VList, l2 : VList) -> VList:
+    if isinstance(l1, VNumList) and isinstance(l2, VNumList):
+        return VNumList(plist(l1.data) + l2.data, l1.type, merge_numeric_types(l1.elem, l2.elem))
+    ## an empty list keeps the other packed
+    if isinstance(l2, VNumList) and l1.length() == 0:
+        return VNumList(l2.data, l1.type, l2.elem)
+    if isinstance(l1, VNumList) and l2.length() == 0:
+        return l1
+    return VList(plist(l1.values) + l2.values, l1.type)
+
+def list_member(x : Value, l : VList) -> VBoolean:
+    if isinstance(l, VNumList):
+        return to_boolean(isinstance(x, VNumber) and x.value in l.data)
+    x = x.value if isinstance(x, Value) else x
+    return to_boolean(any([(v.value if isinstance(v, Value) else v) == x for v in l.values]))
+
+
+## (buffer, element type) of a list of numbers; None for an empty list
+def _unpack(l : VList):
+    if not isinstance(l, VNumList):
+        if l.length() == 0:
+            return (), None
+        l = pack_list(l.values, l.type)
+        if not isinstance(l, VNumList):
+            raise RuntimeError(f"Expected a list of numbers, got {l}")
+    return l.data, l.elem
+
+## op (plus or times, see rational.py) where n1 or n2 is a list
+def list_arith(op, n1 : Value, n2 : Value) -> VList:
+    if isinstance(n1, VList) and isinstance(n2, VList):
+        (x1, t1), (x2, t2) = _unpack(n1), _unpack(n2)
+        if len(x1) != len(x2):
+            raise RuntimeError(f"Expected lists of the same length, got {n1}, {n2}")
+        data = list(map(op, x1, x2))
+    elif isinstance(n1, VList) and isinstance(n2, VNumber):
+        (x1, t1), t2 = _unpack(n1), n2.type
+        data = list(map(op, x1, repeat(n2.value)))
+    elif isinstance(n1, VNumber) and isinstance(n2, VList):
+        t1, (x2, t2) = n1.type, _unpack(n2)
+        data = list(map(op, repeat(n1.value), x2))
+    else:
+        raise RuntimeError(f"Expected numbers, got {n1}, {n2}")
+    if not data:
+        return VList([], n1.type if isinstance(n1, VList) else n2.type)
+    elem = merge_numeric_types(t1, t2) if t1 is not None and t2 is not None else t1 or t2
+    return VNumList(numbers(data), TList(elem), elem)
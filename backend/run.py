@@ -1,23 +1,57 @@
 from argparse import ArgumentParser
-from lib import Parser, Interpreter
+from lib import Parser, Interpreter, Compiler, Machine, ModuleCache, DEFAULT_DIR, tracer, log_sink, Profiler
 from loguru import logger
 
+ENGINES = {
+    'interp'  : Interpreter,
+    'compile' : Compiler,
+    'machine' : Machine,
+}
+
 if __name__ == "__main__":
     p : ArgumentParser = ArgumentParser()
     p.add_argument('file')
+    p.add_argument('--engine', choices=list(ENGINES), default='interp',
+                   help="tree-walking interpreter, compile to closures first, "
+                        "or evaluate on an explicit stack (for deep recursion)")
+    p.add_argument('--cache-dir', default=DEFAULT_DIR,
+                   help="where parsed modules are kept between runs")
+    p.add_argument('--no-cache', action='store_true',
+                   help="always parse the file from scratch")
+    p.add_argument('--trace', action='store_true',
+                   help="log closure applications and definitions as they are evaluated")
+    p.add_argument('--profile', action='store_true',
+                   help="time evaluation per node class and defunc, writing FILE.prof.json "
+                        "and FILE.folded (collapsed stacks for flame graphs)")
+    p.add_argument('--workers', type=int, default=1,
+                   help="evaluate the top-level expressions on this many processes")
     args = p.parse_args()
     fname = args.file
+    if args.trace:
+        tracer.attach(log_sink())
+    if args.profile and args.engine != 'interp':
+        p.error("--profile needs --engine interp")
+    if args.profile and args.workers > 1:
+        p.error("--profile only sees this process, so it needs --workers 1")
     with open(fname, 'r') as f:
         exp = f.read()
-        pars = Parser(exp)
-        interp = Interpreter()
-        es = pars.parse_file()
-        logger.info([str(e) for e in es])
+        interp = ENGINES[args.engine]()
+        if args.profile:
+            profiler = Profiler()
+            profiler.attach(interp)
+        if args.no_cache:
+            es = Parser(exp).parse_file()
+        else:
+            es = ModuleCache(args.cache_dir).parse(exp)
+        logger.opt(lazy=True).info("{}", lambda: [str(e) for e in es])
         ρ = interp.init_env(es)
-        logger.info(str(ρ))
-        vs = interp.eval_file(es, ρ)
+        vs = interp.eval_file(es, ρ, args.workers)
     for v in vs:
         print(v)
+    if args.profile:
+        profiler.detach()
+        profiler.write_json(fname + ".prof.json")
+        profiler.write_collapsed(fname + ".folded")
 
 # if __name__ == "__main__":
 #     p = Parser("List Nat")
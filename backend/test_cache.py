@@ -0,0 +1,46 @@
+from loguru import logger
+from tempfile import TemporaryDirectory
+import glob
+import os
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+## the package doesn't re-export names that shadow stdlib modules
+assert callable(glob.glob)
+
+src = """defconst [a : Nat] 3
+defunc inc : [x : Nat] -> Nat: x + a
+inc(a)
+"""
+
+with TemporaryDirectory() as d:
+    cache = ModuleCache(d)
+    assert cache.load(src) is None
+
+    es = cache.parse(src)
+    assert [e.__class__ for e in es] == [Defconst, Defunc, Application]
+    assert os.path.exists(cache.entry(src))
+
+    ## a later run loads the same module from disk
+    again = ModuleCache(d).parse(src)
+    assert again is not es
+    assert [str(e) for e in again] == [str(e) for e in es]
+    i = Interpreter()
+    assert i.eval_file(again, i.init_env(again))[0].value == 6
+
+    nfs = ModuleCache(d).normalize(src)
+    assert nfs[-1].val == 6
+    assert ModuleCache(d).load(src)["normal"][-1].val == 6
+
+    ## a changed source gets its own entry
+    assert cache.entry(src) != cache.entry(src + "\n")
+
+    ## a damaged entry is rebuilt
+    with open(cache.entry(src), "wb") as f:
+        f.write(b"not a module")
+    assert [str(e) for e in cache.parse(src)] == [str(e) for e in es]
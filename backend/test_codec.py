@@ -0,0 +1,65 @@
+from loguru import logger
+from fractions import Fraction
+from io import BytesIO
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+def round_trip(v):
+    [w] = loads(dumps(v))
+    return w
+
+## scalars
+for v in [0, 1, -1, 63, -64, 2**70, -2**70, Fraction(-3, 4), 0.5, "", "héllo", True, False, None, [1, [2, "x"]]]:
+    w = round_trip(v)
+    assert w == v and type(w) is type(v)
+
+## parsed terms keep their structure, types and spans
+src = """defunc inc : [x : Nat] -> Nat: x + 1
+let [ls : List Int] be [1, -2, 3] in: inc(4)
+"""
+es = Parser(src).parse_file()
+es2 = round_trip(es)
+assert [str(e) for e in es2] == [str(e) for e in es]
+assert isinstance(es2[0].var.type, TFunction) and isinstance(es2[1].bind.values[1].val, int)
+assert str(es2[1].span) == str(es[1].span) == "2:1"
+
+## shared subterms are written once and come back shared
+n = Literal(7, TNat())
+shared = Plus(n, n)
+back = round_trip(shared)
+assert back.e1 is back.e2
+assert len(dumps(Plus(n, n))) < len(dumps(Plus(Literal(7, TNat()), Literal(7, TNat()))))
+
+## streaming: values written one at a time, read one at a time from a view
+out = BytesIO()
+enc = Encoder(out)
+enc.write(es[0])
+enc.write(Literal(Fraction(1, 3), TRational()))
+enc.write(es[0])
+values = list(Decoder(memoryview(out.getvalue())))
+assert len(values) == 3 and values[0] is values[2]
+assert values[1].val == Fraction(1, 3)
+
+## errors survive
+[err] = loads(dumps(NbEError("bad type")))
+assert isinstance(err, NbEError) and str(err) == "bad type"
+
+## streams from another format version or cut short are refused
+data = dumps(es)
+for bad in [data[:4] + b"\x09" + data[5:], data[:len(data) // 2], b"nope"]:
+    try:
+        loads(bad)
+        assert False
+    except DecodeError:
+        pass
+
+## the shared types and values decode to the same objects, so decoded
+## terms hash-cons together with fresh ones
+for v in [NAT_TYPE, INT_TYPE, RATIONAL_TYPE, STRING_TYPE, BOOLEAN_TYPE, UNIVERSE0, PLACEHOLDER, true, false, nothing]:
+    assert loads(dumps(v))[0] is v
+assert intern(TList(NAT_TYPE)) is intern(loads(dumps(TList(NAT_TYPE)))[0])
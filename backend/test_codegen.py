@@ -0,0 +1,56 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+n = Normalizer()
+
+
+def normalize(s, t):
+    return n.check(Context(), Parser(s).parse_expr(), Parser(t).parse_type())
+
+
+## lambdas become Python functions, if a native conditional
+e = normalize("lambda [x : Nat] [y : Nat] : if x == y then x * 2 else y", "[x : Nat] -> [y : Nat] -> Nat")
+f = CodeGen().build(e)()
+assert f(3)(3) == 6
+assert f(3)(4) == 4
+assert " if " in CodeGen().generate(e)
+
+## variables left free become parameters
+e = normalize("lambda [x : Nat] : x + 1", "[x : Nat] -> Nat").body
+assert CodeGen().build(e)(41) == 42
+
+## induct the Normalizer left stuck becomes a loop
+x = Variable("x", TNat())
+k = Variable("k", TNat())
+ih = Variable("ih", TNat())
+sum_evens = Induct(x, None, Literal(0, TNat()), [Lambda([k, ih], Plus(ih, Times(k, Literal(2, TNat()))))], TNat())
+sum_evens.normalized = True
+src = CodeGen().generate(sum_evens)
+assert "for " in src and "range(" in src
+assert CodeGen().build(sum_evens)(10) == sum([2 * i for i in range(10)])
+
+elem = Variable("e", TNat())
+ls = Variable("ls", TList(TNat()))
+rev = Induct(ls, None, List([], TList(TNat())), [Lambda([elem, ih], Append(ih, List([elem], TList(TNat())), TList(TNat())))], TList(TNat()))
+rev.normalized = True
+assert CodeGen().build(rev)([1, 2, 3]) == [3, 2, 1]
+
+## straight from the Normalizer: induct on a neutral argument stays stuck
+e = normalize("lambda [m : Nat] : induct (2 + m) (lambda [n : Nat] : Nat) 0 (lambda [k : Nat] : lambda [ih : Nat] : ih + 2) qed", "[m : Nat] -> Nat")
+assert CodeGen().build(e)()(5) == 14
+
+## the same term is only compiled once
+assert CodeGen().build(rev).__code__ is CodeGen().build(rev).__code__
+
+## only normalized terms are accepted
+try:
+    CodeGen().generate(Plus(Literal(1, TNat()), Literal(2, TNat())))
+    assert False
+except CompileError:
+    pass
@@ -0,0 +1,52 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+
+## runs a file through an engine, returning the printed form of each value
+def run(engine, s):
+    es = Parser(s).parse_file()
+    ρ = engine.init_env(es)
+    return [str(v) for v in engine.eval_file(es, ρ)]
+
+
+## the compiled engine agrees with the interpreter
+programs = [
+    "let [x : Nat] be 1 in: let [f : Nat -> Nat] be lambda [y : Nat] : x + y in: let [x : Nat] be 10 in: f(x)",
+    '''
+    defconst [k : Nat] 5
+    defunc add : [x : Nat] -> [y : Nat] -> Nat: x + y + k
+    add(1 2)
+    let [g : Nat -> Nat] be add(10) in: g(g(0))
+    ''',
+    "(2 * 3) + -1",
+    "true or (not false)",
+    "[1, 2, 3]",
+]
+for s in programs:
+    assert run(Compiler(), s) == run(Interpreter(), s), s
+
+e = Cdr(Append(Literal([1, 2], TList(TNat())), Literal([3], TList(TNat())), TList(TNat())))
+assert Compiler().eval(e).values == Interpreter().eval(e).values == [2, 3]
+
+## a lambda body is compiled once, however many times it is applied
+compiled = []
+class CountingCompiler(Compiler):
+    def compile(self, e):
+        compiled.append(e)
+        return super().compile(e)
+s = "let [f : Nat -> Nat] be lambda [x : Nat] : x + 1 in: f(f(f(f(0))))"
+assert run(CountingCompiler(), s) == ["4"]
+assert len(compiled) == len(set(map(id, compiled)))
+
+## unbound variables are still reported at run time
+try:
+    Compiler().eval(Variable("nope", TNat()))
+    assert False
+except UnboundVariable:
+    pass
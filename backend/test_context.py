@@ -0,0 +1,54 @@
+from loguru import logger
+import random
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+
+## persistent map agrees with dict, and old versions are untouched
+random.seed(0)
+m = PMap()
+d = {}
+versions = []
+for i in range(2000):
+    k = random.randrange(500)
+    m = m.set(k, i)
+    d[k] = i
+    if i % 400 == 0:
+        versions.append((m, dict(d)))
+for m_i, d_i in versions:
+    assert len(m_i) == len(d_i)
+    assert all(m_i.get(k) == v for k, v in d_i.items())
+    assert dict(m_i.items()) == d_i
+assert m.get(-1) is None
+
+
+## keys whose hashes collide
+class Key():
+    def __init__(self, v):
+        self.v = v
+    def __hash__(self):
+        return 42
+    def __eq__(self, other):
+        return self.v == other.v
+
+m = PMap().set(Key(1), "a").set(Key(2), "b").set(Key(1), "c")
+assert len(m) == 2
+assert m.get(Key(1)) == "c" and m.get(Key(2)) == "b" and m.get(Key(3)) is None
+
+
+## extending a Context leaves the original as it was
+x = Variable("x", TNat())
+Γ = Context().extend(x, x)
+Γ2 = Γ.extend(Variable("y", TNat()), Normalizer().eval(Literal(3, TNat())))
+y3 = Γ2.lookup("y")
+assert y3.val == 3
+try:
+    Γ.lookup("y")
+    assert False
+except UnboundVariable:
+    pass
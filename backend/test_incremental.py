@@ -0,0 +1,49 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+src = """defconst [a : Nat] 3
+defunc inc : [x : Nat] -> Nat: x + a
+defconst [b : Nat] inc(4)
+defconst [c : Nat] 10
+inc(b)
+"""
+
+ic = IncrementalChecker()
+res = ic.check(src)
+assert [r.val for r in res if isinstance(r, Literal)] == [3, 7, 10, 10]
+assert ic.normalized == 5
+
+## nothing changed: everything is reused
+ic.check(src)
+assert ic.normalized == 0
+
+## editing a definition redoes it and its dependents only
+res = ic.check(src.replace("[a : Nat] 3", "[a : Nat] 5"))
+assert ic.normalized == 4
+assert res[-1].val == 14
+
+ic.check(src)
+res = ic.check(src.replace("[c : Nat] 10", "[c : Nat] 11"))
+assert ic.normalized == 1
+assert res[3].val == 11
+
+## a definition that fails to check reports its error, in place
+res = ic.check(src.replace("[c : Nat] 10", "[c : Nat] \"ten\""))
+assert isinstance(res[3], Exception) and res[-1].val == 10
+
+## checking on a pool gives the same normal forms, and only redoes
+## what an edit touched
+pc = IncrementalChecker()
+res = pc.check(src, workers=3)
+assert [r.val for r in res if isinstance(r, Literal)] == [3, 7, 10, 10]
+assert pc.normalized == 5
+res = pc.check(src.replace("[a : Nat] 3", "[a : Nat] 5"), workers=3)
+assert pc.normalized == 4 and res[-1].val == 14
+res = pc.check(src.replace("[c : Nat] 10", "[c : Nat] \"ten\""), workers=3)
+assert isinstance(res[3], Exception) and res[-1].val == 10
@@ -0,0 +1,40 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+i = Interpreter()
+ls = Literal([1, 2, 3], TList(TNat()))
+
+## list operations
+assert i.eval(Append(ls, Literal([4], TList(TNat())), TList(TNat()))).values == [1, 2, 3, 4]
+assert i.eval(Empty(ls)).value == False
+assert i.eval(Empty(Literal([], TList(TNat())))).value == True
+assert i.eval(Car(ls)) == 1
+assert i.eval(Cdr(ls)).values == [2, 3]
+
+## if: only false and nothing are falsy
+assert i.eval(If(ENothing(TNat()), Literal(1, TNat()), Literal(2, TNat()))).value == 2
+assert i.eval(If(Literal(0, TNat()), Literal(1, TNat()), Literal(2, TNat()))).value == 1
+
+## just wraps the evaluated value
+j = i.eval(Just(Plus(Literal(1, TNat()), Literal(2, TNat()))))
+assert isinstance(j, VJust) and j.value.value == 3
+
+## subclasses of a node dispatch through their parent's rule
+class Sum(Plus):
+    pass
+assert i.eval(Sum(Literal(1, TNat()), Literal(2, TNat()))).value == 3
+
+## booleans and nothing are the shared constants, base types are shared
+assert i.eval(Not(Literal(True, TBoolean()))) is false
+assert i.eval(Empty(ls)) is false and i.eval(Empty(Literal([], TList(TNat())))) is true
+assert i.eval(ENothing()) is nothing
+assert Plus(Literal(1, TNat()), Literal(2, TNat())).type is NAT_TYPE
+e = Parser("let [x : Nat] be 3 in: x").parse_expr()
+assert e.var.type is NAT_TYPE and e.bind.type is NAT_TYPE
+assert getattr(NAT_TYPE, 'span', None) is None
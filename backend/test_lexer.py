@@ -0,0 +1,47 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+
+ts = tokenize('let [x : Nat] be -1 in: f(x, "a, b")')
+assert [t.text for t in ts] == ['let', '[', 'x', ':', 'Nat', ']', 'be', '-1', 'in', ':',
+                                'f', '(', 'x', ',', '"a, b"', ')', '']
+assert [t.kind for t in ts][-3:] == [STRING, PUNCT, EOF]
+assert ts[7].kind == NUMBER
+
+
+## offsets point back into the source
+src = "defunc foo : [y : Int] -> Int:\n    y - one"
+for t in tokenize(src):
+    assert src[t.start:t.end] == t.text
+assert [t.text for t in tokenize("x -> y")] == ['x', '->', 'y', '']
+assert [t.text for t in tokenize("cdr-of-ls == 1")] == ['cdr-of-ls', '==', '1', '']
+
+
+## f(x) is an application, f (x) is not
+p = Parser("f(x)")
+assert str(p.parse_expr()) == "((Var f : Type) (Var x : Type))"
+p = Parser("f (x)")
+assert str(p.parse_expr()) == "(Var f : Type)"
+
+
+try:
+    tokenize('"unterminated')
+    assert False
+except SyntaxError:
+    pass
+
+
+## spans
+src = 'let [y : Nat] be 5 in:\n    y + bar(1 2)'
+e = Parser(src).parse_expr()
+assert (e.span.start, e.span.end) == (0, len(src))
+assert (e.body.span.line, e.body.span.col) == (2, 5)
+app = e.body.e2
+assert src[app.span.start:app.span.end] == "bar(1 2)"
+assert str(app.operand.span) == "2:15"
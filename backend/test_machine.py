@@ -0,0 +1,60 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+nat = TNat()
+nats = TList(TNat())
+
+
+## defunc len : [l : List Nat] -> Nat: if empty(l) then 0 else 1 + len(cdr(l))
+def length():
+    l = Variable("l", nats)
+    body = If(Empty(Variable("l", nats)),
+              Literal(0, nat),
+              Plus(Literal(1, nat), Application(Variable("len", nat), Cdr(Variable("l", nats)))))
+    return Defunc(Variable("len", TFunction(l, nat)), Lambda([l], body))
+
+
+## defunc count : [l : List Nat] -> [acc : Nat] -> Nat: if empty(l) then acc else count(cdr(l) acc + 1)
+def count():
+    l = Variable("l", nats)
+    acc = Variable("acc", nat)
+    body = If(Empty(Variable("l", nats)),
+              Variable("acc", nat),
+              Application(Application(Variable("count", nat), Cdr(Variable("l", nats))),
+                          Plus(Variable("acc", nat), Literal(1, nat))))
+    return Defunc(Variable("count", nat), Lambda([l, acc], body))
+
+
+def program(n):
+    xs = Defconst(Variable("xs", nats), Literal([1] * n, nats))
+    return [xs, length(), count(),
+            Application(Variable("len", nat), Variable("xs", nats)),
+            Application(Application(Variable("count", nat), Variable("xs", nats)), Literal(0, nat))]
+
+
+def run(engine, es):
+    ρ = engine.init_env(es)
+    return [v.value for v in engine.eval_file(es, ρ)]
+
+
+## same answers as the interpreter where the interpreter can run
+es = program(50)
+assert run(Machine(), es) == run(Interpreter(), es) == [50, 50]
+
+s = "let [x : Nat] be 1 in: let [f : Nat -> Nat] be lambda [y : Nat] : x + y in: let [x : Nat] be 10 in: f(x)"
+assert run(Machine(), Parser(s).parse_file()) == [11]
+
+## recursion far deeper than the Python stack allows
+es = program(3000)
+try:
+    run(Interpreter(), es)
+    assert False
+except RecursionError:
+    pass
+assert run(Machine(), es) == [3000, 3000]
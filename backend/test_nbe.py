@@ -89,3 +89,80 @@ exp21_p = i.eval(exp21)
 assert isinstance(exp21_p, Literal)
 assert exp21_p.val == 6
 
+
+## Induction
+
+exp22 = Parser("induct 3 (lambda [n : Nat] : Nat) 0 (lambda [k : Nat] : lambda [ih : Nat] : ih + k) qed").parse_expr()
+exp22_p = i.eval(exp22)
+assert isinstance(exp22_p, Literal)
+assert exp22_p.val == 3
+
+exp23 = Parser("let [xs : List Nat] be [4, 5, 6] in: induct xs (lambda [l : List Nat] : Nat) 0 (lambda [x : Nat] : lambda [ih : Nat] : ih + x) qed").parse_expr()
+exp23_p = i.eval(exp23)
+assert isinstance(exp23_p, Literal)
+assert exp23_p.val == 15
+
+## unfolding does not recurse on the Python stack
+exp24 = Parser("induct 5000 (lambda [n : Nat] : Nat) 0 (lambda [k : Nat] : lambda [ih : Nat] : ih + 1) qed").parse_expr()
+assert i.eval(exp24).val == 5000
+
+exp25 = Parser("let [xs : List Nat] be [" + ",".join(["2"] * 5000) + "] in: induct xs (lambda [l : List Nat] : Nat) 0 (lambda [x : Nat] : lambda [ih : Nat] : ih + x) qed").parse_expr()
+assert i.eval(exp25).val == 10000
+
+int_steps = "(lambda [k : Int] : lambda [ih : Int] : ih + 1) (lambda [k : Int] : lambda [ih : Int] : ih + -1) qed"
+exp26 = Parser("induct -3 (lambda [i : Int] : Int) 0 " + int_steps).parse_expr()
+assert i.eval(exp26).val == -3
+exp27 = Parser("induct 4 (lambda [i : Int] : Int) 0 " + int_steps).parse_expr()
+assert i.eval(exp27).val == 4
+exp28 = Parser("induct -20000 (lambda [i : Int] : Int) 0 " + int_steps).parse_expr()
+assert i.eval(exp28).val == -20000
+
+## a literal offset on a neutral argument unfolds around a stuck induct
+exp29 = Parser("lambda [m : Int] : induct (-2 + m) (lambda [i : Int] : Int) 0 " + int_steps).parse_expr()
+exp29_p = i.check(Context(), exp29, Parser("[m : Int] -> Int").parse_type())
+assert isinstance(exp29_p.body, Plus) and isinstance(exp29_p.body.e1.e1, Induct)
+
+
+## Hash-consing
+
+## identical normal forms are one shared object
+exp30_a = i.eval(Parser("2 + 3").parse_expr())
+exp30_b = i.eval(Parser("1 + 4").parse_expr())
+assert exp30_a is exp30_b
+assert i.synth(Context(), TNat()) is i.synth(Context(), TNat())
+
+## retyping a shared term copies it
+exp31 = i.check(Context(), Literal(5, TNat()), TInt())
+assert isinstance(exp31.type, TInt) and isinstance(exp30_a.type, TNat)
+
+## unreferenced normal forms leave the table
+import gc
+before = table_size()
+exp32 = i.eval(Parser("700 * 8").parse_expr())
+assert table_size() > before
+del exp32
+gc.collect()
+assert table_size() <= before
+
+
+## Alpha equivalence
+
+exp33_a = i.synth(Context(), Parser("[x : Nat] -> List Nat").parse_type())
+exp33_b = i.synth(Context(), Parser("[x : Nat] -> List String").parse_type())
+assert alpha_hash(exp33_a) != alpha_hash(exp33_b)
+assert not alpha_equiv(exp33_a, exp33_b)
+assert alpha_equiv(exp33_a, exp33_a)
+
+## bound variables hash by position, not by name
+exp34_a = Lambda([Variable("x", TNat())], Variable("x", TNat()))
+exp34_b = Lambda([Variable("y", TNat())], Variable("y", TNat()))
+assert alpha_hash(exp34_a) == alpha_hash(exp34_b)
+assert alpha_hash(exp34_a) != alpha_hash(Lambda([Variable("y", TNat())], Variable("x", TNat())))
+
+## binders seen by one comparison do not leak into the next
+assert alpha_equiv(exp34_a, exp34_b)
+assert not alpha_equiv(Variable("x", TNat()), Variable("y", TNat()))
+
+## check tells type-level terms apart by structure, not by printing them
+assert mentions_type(TList(PLACEHOLDER)) and mentions_type(Variable("a"))
+assert not mentions_type(TList(NAT_TYPE)) and not mentions_type(UNIVERSE0)
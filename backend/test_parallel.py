@@ -0,0 +1,44 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+src = """
+defunc double : [n : Nat] -> Nat:
+    n * 2
+
+""" + "\n".join([f"double({k}) + {k}" for k in range(40)])
+
+## the pool gives the same values, in source order, as evaluating in turn
+for engine in [Interpreter(), Compiler(), Machine()]:
+    es = Parser(src).parse_file()
+    ρ = engine.init_env(es)
+    serial = [v.value for v in engine.eval_file(es, ρ)]
+    assert serial == [3 * k for k in range(40)]
+    assert [v.value for v in engine.eval_file(es, ρ, workers=3)] == serial
+
+## packed lists come back packed
+es = Parser("[1, 2] * 3\n[4] + [5]").parse_file()
+i = Interpreter()
+vs = i.eval_file(es, i.init_env(es), workers=2)
+assert [list(v.data) for v in vs] == [[3, 6], [9]] and isinstance(vs[0], VNumList)
+
+## a failure in a worker is raised here
+es = Parser("1\n[1, 2] + [3]").parse_file()
+i = Interpreter()
+try:
+    i.eval_file(es, i.init_env(es), workers=2)
+    assert False
+except RuntimeError:
+    pass
+
+## closures come back without their compiled code, which can't be pickled
+c = Compiler()
+es = Parser("defunc id : [n : Nat] -> Nat:\n    n\n\nid\nid").parse_file()
+f, _ = c.eval_file(es, c.init_env(es), workers=2)
+assert isinstance(f, Closure) and f.code is None
+assert Interpreter().apply_closure(f, VNumber(4, TNat())).value == 4
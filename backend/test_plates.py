@@ -0,0 +1,103 @@
+import os
+from loguru import logger
+from operator import add, neg
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+def square(x):
+    return x * x
+
+with SharedPlate.from_list([[1, 2, 3], [4, 5, 6]]) as p:
+    assert p.shape == (2, 3) and p.size == 6 and p[1, 2] == 6 and p[-1, 0] == 4
+
+    ## slices are views of the same memory
+    col = p[:, 1]
+    assert col.shape == (2,) and col.tolist() == [2, 5] and not col.contiguous()
+    col[:] = [20, 50]
+    assert p.tolist() == [[1, 20, 3], [4, 50, 6]]
+    p[0] = 7
+    assert p[0].tolist() == [7, 7, 7] and p[::-1, ::2].tolist() == [[4, 6], [7, 7]]
+
+    ## workers attach to the same memory: results need no copying back
+    sq = pmap(square, p, workers=2)
+    assert sq.tolist() == [[49, 49, 49], [16, 2500, 36]]
+    pmap(neg, p[1], out=p[1], workers=2)
+    assert p.tolist() == [[7, 7, 7], [-4, -50, -6]]
+    assert preduce(add, p, workers=3) == -39
+    assert preduce(add, p[:, 2], initial=100, workers=2) == 101
+    sq.close()
+
+    ## a Closure is applied to each element by the Interpreter
+    double = Interpreter().eval(Lambda([Variable("x", TInt())], Plus(Variable("x", TInt()), Variable("x", TInt()))))
+    with pmap(double, p[0], workers=2) as d:
+        assert d.tolist() == [14, 14, 14]
+
+    try:
+        p[0] = [1, 2]
+        assert False
+    except RuntimeError:
+        pass
+
+## values and types: a VPlate shares its Plate
+with SharedPlate.create((2, 2), 'B') as m:
+    m[:] = 5
+    v = VPlate(m, TPlate(TNat()))
+    assert str(v) == "Plate[2, 2]" and str(v.type) == "Plate[Nat]"
+    assert preduce(add, v.value, workers=2) == 20
+
+## only integer elements: floats would round
+try:
+    SharedPlate.create((2,), 'd')
+    assert False
+except RuntimeError:
+    pass
+
+## a list that doesn't fit the format leaves no segment behind
+before = set(os.listdir("/dev/shm"))
+for xs, code in [([1.5, 2], 'q'), ([-1, 2], 'B'), ([1, [2]], 'q'), ([[1, 2], [3]], 'q')]:
+    try:
+        SharedPlate.from_list(xs, code)
+        assert False
+    except RuntimeError:
+        pass
+assert set(os.listdir("/dev/shm")) <= before
+
+with SharedPlate.from_list([1, 2], 'B') as p:
+    for key, v in [(0, 1.5), (0, -1), (slice(None), [1, 300])]:
+        try:
+            p[key] = v
+            assert False
+        except RuntimeError:
+            pass
+    assert p.tolist() == [1, 2]
+
+## closing frees the segment even while a view of its memory is held
+p = SharedPlate.from_list([1, 2])
+held = p.memory()
+p.close()
+assert not p.owner
+try:
+    SharedMemory(name=p.shm.name)
+    assert False
+except FileNotFoundError:
+    pass
+del held
+
+assert isinstance(Parser("Plate Nat").parse_type(), TPlate)
+assert isinstance(Normalizer().synth(Context(), TPlate(TNat())), TPlate)
+try:
+    Normalizer().synth(Context(), TPlate(TString()))
+    assert False
+except NbEError:
+    pass
+try:
+    Normalizer().synth(Context(), Parser("Plate Rational").parse_type())
+    assert False
+except NbEError:
+    pass
@@ -0,0 +1,48 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+src = """
+defunc pick : [n : Nat] -> Nat:
+    if n then 1 else 0
+
+let [x : Nat] be 3 in: x + 4 * 2
+pick(3)
+"""
+
+es = Parser(src).parse_file()
+p = Profiler()
+i = p.attach(Interpreter())
+ρ = i.init_env(es)
+assert [v.value for v in i.eval_file(es, ρ)] == [11, 1]
+p.detach()
+assert not tracer.on
+
+frames = p.summary()["frames"]
+assert frames["Literal"]["calls"] == 5
+assert frames["defunc:pick"]["calls"] == 1 and frames["If"]["calls"] == 1
+assert frames["Let"]["cum_us"] >= frames["Let"]["self_us"]
+assert p.peak_depth == 4 and not p.stack
+
+## every collapsed line is a path of frames and a count
+for line in p.collapsed():
+    path, n = line.rsplit(" ", 1)
+    assert int(n) > 0 and path.split(";")[0] in ("Application", "Lambda", "Let")
+
+## the Normalizer names its frames by pass
+p = Profiler()
+n = p.attach(Normalizer())
+n.check(Context(), Plus(Literal(1, TNat()), Literal(2, TNat())), TNat())
+assert p.stats["check:Plus"].calls == 1 and p.stats["synth:Literal"].calls == 2
+
+## the Compiler doesn't go through _eval, so it can't be profiled this way
+try:
+    Profiler().attach(Compiler())
+    assert False
+except TypeError:
+    pass
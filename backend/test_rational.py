@@ -0,0 +1,48 @@
+from loguru import logger
+from fractions import Fraction
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+## literals are read from their text, never through a float
+assert parse_rational("0.1") == Fraction(1, 10)
+assert parse_rational("-2.50") == Fraction(-5, 2)
+assert parse_rational("3.0") == 3 and parse_rational("3.0").__class__ is int
+assert parse_rational("123456789012345678901234567890") == 123456789012345678901234567890
+l = Parser("0.1").parse_expr()
+assert l.val == Fraction(1, 10) and isinstance(l.type, TRational)
+
+## whole results stay ints
+assert divide(6, 3).__class__ is int and divide(6, 3) == 2
+assert divide(1, 3) == Fraction(1, 3)
+assert divide(Fraction(1, 2), Fraction(1, 4)).__class__ is int
+assert remainder(7, 3) == 1 and remainder(-7, 3) == 2
+assert remainder(Fraction(7, 2), 1) == Fraction(1, 2)
+assert plus(Fraction(1, 3), Fraction(2, 3)).__class__ is int and times(Fraction(3, 2), 2).__class__ is int
+
+def lit(v):
+    return Literal(v, TRational() if isinstance(v, Fraction) else TNat() if v >= 0 else TInt())
+
+for engine in [Interpreter(), Compiler(), Machine()]:
+    third = engine.eval(Divide(lit(1), lit(3)))
+    assert third.value == Fraction(1, 3) and isinstance(third.type, TRational)
+    assert engine.eval(Times(Divide(lit(1), lit(3)), lit(3))).value.__class__ is int
+    assert engine.eval(Plus(lit(Fraction(1, 2)), lit(Fraction(1, 2)))).value.__class__ is int
+    ## whole results stay packed as machine ints
+    halves = engine.eval(Times(List([lit(4), lit(6)], TList(TNat())), lit(Fraction(1, 2))))
+    assert halves.data.buf.typecode == 'q' and list(halves.data) == [2, 3]
+    assert engine.eval(Mod(lit(17), lit(5))).value == 2
+    assert engine.eval(Plus(lit(Fraction(1, 10)), lit(Fraction(2, 10)))).value == Fraction(3, 10)
+    for e in [Divide(lit(1), lit(0)), Mod(lit(1), lit(0))]:
+        try:
+            engine.eval(e)
+            assert False
+        except RuntimeError:
+            pass
+
+## the normalizer takes rational literals too
+assert Normalizer().eval(Plus(lit(Fraction(1, 2)), lit(1))).val == Fraction(3, 2)
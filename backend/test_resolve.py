@@ -0,0 +1,43 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+
+def run(s):
+    es = Parser(s).parse_file()
+    i = Interpreter()
+    ρ = i.init_env(es)
+    return [v.value for v in i.eval_file(es, ρ)]
+
+
+## closures capture their defining frame; later lets don't leak into it
+s1 = "let [x : Nat] be 1 in: let [f : Nat -> Nat] be lambda [y : Nat] : x + y in: let [x : Nat] be 10 in: f(x)"
+assert run(s1) == [11]
+
+## addresses: x is in the enclosing lambda's frame, y in its own
+e = Parser("lambda [x : Nat] [y : Nat] : x + y").parse_expr()
+Resolver().resolve_root(e, e)
+assert (e.body.body.e1.depth, e.body.body.e1.index) == (1, 0)
+assert (e.body.body.e2.depth, e.body.body.e2.index) == (0, 0)
+
+## functions see every definition, lets stay local to their expression
+s2 = '''
+defconst [k : Nat] 5
+defunc g : [a : Nat] -> Nat: h(a) + k
+defunc h : [a : Nat] -> Nat: let [z : Nat] be a * 2 in: z
+g(4)
+let [k : Nat] be 1 in: k
+k
+'''
+assert run(s2) == [13, 1, 5]
+
+try:
+    run("zz")
+    assert False
+except UnboundVariable:
+    pass
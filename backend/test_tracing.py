@@ -0,0 +1,44 @@
+from loguru import logger
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+assert not tracer.on
+f = Lambda([Variable("x", TNat())], Variable("x", TNat()))
+assert Interpreter().eval(Application(f, Literal(3, TNat()))).value == 3
+
+## with a sink, events carry the objects themselves
+events = []
+sink = lambda event, payload: events.append((event, payload))
+tracer.attach(sink)
+try:
+    v = Interpreter().eval(Application(f, Literal(3, TNat())))
+    Normalizer().check(Context(), Literal(1, TNat()), TNat())
+finally:
+    tracer.detach(sink)
+assert not tracer.on
+(event, (rator, rand)), *rest = events
+assert event == 'apply' and isinstance(rator, Closure) and rand.value == 3
+assert [e for e, _ in rest] == ['check', 'checked']
+assert rest[1][1][0].val == 1
+
+## the Compiler and Machine trace applications too
+for engine in [Compiler(), Machine()]:
+    events = []
+    tracer.attach(sink)
+    try:
+        engine.eval(Application(f, Literal(3, TNat())))
+    finally:
+        tracer.detach(sink)
+    assert [e for e, _ in events] == ['apply'] and events[0][1][1].value == 3
+
+## log_sink only formats what loguru keeps, and nothing is kept here
+class Loud():
+    def __str__(self):
+        raise AssertionError("formatted a discarded event")
+
+log_sink()('apply', (Loud(),))
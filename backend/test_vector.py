@@ -0,0 +1,72 @@
+from loguru import logger
+from fractions import Fraction
+from array import array
+
+try:
+    from .lib import *
+except:
+    from lib import *
+
+logger.remove()
+
+nats = TList(TNat())
+
+def lit(n):
+    return Literal(n, TNat() if n >= 0 else TInt())
+
+def lst(*ns):
+    return List([lit(n) for n in ns], nats)
+
+for engine in [Interpreter(), Compiler(), Machine()]:
+    ## lists of numbers are packed into one machine-int buffer
+    l = engine.eval(lst(1, 2, 3))
+    assert isinstance(l, VNumList) and l.data.buf.typecode == 'q'
+    assert str(l) == "['1', '2', '3']"
+
+    ## list rules keep them packed and give the same results
+    assert engine.eval(Car(lst(4, 5))).value == 4
+    assert isinstance(engine.eval(Cdr(lst(4, 5))), VNumList)
+    assert list(engine.eval(Append(lst(1), lst(-2, 3), nats)).data) == [1, -2, 3]
+    assert engine.eval(Length(lst(1, 2, 3))).value == 3
+    assert engine.eval(Empty(Cdr(lst(1)))) is true
+    assert engine.eval(Member(lit(2), lst(1, 2, 3))) is true
+    assert engine.eval(Member(lit(7), lst(1, 2, 3))) is false
+
+    ## plus and times go elementwise, or a number against every element
+    assert list(engine.eval(Plus(lst(1, 2), lst(10, 20))).data) == [11, 22]
+    assert list(engine.eval(Times(lst(1, 2, 3), lit(-2))).data) == [-2, -4, -6]
+    try:
+        engine.eval(Plus(lst(1, 2), lst(1)))
+        assert False
+    except RuntimeError:
+        pass
+
+    ## numbers too large for a machine int, or fractions, stay exact
+    big = engine.eval(Times(lst(2**40, 1), lit(2**40)))
+    assert isinstance(big.data.buf, list) and big.data[0] == 2**80
+    half = engine.eval(Plus(List([Literal(Fraction(1, 2), TRational())], TList(TRational())), lit(1)))
+    assert half.data == [Fraction(3, 2)] and isinstance(half.elem, TRational)
+
+    ## lists of anything else are left as they were
+    assert not isinstance(engine.eval(List([Literal("a", TString())], TList(TString()))), VNumList)
+
+    ## cdr shares its buffer, and append writes into it when it can
+    l = engine.eval(lst(1, 2, 3))
+    tail = list_cdr(l)
+    assert tail.data.buf is l.data.buf and list(tail.data) == [2, 3]
+    grown = list_append(tail, engine.eval(lst(4)))
+    assert grown.data.buf is l.data.buf and list(grown.data) == [2, 3, 4]
+    assert list(l.data) == [1, 2, 3] and list(tail.data) == [2, 3]
+    ## the old end can't be extended again: that copies
+    other = list_append(tail, engine.eval(lst(5)))
+    assert other.data.buf is not l.data.buf and list(other.data) == [2, 3, 5]
+    assert list(grown.data) == [2, 3, 4]
+
+## PList slices are views, and compare like lists
+p = PList([1, 2, 3, 4])
+assert p[1:3] == [2, 3] and p[1:3].buf is p.buf and p[::2] == [1, 3]
+assert p[-1] == 4 and 3 in p and 3 not in p[:2] and len(p[3:1]) == 0
+## a wrapped list isn't owned, so appending never touches it
+xs = [1, 2]
+assert PList(xs) + [3] == [1, 2, 3] and xs == [1, 2]
+assert PList(array('q', [1])) + [2**70] == [1, 2**70]